@@ -0,0 +1,64 @@
+import time
+from benchmarks.corpus import build_corpus, write_corpus_pdfs
+from benchmarks.stats import summarize
+
+# === Benchmark per fungsi nlp/cv_processor.py ===
+# Tiap fungsi dijalankan `repeat` kali per dokumen, hasil dikelompokkan per bahasa + panjang CV.
+
+
+def _time(func, *args, repeat: int = 3, **kwargs) -> tuple[list[float], object]:
+    latencies, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        latencies.append(time.perf_counter() - start)
+    return latencies, result
+
+
+def run_function_benchmarks(pdf_dir: str, per_bucket: int = 3, repeat: int = 3) -> dict:
+    from nlp.cv_processor import (
+        extract_text_from_pdf, clean_text, detect_language, extract_keywords, boost_keywords, extract_entities
+    )
+    from nlp.sections import extract_sections
+    from nlp.model_loader import load_all_models, warmup_models
+
+    # Biaya load model dicatat terpisah, tidak ikut ke latency fungsi
+    start = time.perf_counter()
+    load_times = load_all_models()
+    warmup_models()
+    model_load_seconds = round(time.perf_counter() - start, 3)
+
+    corpus = build_corpus(per_bucket=per_bucket)
+    paths = write_corpus_pdfs(corpus, pdf_dir)
+
+    buckets: dict[str, dict[str, list[float]]] = {}
+    for doc, path in zip(corpus, paths):
+        timings = buckets.setdefault(f"{doc['language']}/{doc['length']}", {})
+
+        lat, raw_text = _time(extract_text_from_pdf, path, repeat=repeat)
+        timings.setdefault("extract_text_from_pdf", []).extend(lat)
+        text = clean_text(raw_text)
+
+        lat, language = _time(detect_language, text, repeat=repeat)
+        timings.setdefault("detect_language", []).extend(lat)
+
+        lat, _ = _time(extract_sections, text, repeat=repeat)
+        timings.setdefault("extract_sections", []).extend(lat)
+
+        lat, keywords = _time(extract_keywords, text, language=language, repeat=repeat)
+        timings.setdefault("extract_keywords", []).extend(lat)
+
+        lat, _ = _time(boost_keywords, keywords, text, min_required=25, repeat=repeat)
+        timings.setdefault("boost_keywords", []).extend(lat)
+
+        lat, _ = _time(extract_entities, text, language=language, repeat=repeat)
+        timings.setdefault("extract_entities", []).extend(lat)
+
+    return {
+        "model_load_seconds": model_load_seconds,
+        "model_load_breakdown": load_times,
+        "results": {
+            bucket: {name: summarize(values) for name, values in timings.items()}
+            for bucket, timings in buckets.items()
+        },
+    }
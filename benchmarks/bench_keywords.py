@@ -0,0 +1,23 @@
+from benchmarks.corpus import build_corpus
+
+# === Benchmark keyword: KeyBERT (kw_model.extract_keywords) vs nlp/keyword_engine.py ===
+# Speedup dan overlap (Jaccard) per bahasa di korpus sintetis; dasar memilih default KEYWORD_ENGINE.
+
+
+def run_keyword_benchmarks(per_bucket: int = 3) -> dict:
+    from nlp.cv_processor import clean_text
+    from nlp.keyword_engine import compare_with_keybert
+    from nlp.settings import KEYWORD_TOP_N
+
+    by_language: dict[str, list[str]] = {}
+    for doc in build_corpus(per_bucket=per_bucket):
+        by_language.setdefault(doc["language"], []).append(clean_text(doc["text"]))
+
+    # Warmup: muat model embedding + KeyBERT (dan stopword) sebelum diukur
+    for language, texts in by_language.items():
+        compare_with_keybert(texts[:1], language, top_n=KEYWORD_TOP_N)
+
+    return {
+        language: compare_with_keybert(texts, language, top_n=KEYWORD_TOP_N)
+        for language, texts in by_language.items()
+    }
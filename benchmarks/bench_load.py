@@ -0,0 +1,148 @@
+import asyncio
+import os
+import time
+import uuid
+from benchmarks.corpus import generate_cv, write_pdf
+from benchmarks.stats import summarize
+
+# === Load test end-to-end: /api/cv/upload dan /api/cv/chat ===
+# Skenario anonim (upload + chat tanpa DB) dan skenario login (upload tersimpan ke DB, chat dengan
+# retrieval CV + riwayat, my-uploads, chat-history).
+# base_url=None -> app dijalankan in-process lewat httpx.ASGITransport (fake Gemini terpasang di proses ini).
+# base_url="http://..." -> server terpisah, jalankan dengan: python -m benchmarks.serve
+
+
+def _client(base_url: str | None, timeout: float):
+    try:
+        import httpx
+    except ImportError:
+        raise SystemExit("Load test butuh httpx: pip install httpx")
+
+    if base_url:
+        return httpx.AsyncClient(base_url=base_url, timeout=timeout)
+    from main import app
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=timeout)
+
+
+async def _run_level(client, concurrency: int, total: int, make_request) -> dict:
+    latencies: list[float] = []
+    statuses: dict[int, int] = {}
+    errors = 0
+    queue: asyncio.Queue[int] = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(i)
+
+    async def worker():
+        nonlocal errors
+        while not queue.empty():
+            i = queue.get_nowait()
+            start = time.perf_counter()
+            try:
+                response = await make_request(client, i)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                if response.status_code >= 400:
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    summary = summarize(latencies, time.perf_counter() - start, errors)
+    summary["status_codes"] = statuses
+    return summary
+
+
+def _level_pdfs(pdf_dir: str, count: int, seed_base: int) -> list[str]:
+    paths = []
+    for i in range(count):
+        language = "en" if i % 2 == 0 else "id"
+        seed = seed_base + i
+        path = os.path.join(pdf_dir, "load", f"cv_{language}_{seed}.pdf")
+        if not os.path.exists(path):
+            write_pdf(generate_cv(language, "medium", seed), path)
+        paths.append(path)
+    return paths
+
+
+async def _upload(client, path: str):
+    with open(path, "rb") as f:
+        content = f.read()
+    return await client.post("/api/cv/upload", files={"file": ("cv.pdf", content, "application/pdf")})
+
+
+# User benchmark baru per run; cookie session disimpan di client
+async def _login(client):
+    username = f"bench-{uuid.uuid4().hex[:12]}"
+    form = {"username": username, "email": f"{username}@bench.local", "password": "bench"}
+    (await client.post("/api/auth/register", data=form)).raise_for_status()
+    (await client.post("/api/auth/login", data={"username": username, "password": "bench"})).raise_for_status()
+
+
+async def run_load_benchmarks(pdf_dir: str, concurrency_levels: list[int], requests_per_level: int,
+                              base_url: str | None = None, unique_cvs: bool = True,
+                              timeout: float = 120.0) -> dict:
+    scenarios = ["upload", "chat", "auth_upload", "auth_chat", "auth_my_uploads", "auth_history"]
+    results: dict[str, dict] = {name: {} for name in scenarios}
+
+    async with _client(base_url, timeout) as client, _client(base_url, timeout) as auth_client:
+        lifespan = None
+        if base_url is None:
+            from main import app
+            from services.startup import is_ready
+            lifespan = app.router.lifespan_context(app)
+            await lifespan.__aenter__()
+            while not is_ready():
+                await asyncio.sleep(0.5)
+
+        try:
+            await _login(auth_client)
+            for level_index, concurrency in enumerate(concurrency_levels):
+                # unique_cvs=True: tiap request CV berbeda (cache miss); False: CV sama (uji jalur cache)
+                count = requests_per_level if unique_cvs else 1
+                paths = _level_pdfs(pdf_dir, count, level_index * 10_000)
+                auth_paths = _level_pdfs(pdf_dir, count, level_index * 10_000 + 5_000)
+                upload_ids: list[int] = []
+
+                async def upload(client, i):
+                    return await _upload(client, paths[i % len(paths)])
+
+                async def chat(client, i):
+                    return await client.post("/api/cv/chat", json={"message": f"Bagaimana cara memperbaiki CV saya? #{i}"})
+
+                async def auth_upload(client, i):
+                    response = await _upload(client, auth_paths[i % len(auth_paths)])
+                    if response.status_code == 200 and response.json().get("upload_id"):
+                        upload_ids.append(response.json()["upload_id"])
+                    return response
+
+                async def auth_chat(client, i):
+                    return await client.post("/api/cv/chat", json={
+                        "message": f"Skill apa yang perlu saya tambahkan? #{i}",
+                        "upload_id": upload_ids[i % len(upload_ids)],
+                    })
+
+                async def auth_my_uploads(client, i):
+                    return await client.get("/api/cv/my-uploads")
+
+                async def auth_history(client, i):
+                    return await client.get(f"/api/cv/chat-history/{upload_ids[i % len(upload_ids)]}")
+
+                results["upload"][str(concurrency)] = await _run_level(client, concurrency, requests_per_level, upload)
+                results["chat"][str(concurrency)] = await _run_level(client, concurrency, requests_per_level, chat)
+                results["auth_upload"][str(concurrency)] = await _run_level(
+                    auth_client, concurrency, requests_per_level, auth_upload
+                )
+                if not upload_ids:
+                    # Tanpa CV tersimpan skenario berikutnya tidak bermakna (semua upload gagal)
+                    continue
+                for name, make_request in (("auth_chat", auth_chat), ("auth_my_uploads", auth_my_uploads),
+                                           ("auth_history", auth_history)):
+                    results[name][str(concurrency)] = await _run_level(
+                        auth_client, concurrency, requests_per_level, make_request
+                    )
+        finally:
+            if lifespan is not None:
+                await lifespan.__aexit__(None, None, None)
+
+    return results
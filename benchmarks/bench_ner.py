@@ -0,0 +1,105 @@
+import time
+from benchmarks.corpus import build_corpus
+from benchmarks.stats import summarize
+
+# === Benchmark NER + deteksi bahasa: pipeline lama vs pipeline ringkas ===
+# lama  : spaCy penuh (parser, tagger, lemmatizer, ...), seluruh teks dalam satu doc, langdetect atas seluruh teks
+# baru  : hanya NER, teks dibatasi & di-chunk lewat nlp.pipe, langdetect atas sampel + cache
+# scale > 1 menyambung teks CV berulang kali untuk mensimulasikan CV panjang.
+
+
+def _throughput(latencies: list[float], chars: int) -> dict:
+    total = sum(latencies)
+    return {
+        **summarize(latencies),
+        "docs_per_s": round(len(latencies) / total, 2) if total else None,
+        "chars_per_s": round(chars / total) if total else None,
+    }
+
+
+def _overlap(before: list[str], after: list[str]) -> float:
+    a, b = set(before), set(after)
+    return round(len(a & b) / len(a | b), 4) if a | b else 1.0
+
+
+def run_ner_benchmarks(per_bucket: int = 3, repeat: int = 3, scale: int = 1) -> dict:
+    import spacy
+    from langdetect import detect
+    from nlp import cv_processor
+    from nlp.cv_processor import clean_text, detect_language, extract_entities, extract_entities_batch, _entity_texts
+    from nlp.model_loader import get_spacy_model
+
+    full_models = {"en": spacy.load("en_core_web_sm"), "id": spacy.load("xx_ent_wiki_sm")}
+    trimmed_models = {"en": get_spacy_model("en"), "id": get_spacy_model("id")}
+
+    corpus = build_corpus(per_bucket=per_bucket)
+    texts = [clean_text(" ".join([doc["text"]] * scale)) for doc in corpus]
+    languages = [doc["language"] for doc in corpus]
+    chars = sum(len(t) for t in texts) * repeat
+
+    # Warmup supaya biaya inisialisasi tidak ikut terukur
+    for language in ("en", "id"):
+        full_models[language](texts[0])
+        extract_entities(texts[0], language)
+
+    results: dict[str, dict] = {}
+    overlaps = []
+
+    lat_before, lat_after = [], []
+    for text, language in zip(texts, languages):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            before = _entity_texts(full_models[language](text))
+            lat_before.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            after = extract_entities(text, language)
+            lat_after.append(time.perf_counter() - start)
+        overlaps.append(_overlap(before, after))
+    results["ner_before"] = _throughput(lat_before, chars)
+    results["ner_after"] = _throughput(lat_after, chars)
+
+    # Semua CV sekaligus (jalur upload-batch): satu nlp.pipe per bahasa
+    start = time.perf_counter()
+    for _ in range(repeat):
+        extract_entities_batch(texts, languages)
+    wall = time.perf_counter() - start
+    results["ner_batch_after"] = {
+        "wall_seconds": round(wall, 3),
+        "docs_per_s": round(len(texts) * repeat / wall, 2),
+        "chars_per_s": round(chars / wall),
+    }
+
+    lat_before, lat_cold, lat_warm, agree = [], [], [], 0
+    for text in texts:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            before = detect(text)
+            lat_before.append(time.perf_counter() - start)
+
+            cv_processor._language_cache.clear()
+            start = time.perf_counter()
+            after = detect_language(text)
+            lat_cold.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            detect_language(text)
+            lat_warm.append(time.perf_counter() - start)
+        agree += before == after
+    results["langdetect_before"] = _throughput(lat_before, chars)
+    results["langdetect_after_cold"] = _throughput(lat_cold, chars)
+    results["langdetect_after_cached"] = _throughput(lat_warm, chars)
+
+    return {
+        "documents": len(texts),
+        "scale": scale,
+        "mean_chars": round(sum(len(t) for t in texts) / len(texts)),
+        "pipelines": {
+            language: {"before": full_models[language].pipe_names, "after": trimmed_models[language].pipe_names}
+            for language in full_models
+        },
+        # Kemiripan himpunan entitas (Jaccard) lama vs baru, dan kesamaan hasil deteksi bahasa
+        "entity_jaccard_mean": round(sum(overlaps) / len(overlaps), 4),
+        "language_agreement": round(agree / (len(texts) * repeat), 4),
+        "results": results,
+    }
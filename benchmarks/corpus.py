@@ -0,0 +1,147 @@
+import os
+import random
+
+# === Korpus CV sintetis (deterministik dari seed) ===
+# Bahasa: en / id. Panjang: short (~1 halaman), medium (~2-3 halaman), long (~6+ halaman).
+LENGTHS = {"short": 1, "medium": 3, "long": 8}
+
+_VOCAB = {
+    "en": {
+        "headers": ["Summary", "Education", "Work Experience", "Organization", "Technical Skills"],
+        "summary": [
+            "Software engineer with {n} years of experience building scalable web services.",
+            "Data analyst passionate about turning raw data into actionable business insight.",
+            "Detail-oriented professional experienced in agile teams and cross-functional projects.",
+        ],
+        "education": [
+            "Bachelor of Computer Science, University of Example, {year}.",
+            "Master of Information Systems, Example Institute of Technology, {year}.",
+        ],
+        "experience": [
+            "Backend Developer at {company} ({year}-present): designed REST APIs with {skill} and {skill}.",
+            "Data Engineer at {company}: built ETL pipelines using {skill}, reduced processing time by {n}0%.",
+            "Intern at {company}: maintained dashboards in {skill} and automated reports with {skill}.",
+        ],
+        "organization": [
+            "Volunteer mentor at {company} coding bootcamp.",
+            "Head of technology division, student association, {year}.",
+        ],
+        "filler": [
+            "Collaborated with product managers to define requirements and deliver features on schedule.",
+            "Mentored junior engineers and led code reviews to improve overall code quality.",
+            "Improved monitoring and alerting, cutting incident response time significantly.",
+        ],
+    },
+    "id": {
+        "headers": ["Profil", "Pendidikan", "Pengalaman Kerja", "Organisasi", "Keahlian"],
+        "summary": [
+            "Lulusan teknik informatika dengan pengalaman {n} tahun mengembangkan aplikasi web.",
+            "Analis data yang senang mengolah data menjadi informasi yang berguna bagi bisnis.",
+            "Pribadi yang teliti, mampu bekerja dalam tim maupun secara mandiri.",
+        ],
+        "education": [
+            "S1 Teknik Informatika, Universitas Contoh, lulus {year}.",
+            "S2 Sistem Informasi, Institut Teknologi Contoh, lulus {year}.",
+        ],
+        "experience": [
+            "Backend Developer di {company} ({year}-sekarang): membangun API menggunakan {skill} dan {skill}.",
+            "Data Engineer di {company}: membuat pipeline ETL dengan {skill}, mempercepat proses {n}0%.",
+            "Magang di {company}: mengelola dashboard {skill} dan otomasi laporan dengan {skill}.",
+        ],
+        "organization": [
+            "Relawan pengajar pemrograman di komunitas {company}.",
+            "Ketua divisi teknologi himpunan mahasiswa, {year}.",
+        ],
+        "filler": [
+            "Bekerja sama dengan tim produk untuk menyusun kebutuhan dan merilis fitur tepat waktu.",
+            "Membimbing developer junior dan melakukan code review untuk menjaga kualitas kode.",
+            "Meningkatkan sistem monitoring sehingga waktu penanganan insiden lebih cepat.",
+        ],
+    },
+}
+_SKILLS = ["Python", "SQL", "Docker", "Kubernetes", "FastAPI", "PostgreSQL", "React", "TensorFlow",
+           "Airflow", "Spark", "Tableau", "Git", "Linux", "AWS", "Google Cloud", "Excel"]
+_COMPANIES = ["PT Maju Jaya", "Acme Corp", "Example Labs", "PT Data Nusantara", "Globex", "Initech"]
+
+
+def generate_cv(language: str, length: str, seed: int = 0) -> str:
+    rng = random.Random(f"{language}-{length}-{seed}")
+    vocab = _VOCAB[language]
+
+    def fill(template: str) -> str:
+        return template.format(
+            n=rng.randint(1, 9), year=rng.randint(2010, 2024),
+            company=rng.choice(_COMPANIES), skill=rng.choice(_SKILLS),
+        )
+
+    pages = LENGTHS[length]
+    lines = [f"{rng.choice(['Andi', 'Budi', 'Citra', 'Dewi', 'Alex', 'Sam'])} {rng.choice(['Pratama', 'Lee', 'Smith', 'Wijaya'])}"]
+    sections = ["summary", "education", "experience", "organization"]
+    for header, key in zip(vocab["headers"], sections):
+        lines.append(header)
+        count = 1 if key == "summary" else 2 * pages
+        lines += [fill(rng.choice(vocab[key])) for _ in range(count)]
+        if key == "experience":
+            lines += [rng.choice(vocab["filler"]) for _ in range(6 * pages)]
+    lines.append(vocab["headers"][-1])
+    lines.append(", ".join(rng.sample(_SKILLS, 8)))
+    return "\n".join(lines)
+
+
+def build_corpus(languages=("en", "id"), lengths=tuple(LENGTHS), per_bucket: int = 3) -> list[dict]:
+    return [
+        {"language": language, "length": length, "seed": seed, "text": generate_cv(language, length, seed)}
+        for language in languages
+        for length in lengths
+        for seed in range(per_bucket)
+    ]
+
+
+# === Penulis PDF minimal (tanpa dependency) ===
+# Satu font standar Helvetica, teks per baris; cukup untuk diuji oleh pdfplumber / pypdfium2.
+def _pdf_escape(text: str) -> str:
+    text = text.encode("latin-1", "replace").decode("latin-1")
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(text: str, path: str, lines_per_page: int = 45):
+    lines = text.splitlines() or [""]
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)]
+
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page_lines in pages:
+        body = "BT /F1 10 Tf 14 TL 50 800 Td " + " ".join(f"({_pdf_escape(line[:110])}) Tj T*" for line in page_lines) + " ET"
+        stream = body.encode("latin-1")
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{body}\nendstream")
+        content_id = len(objects)
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def write_corpus_pdfs(corpus: list[dict], directory: str) -> list[str]:
+    paths = []
+    for doc in corpus:
+        path = os.path.join(directory, f"cv_{doc['language']}_{doc['length']}_{doc['seed']}.pdf")
+        if not os.path.exists(path):
+            write_pdf(doc["text"], path)
+        paths.append(path)
+    return paths
@@ -0,0 +1,15 @@
+import os
+from services.llm_fake import FakeGenerativeModel
+
+# === Gemini palsu untuk benchmark offline ===
+# Latency dikontrol lewat BENCH_GEMINI_LATENCY (detik) atau argumen install_fake_gemini().
+BENCH_GEMINI_LATENCY = float(os.getenv("BENCH_GEMINI_LATENCY", "0.3"))
+
+
+# Semua panggilan Gemini lewat services.llm_client, jadi cukup ganti model milik client bersama
+def install_fake_gemini(latency: float = BENCH_GEMINI_LATENCY):
+    from services.llm_client import llm_client, GEMINI_MODEL_NAME
+
+    FakeGenerativeModel.latency = latency
+    llm_client.use_model(FakeGenerativeModel(GEMINI_MODEL_NAME))
+    return FakeGenerativeModel
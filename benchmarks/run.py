@@ -0,0 +1,113 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+# === Benchmark suite offline ===
+# Contoh:
+#   python -m benchmarks.run --suite functions
+#   python -m benchmarks.run --suite load --concurrency 1,4,16 --requests 40 --gemini-latency 0.3
+#   python -m benchmarks.run --suite all --output bench-results/baseline.json
+#   python -m benchmarks.run --suite ner --scale 5
+#   python -m benchmarks.run --suite keywords --per-bucket 5
+# Output JSON berisi p50/p95/p99, req/s dan peak RSS sehingga dua run bisa dibandingkan.
+# Suite load juga menjalankan skenario login (upload tersimpan ke DB, chat dengan retrieval, riwayat).
+
+BENCH_DIR = os.getenv("BENCH_DIR", "bench-data")
+
+
+def _prepare_environment(work_dir: str):
+    # Harus sebelum import main/databases: DB dan storage lokal, bukan milik server sungguhan
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.abspath(os.path.join(work_dir, 'bench.db'))}")
+    os.environ.setdefault("CV_STORAGE_DIR", os.path.join(work_dir, "cv_uploads"))
+    os.environ.setdefault("CV_JOB_DIR", os.path.join(work_dir, "cv_jobs"))
+    os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return None
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Benchmark MatchCV server (offline)")
+    parser.add_argument("--suite", choices=["functions", "load", "ner", "keywords", "all"], default="all")
+    parser.add_argument("--per-bucket", type=int, default=3, help="CV per kombinasi bahasa x panjang")
+    parser.add_argument("--repeat", type=int, default=3, help="pengulangan per fungsi per CV")
+    parser.add_argument("--scale", type=int, default=1, help="suite ner: sambung teks CV N kali (CV panjang)")
+    parser.add_argument("--concurrency", default="1,4,16", help="level concurrency, dipisah koma")
+    parser.add_argument("--requests", type=int, default=40, help="jumlah request per endpoint per level")
+    parser.add_argument("--gemini-latency", type=float, default=None, help="latency fake Gemini (detik)")
+    parser.add_argument("--base-url", default=None, help="target server (default: app in-process)")
+    parser.add_argument("--cached", action="store_true", help="upload CV yang sama berulang (uji jalur cache)")
+    parser.add_argument("--server-pid", type=int, default=None,
+                        help="PID server --base-url untuk sampling RSS (default: proses benchmark ini)")
+    parser.add_argument("--output", default=None, help="file JSON hasil (default: stdout)")
+    args = parser.parse_args(argv)
+
+    os.makedirs(BENCH_DIR, exist_ok=True)
+    _prepare_environment(BENCH_DIR)
+
+    from benchmarks.fake_gemini import install_fake_gemini, BENCH_GEMINI_LATENCY
+    from benchmarks.stats import peak_rss_mb, RssSampler
+
+    latency = args.gemini_latency if args.gemini_latency is not None else BENCH_GEMINI_LATENCY
+    fake = install_fake_gemini(latency)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "git_commit": _git_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": vars(args),
+            "gemini_latency_seconds": latency,
+            "env": {k: v for k, v in os.environ.items() if k.startswith(("CV_", "KEYWORD_", "EMBEDDING_", "PDF_", "SPACY_", "NER_", "LANGDETECT_", "LLM_"))},
+        }
+    }
+
+    # RSS proses ini (atau server --server-pid) + worker pool yang masih hidup, di-sample selama suite berjalan
+    with RssSampler(args.server_pid) as sampler:
+        if args.suite in ("functions", "all"):
+            from benchmarks.bench_functions import run_function_benchmarks
+            report["functions"] = run_function_benchmarks(
+                os.path.join(BENCH_DIR, "corpus"), per_bucket=args.per_bucket, repeat=args.repeat
+            )
+
+        if args.suite in ("ner", "all"):
+            from benchmarks.bench_ner import run_ner_benchmarks
+            report["ner"] = run_ner_benchmarks(per_bucket=args.per_bucket, repeat=args.repeat, scale=args.scale)
+
+        if args.suite in ("keywords", "all"):
+            from benchmarks.bench_keywords import run_keyword_benchmarks
+            report["keywords"] = run_keyword_benchmarks(per_bucket=args.per_bucket)
+
+        if args.suite in ("load", "all"):
+            from benchmarks.bench_load import run_load_benchmarks
+            levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+            report["load"] = asyncio.run(run_load_benchmarks(
+                BENCH_DIR, levels, args.requests, base_url=args.base_url, unique_cvs=not args.cached
+            ))
+            report["load"]["fake_gemini_calls"] = fake.calls
+
+    report["peak_rss"] = {**peak_rss_mb(), "live": sampler.summary()}
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            f.write(output)
+        print(f"[BENCH] hasil disimpan ke {args.output}")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+import os
+
+# === Server untuk load test dari luar proses (python -m benchmarks.run --suite load --base-url ...) ===
+# Menjalankan app asli dengan Gemini palsu; latency lewat BENCH_GEMINI_LATENCY.
+#   BENCH_GEMINI_LATENCY=0.3 python -m benchmarks.serve
+if __name__ == "__main__":
+    import uvicorn
+    from benchmarks.run import BENCH_DIR, _prepare_environment
+    from benchmarks.fake_gemini import install_fake_gemini
+
+    os.makedirs(BENCH_DIR, exist_ok=True)
+    _prepare_environment(BENCH_DIR)
+    install_fake_gemini()
+
+    from main import app
+    uvicorn.run(app, host="127.0.0.1", port=int(os.getenv("BENCH_PORT", "8001")), log_level="warning")
@@ -0,0 +1,121 @@
+import math
+import os
+import resource
+import threading
+
+
+def percentile(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    # Nearest-rank, sama untuk semua run supaya hasil bisa dibandingkan
+    rank = max(math.ceil(q / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize(latencies: list[float], wall_seconds: float | None = None, errors: int = 0) -> dict:
+    ms = lambda v: round(v * 1000, 3) if v is not None else None
+    summary = {
+        "count": len(latencies),
+        "errors": errors,
+        "mean_ms": ms(sum(latencies) / len(latencies)) if latencies else None,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "max_ms": ms(max(latencies)) if latencies else None,
+    }
+    if wall_seconds:
+        summary["req_per_s"] = round(len(latencies) / wall_seconds, 2)
+    return summary
+
+
+# ru_maxrss dalam KB di Linux; children = hanya proses anak yang sudah selesai (di-wait),
+# worker pool yang masih hidup tidak terhitung -> lihat RssSampler
+def peak_rss_mb() -> dict:
+    return {
+        "self_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "children_mb": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+    }
+
+
+# === RSS live: satu proses + semua turunannya (worker pool, pool halaman PDF) ===
+# VmRSS dibaca dari /proc/<pid>/status setiap `interval` detik selama benchmark berjalan (Linux).
+def _children_map() -> dict[int, list[int]]:
+    children: dict[int, list[int]] = {}
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat") as f:
+                # Field setelah "(comm)": state, ppid, ...
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(name))
+    return children
+
+
+def _rss_kb(pid: int) -> int | None:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+class RssSampler:
+    def __init__(self, root_pid: int | None = None, interval: float = 0.25):
+        self.root_pid = root_pid or os.getpid()
+        self.interval = interval
+        self.samples = 0
+        self.peak_total_kb = 0
+        self.peak_kb: dict[int, int] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def sample(self):
+        children = _children_map()
+        pids, total = [self.root_pid], 0
+        while pids:
+            pid = pids.pop()
+            rss = _rss_kb(pid)
+            if rss is None:
+                continue
+            total += rss
+            self.peak_kb[pid] = max(self.peak_kb.get(pid, 0), rss)
+            pids.extend(children.get(pid, []))
+        self.samples += 1
+        self.peak_total_kb = max(self.peak_total_kb, total)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def __enter__(self):
+        if os.path.isdir("/proc"):
+            self.sample()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self.sample()
+
+    def summary(self) -> dict:
+        if not self.samples:
+            return {"available": False}
+        mb = lambda kb: round(kb / 1024, 1)
+        return {
+            "available": True,
+            "root_pid": self.root_pid,
+            "interval_s": self.interval,
+            "samples": self.samples,
+            "peak_total_mb": mb(self.peak_total_kb),
+            "peak_per_process_mb": {str(pid): mb(kb) for pid, kb in sorted(self.peak_kb.items())},
+        }
@@ -1,9 +1,4 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-import os
+# Engine dan session dibuat sekali di databases/database.py; modul ini hanya meneruskan
+from databases.database import engine, SessionLocal, DATABASE_URL
 
-# Ganti dengan koneksi PostgreSQL Anda
-DATABASE_URL = os.getenv("DATABASE_URL")
-
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
\ No newline at end of file
+__all__ = ["engine", "SessionLocal", "DATABASE_URL"]
@@ -1,16 +1,105 @@
 import os
+import time
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import sessionmaker, declarative_base, Session
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 from dotenv import load_dotenv
+from monitoring.metrics import Histogram, Counter, CallbackGauge
 
 # Muat .env
 load_dotenv()
 
 # Ambil dari environment
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Kosong = diturunkan dari DATABASE_URL (postgresql -> asyncpg, sqlite -> aiosqlite)
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", "")
 
-# Buat engine koneksi
-engine = create_engine(DATABASE_URL)
+# === Konfigurasi Pool ===
+# Satu engine sync + satu engine async per proses; pool_size + max_overflow = koneksi maksimum per engine
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+
+_ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+    "mysql": "mysql+aiomysql",
+}
+
+# === Metrics Pool ===
+POOL_CHECKOUT_SECONDS = Histogram(
+    "matchcv_db_pool_checkout_seconds", "Waktu tunggu mengambil koneksi dari pool", ("engine",),
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+POOL_CHECKOUT_TIMEOUTS = Counter(
+    "matchcv_db_pool_checkout_timeouts_total", "Checkout koneksi yang gagal karena pool penuh", ("engine",)
+)
+
+
+# Waktu tunggu checkout diukur di _do_get (termasuk menunggu slot kosong saat pool jenuh)
+class _TimedPoolMixin:
+    engine_label = "sync"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            POOL_CHECKOUT_TIMEOUTS.inc(engine=self.engine_label)
+            raise
+        finally:
+            POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - start, engine=self.engine_label)
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    engine_label = "sync"
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    engine_label = "async"
+
+
+def _is_sqlite_memory(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:")
+
+
+def _engine_options(url: str, poolclass) -> dict:
+    backend = make_url(url).get_backend_name()
+    options: dict = {"pool_pre_ping": DB_POOL_PRE_PING}
+    if backend == "sqlite":
+        options["connect_args"] = {"check_same_thread": False}
+        # SQLite in-memory memakai pool khusus per thread; tidak bisa diberi ukuran pool
+        if _is_sqlite_memory(url):
+            return options
+    options.update(
+        poolclass=poolclass,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    return options
+
+
+def async_database_url(url: str = DATABASE_URL) -> str:
+    if ASYNC_DATABASE_URL:
+        return ASYNC_DATABASE_URL
+    parsed = make_url(url)
+    driver = _ASYNC_DRIVERS.get(parsed.get_backend_name())
+    # Sudah memakai driver async, atau backend tanpa driver async yang dikenal
+    if driver is None or parsed.drivername in _ASYNC_DRIVERS.values():
+        return url
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+# Buat engine koneksi (satu-satunya engine sync di aplikasi)
+engine = create_engine(DATABASE_URL, **_engine_options(DATABASE_URL, TimedQueuePool))
 
 # Session
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -24,4 +113,71 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+# === Engine & Session Async (route async) ===
+# Dibuat saat pertama dipakai supaya proses yang hanya butuh engine sync (job worker, worker pool)
+# tidak perlu driver async.
+_async_engine = None
+_async_sessionmaker = None
+
+
+def get_async_engine():
+    global _async_engine, _async_sessionmaker
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+        url = async_database_url()
+        _async_engine = create_async_engine(url, **_engine_options(url, TimedAsyncQueuePool))
+        _async_sessionmaker = async_sessionmaker(_async_engine, class_=AsyncSession, expire_on_commit=False)
+    return _async_engine
+
+
+def AsyncSessionLocal():
+    get_async_engine()
+    return _async_sessionmaker()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def dispose_engines():
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    engine.dispose()
+
+
+# === Status pool (dibaca saat scrape /metrics dan di /health/ready) ===
+def _status(pool) -> dict:
+    if not hasattr(pool, "checkedout"):
+        return {}
+    size, overflow = pool.size(), pool.overflow()
+    capacity = size + DB_MAX_OVERFLOW
+    return {
+        "size": size,
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(overflow, 0),
+        "saturation": round(pool.checkedout() / capacity, 4) if capacity else 0.0,
+    }
+
+
+def db_pool_stats() -> dict:
+    stats = {"sync": _status(engine.pool)}
+    if _async_engine is not None:
+        stats["async"] = _status(_async_engine.sync_engine.pool)
+    return stats
+
+
+CallbackGauge(
+    "matchcv_db_pool_connections", "Koneksi pool DB per engine dan status", ("engine", "state"),
+    lambda: {
+        (name, state): value
+        for name, status in db_pool_stats().items()
+        for state, value in status.items()
+    },
+)
+
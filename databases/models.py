@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, LargeBinary, UniqueConstraint, Index, JSON
+from sqlalchemy.dialects.postgresql import JSONB
 from datetime import datetime
 import json
 
@@ -11,6 +12,7 @@ class User(Base):
     username = Column(String, unique=True, index=True, nullable=False)
     email = Column(String, unique=True, index=True, nullable=False)
     password = Column(String, nullable=False)
+    role = Column(String, nullable=False, default="user", server_default="user")  # "user" | "recruiter"
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
@@ -22,14 +24,20 @@ class CVUpload(Base):
     original_filename = Column(String, nullable=False)
     saved_path = Column(String, nullable=False)
     extracted_text = Column(Text, nullable=False)
-    keywords = Column(Text, nullable=False)  # Simpan sebagai JSON string
+    # List keyword (JSON native; JSONB di PostgreSQL). Pencarian skill memakai tabel cv_keywords.
+    keywords = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # /my-uploads: filter user_id, urut (created_at, id) terbaru dulu -> keyset pagination
+    __table_args__ = (
+        Index("ix_cv_uploads_user_created", "user_id", "created_at", "id"),
+    )
+
     def set_keywords(self, keywords: list[str]):
-        self.keywords = json.dumps(keywords)
+        self.keywords = list(keywords)
 
     def get_keywords(self) -> list[str]:
-        return json.loads(self.keywords)
+        return list(self.keywords or [])
 
 class ChatHistory(Base):
     __tablename__ = "chat_histories"
@@ -39,4 +47,115 @@ class ChatHistory(Base):
     cv_upload_id = Column(Integer, ForeignKey("cv_uploads.id"), nullable=True)  # relasi opsional
     role = Column(String, nullable=False)  # "user" atau "llm"
     message = Column(Text, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # /chat-history dan riwayat prompt chat: filter (user_id, cv_upload_id), urut (created_at, id)
+    __table_args__ = (
+        Index("ix_chat_histories_user_upload_created", "user_id", "cv_upload_id", "created_at", "id"),
+    )
+
+class CVJob(Base):
+    __tablename__ = "cv_jobs"
+
+    id = Column(String(36), primary_key=True)  # UUID, dikembalikan ke client sebagai job_id
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    original_filename = Column(String, nullable=False)
+    file_path = Column(String, nullable=False)  # PDF menunggu diproses (harus bisa diakses worker)
+    content_hash = Column(String(64), nullable=True)  # SHA-256 dari stream_upload_to_disk (job lama: None)
+    status = Column(String, nullable=False, default="queued", index=True)  # queued | processing | done | failed
+    result = Column(Text, nullable=True)  # JSON string, bentuk sama dengan response /upload
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")  # berapa kali diklaim runner
+    upload_id = Column(Integer, ForeignKey("cv_uploads.id"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def set_result(self, result: dict):
+        self.result = json.dumps(result)
+
+    def get_result(self) -> dict | None:
+        return json.loads(self.result) if self.result else None
+
+
+class CVAnalysisCache(Base):
+    __tablename__ = "cv_analysis_cache"
+
+    # Kunci: hash SHA-256 isi PDF + fingerprint model/parameter ekstraksi
+    content_hash = Column(String(64), primary_key=True)
+    fingerprint = Column(String(16), primary_key=True)
+    extracted_text = Column(Text, nullable=False)
+    lang_code = Column(String, nullable=False)
+    keywords = Column(Text, nullable=False)  # Simpan sebagai JSON string
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class CVChunk(Base):
+    __tablename__ = "cv_chunks"
+    __table_args__ = (UniqueConstraint("cv_upload_id", "chunk_index", name="uq_cv_chunks_upload_index"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    cv_upload_id = Column(Integer, ForeignKey("cv_uploads.id"), nullable=False, index=True)
+    chunk_index = Column(Integer, nullable=False)
+    text = Column(Text, nullable=False)
+    embedding = Column(LargeBinary, nullable=False)  # float32 ter-normalisasi (numpy tobytes)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class CVBlob(Base):
+    __tablename__ = "cv_blobs"
+
+    # File PDF disimpan sekali per isi (content-addressed); CVUpload.saved_path menunjuk ke path ini
+    content_hash = Column(String(64), primary_key=True)
+    path = Column(String, unique=True, nullable=False)
+    size = Column(Integer, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=1)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+
+# === Katalog lowongan (sumber opsional untuk services/job_index.py, JOB_CATALOG_SOURCE=table) ===
+class JobPosting(Base):
+    __tablename__ = "job_postings"
+
+    id = Column(Integer, primary_key=True, index=True)
+    title = Column(String, nullable=False)
+    company = Column(String, nullable=True)
+    location = Column(String, nullable=True)
+    url = Column(String, nullable=True)
+    skills = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=True)
+    description = Column(Text, nullable=True)
+    active = Column(Integer, nullable=False, default=1, server_default="1")
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+# === Inverted index keyword -> CV (pencarian skill lintas CV) ===
+# Satu baris per keyword ter-normalisasi per CV (frasa + kata penyusunnya).
+# user_id disalin dari cv_uploads supaya pencarian "CV milik saya" cukup memakai index.
+class CVKeyword(Base):
+    __tablename__ = "cv_keywords"
+
+    keyword = Column(String(200), primary_key=True)
+    cv_upload_id = Column(Integer, ForeignKey("cv_uploads.id"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+
+    __table_args__ = (
+        Index("ix_cv_keywords_user_keyword", "user_id", "keyword"),
+        Index("ix_cv_keywords_upload", "cv_upload_id"),
+    )
+
+
+# === Embedding CV (dokumen + per section), dipakai untuk pencarian CV serupa ===
+class CVEmbedding(Base):
+    __tablename__ = "cv_embeddings"
+
+    id = Column(Integer, primary_key=True)  # urutan insert: index in-memory dimuat inkremental (id > terakhir)
+    cv_upload_id = Column(Integer, ForeignKey("cv_uploads.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    kind = Column(String(50), nullable=False)  # "document" atau nama section (pengalaman, skill, ...)
+    model = Column(String, nullable=False)  # model saat vektor dihitung (dokumen/section: CV_EMBEDDING_MODEL)
+    embedding = Column(LargeBinary, nullable=False)  # float32 ter-normalisasi (numpy tobytes)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("cv_upload_id", "kind", name="uq_cv_embeddings_upload_kind"),
+        Index("ix_cv_embeddings_kind_id", "kind", "id"),
+    )
@@ -0,0 +1,71 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from databases.database import Base
+
+# === Sinkronisasi schema ringan (tanpa tool migrasi) ===
+# create_all hanya membuat tabel yang belum ada; kolom & index baru pada tabel lama ditambahkan di sini.
+
+
+def ensure_columns(engine: Engine) -> list[str]:
+    inspector = inspect(engine)
+    added = []
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {col["name"] for col in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            # Hanya kolom yang aman ditambahkan ke tabel berisi data: nullable atau punya server_default
+            if not column.nullable and column.server_default is None:
+                raise RuntimeError(f"Kolom {table.name}.{column.name} butuh server_default untuk ditambahkan otomatis")
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(engine.dialect)}"
+            if column.server_default is not None:
+                ddl += f" DEFAULT '{column.server_default.arg}'"
+            if not column.nullable:
+                ddl += " NOT NULL"
+            with engine.begin() as conn:
+                conn.execute(text(ddl))
+            added.append(f"{table.name}.{column.name}")
+    return added
+
+
+def ensure_indexes(engine: Engine) -> list[str]:
+    inspector = inspect(engine)
+    created = []
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=engine, checkfirst=True)
+                created.append(index.name)
+    return created
+
+
+# cv_uploads.keywords dulu Text berisi string JSON; di PostgreSQL diubah ke JSONB.
+# SQLite menyimpan JSON sebagai teks, jadi data lama langsung terbaca tanpa migrasi.
+def migrate_keywords_to_json(engine: Engine) -> bool:
+    if engine.dialect.name != "postgresql":
+        return False
+    columns = {col["name"]: col for col in inspect(engine).get_columns("cv_uploads")}
+    if "keywords" not in columns or str(columns["keywords"]["type"]).upper() == "JSONB":
+        return False
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE cv_uploads ALTER COLUMN keywords TYPE JSONB USING keywords::jsonb"))
+    return True
+
+
+def ensure_schema(engine: Engine) -> dict:
+    import databases.models  # noqa: F401  (daftarkan semua tabel ke Base)
+
+    Base.metadata.create_all(bind=engine)
+    report = {
+        "columns_added": ensure_columns(engine),
+        "keywords_migrated": migrate_keywords_to_json(engine),
+        "indexes_created": ensure_indexes(engine),
+    }
+    if any(report.values()):
+        print(f"[SCHEMA] {report}")
+    return report
@@ -1,19 +1,56 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 from starlette.middleware.sessions import SessionMiddleware
-from databases.database import Base, engine
 import google.generativeai as genai
 import os
+import time
 
-from routes import auth, upload
+from routes import auth, upload, health, metrics
+from nlp.worker_pool import start_pool, shutdown_pool
+from services.startup import run_startup
+from services.llm_client import llm_client
+from databases.database import dispose_engines
+from services.cv_storage import CV_MAX_UPLOAD_BYTES
+from services.batch_upload import CV_BATCH_MAX_FILES
+from monitoring.metrics import start_request_timer, REQUEST_SECONDS, METRICS_ENABLED, METRICS_SERVER_TIMING
 
 # === Konfigurasi ENV dan Gemini ===
 load_dotenv()
 genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 
+# === Lifecycle: worker pool NLP + startup di background ===
+# Schema DB dan model NLP disiapkan bersamaan di background; cek /health/ready
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_pool()
+    # Panggilan Gemini dari threadpool (finalize_upload) dijalankan di loop ini: berbagi limit & breaker
+    llm_client.bind_loop()
+    startup_task = asyncio.create_task(run_startup())
+    yield
+    startup_task.cancel()
+    shutdown_pool()
+    await dispose_engines()
+
 # === Inisialisasi FastAPI ===
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+
+# === Batas ukuran upload ===
+# Ditolak dari header Content-Length sebelum body dibaca; upload tanpa Content-Length
+# tetap dibatasi saat di-stream ke disk (services/cv_storage.py).
+# Didaftarkan sebelum CORS: middleware yang didaftarkan belakangan membungkus yang lebih awal,
+# jadi response 413 tetap melewati CORSMiddleware dan membawa header Access-Control.
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    if request.method == "POST" and request.url.path.startswith("/api/cv/upload"):
+        limit = CV_MAX_UPLOAD_BYTES * (CV_BATCH_MAX_FILES if request.url.path.endswith("/upload-batch") else 1)
+        length = request.headers.get("content-length")
+        if length and length.isdigit() and int(length) > limit:
+            return JSONResponse({"detail": "Ukuran file terlalu besar."}, status_code=413)
+    return await call_next(request)
 
 # === Middleware CORS ===
 app.add_middleware(
@@ -22,13 +59,41 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Server-Timing"],
 )
 
+# === Metrics per request ===
+# Latency total per endpoint + durasi per stage (histogram di /metrics), opsional header Server-Timing.
+# Untuk response streaming, stage yang tercatat hanya yang selesai sebelum stream dimulai.
+@app.middleware("http")
+async def collect_metrics(request: Request, call_next):
+    if not METRICS_ENABLED or request.url.path == "/metrics":
+        return await call_next(request)
+
+    timer = start_request_timer("unmatched")
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        # Template path ("/api/cv/jobs/{job_id}") supaya label tidak meledak per id
+        route = request.scope.get("route")
+        timer.endpoint = getattr(route, "path_format", None) or getattr(route, "path", "unmatched")
+        elapsed = time.perf_counter() - start
+        REQUEST_SECONDS.observe(elapsed, endpoint=timer.endpoint, method=request.method, status=status)
+        timer.record()
+
+    if METRICS_SERVER_TIMING:
+        timer.add("total", elapsed)
+        response.headers["Server-Timing"] = timer.server_timing()
+    return response
+
 # === Middleware Session ===
 app.add_middleware(SessionMiddleware, secret_key="SUPERSECRET")
 
 # === Router ===
 app.include_router(auth.router, prefix="/api/auth", tags=["Auth"])
 app.include_router(upload.router, prefix="/api/cv", tags=["CV Upload"])
-
-Base.metadata.create_all(bind=engine)
\ No newline at end of file
+app.include_router(health.router, prefix="/health", tags=["Health"])
+app.include_router(metrics.router, tags=["Metrics"])
\ No newline at end of file
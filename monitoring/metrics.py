@@ -0,0 +1,233 @@
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# === Konfigurasi Metrics ===
+# Metrics disimpan di memori proses web dan diekspor di /metrics (format teks Prometheus).
+# Biaya per observasi: satu perf_counter + bisect + update dict di bawah lock.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+# 1 = tambahkan header Server-Timing (durasi per stage) ke setiap response
+METRICS_SERVER_TIMING = os.getenv("METRICS_SERVER_TIMING", "0") == "1"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_labels(labelnames: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{k}="{_escape(v)}"' for k, v in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+# === Tipe Metric ===
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {v}" for k, v in items]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label: [hitungan per bucket (non-kumulatif) + overflow, sum, count]
+        self._values: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = [(k, list(v[0]), v[1], v[2]) for k, v in self._values.items()]
+
+        lines = []
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {round(total, 6)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+# Gauge dihitung saat scrape dari callback (ukuran cache, antrian worker pool, dll.)
+# callback mengembalikan {tuple nilai label: angka}
+class CallbackGauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...], callback):
+        super().__init__(name, help_text, labelnames)
+        self.callback = callback
+
+    def _samples(self) -> list[str]:
+        try:
+            values = self.callback()
+        except Exception as e:
+            print(f"[METRICS] gauge {self.name} gagal: {e}")
+            return []
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {v}" for k, v in values.items()]
+
+
+REGISTRY: list[Metric] = []
+
+
+def render_metrics() -> str:
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+
+# === Metrics aplikasi ===
+REQUEST_SECONDS = Histogram(
+    "matchcv_request_seconds", "Latency request HTTP per endpoint", ("endpoint", "method", "status")
+)
+STAGE_SECONDS = Histogram(
+    "matchcv_stage_seconds", "Latency per stage pipeline (pdf, detect_language, keywords, gemini, db_commit, ...)",
+    ("endpoint", "stage", "language")
+)
+GEMINI_REQUESTS = Counter("matchcv_gemini_requests_total", "Jumlah panggilan Gemini", ("purpose",))
+GEMINI_ERRORS = Counter("matchcv_gemini_errors_total", "Jumlah panggilan Gemini yang gagal", ("purpose", "error"))
+
+
+# === Timer per request ===
+# Disimpan di ContextVar oleh middleware; stage() di mana pun dalam request (termasuk
+# run_in_threadpool) menambah durasi ke timer yang sama. Durasi dari worker pool
+# (proses lain) dikirim balik lewat hasil task lalu digabung dengan record_timings().
+class StageTimer:
+    def __init__(self, endpoint: str = "background"):
+        self.endpoint = endpoint
+        self.language = "unknown"
+        self.timings: dict[str, float] = {}
+
+    def add(self, stage_name: str, seconds: float):
+        self.timings[stage_name] = self.timings.get(stage_name, 0.0) + seconds
+
+    def merge(self, timings: dict[str, float] | None):
+        for stage_name, seconds in (timings or {}).items():
+            self.add(stage_name, seconds)
+
+    @contextmanager
+    def stage(self, stage_name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage_name, time.perf_counter() - start)
+
+    def record(self):
+        for stage_name, seconds in self.timings.items():
+            STAGE_SECONDS.observe(seconds, endpoint=self.endpoint, stage=stage_name, language=self.language)
+
+    def server_timing(self) -> str:
+        return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.timings.items())
+
+
+_current_timer: ContextVar[StageTimer | None] = ContextVar("matchcv_stage_timer", default=None)
+
+
+def start_request_timer(endpoint: str) -> StageTimer:
+    timer = StageTimer(endpoint)
+    _current_timer.set(timer)
+    return timer
+
+
+def current_timer() -> StageTimer | None:
+    return _current_timer.get()
+
+
+# Di luar request (job worker, task background) durasi langsung dicatat dengan endpoint="background"
+@contextmanager
+def stage(stage_name: str):
+    timer = _current_timer.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        if timer is not None:
+            timer.add(stage_name, seconds)
+        else:
+            STAGE_SECONDS.observe(seconds, endpoint="background", stage=stage_name, language="unknown")
+
+
+def record_timings(timings: dict[str, float] | None):
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.merge(timings)
+    else:
+        for stage_name, seconds in (timings or {}).items():
+            STAGE_SECONDS.observe(seconds, endpoint="background", stage=stage_name, language="unknown")
+
+
+def tag_language(language: str):
+    timer = _current_timer.get()
+    if timer is not None and language:
+        timer.language = language
+
+
+# === Panggilan Gemini: hitung request + error per tujuan ===
+@contextmanager
+def gemini_call(purpose: str):
+    GEMINI_REQUESTS.inc(purpose=purpose)
+    try:
+        with stage("gemini"):
+            yield
+    except Exception as e:
+        GEMINI_ERRORS.inc(purpose=purpose, error=type(e).__name__)
+        raise
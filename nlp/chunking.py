@@ -0,0 +1,34 @@
+import re
+
+# === Potong teks CV menjadi chunk untuk retrieval ===
+# Chunk dipotong di batas kalimat/kata sebisa mungkin, dengan overlap antar chunk
+# supaya informasi di perbatasan tidak hilang.
+def chunk_text(text: str, max_chars: int = 800, overlap: int = 100) -> list[str]:
+    text = re.sub(r'\s+', ' ', text.replace('\x00', '')).strip()
+    if not text:
+        return []
+
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + max_chars, len(text))
+        if end < len(text):
+            # Mundur ke akhir kalimat atau spasi terdekat
+            cut = max(text.rfind('. ', start, end), text.rfind(' ', start, end))
+            if cut > start + max_chars // 2:
+                end = cut + 1
+        chunks.append(text[start:end].strip())
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+        # Jangan mulai chunk di tengah kata
+        space = text.find(' ', start, end)
+        if space != -1:
+            start = space + 1
+
+    return [c for c in chunks if c]
+
+
+# === Estimasi jumlah token (kasar, ~4 karakter per token) ===
+def estimate_tokens(text: str) -> int:
+    return (len(text) + 3) // 4
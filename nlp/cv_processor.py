@@ -1,37 +1,47 @@
-import pdfplumber
 import re
-from keybert import KeyBERT
-from sentence_transformers import SentenceTransformer
-from langdetect import detect, LangDetectException
-from collections import Counter
+import hashlib
+import threading
+from langdetect import detect, DetectorFactory, LangDetectException
+from collections import Counter, OrderedDict
 import itertools
-import spacy
-from Sastrawi.StopWordRemover.StopWordRemoverFactory import StopWordRemoverFactory
+from nlp.settings import (
+    KEYWORD_TOP_N, KEYWORD_NGRAM_RANGE, KEYWORD_DIVERSITY, KEYWORD_MIN_SCORE, KEYWORD_ENGINE,
+    BOOST_FILTER_STOPWORDS, NER_MAX_CHARS, NER_CHUNK_CHARS, SPACY_BATCH_SIZE, SPACY_N_PROCESS, LANGDETECT_SAMPLE_CHARS, LANGDETECT_CACHE_SIZE
+)
+from nlp.chunking import chunk_text
+from nlp.keyword_engine import extract_keyword_scores, extract_keyword_scores_batch, tokenize, _stopwords
+from nlp.phrase_counter import top_phrases
+from nlp.pdf_extractor import extract_pdf
+from nlp.sections import SECTION_HEADERS
+from monitoring.metrics import record_timings
+from nlp.model_loader import get_embedding_model, get_kw_model, get_spacy_model, get_indo_stopwords
 
-# === Load Model NLP Global ===
-embedding_model = SentenceTransformer("paraphrase-multilingual-MPNet-base-v2")
-kw_model = KeyBERT(embedding_model)
-
-# === Load spaCy models ===
-try:
-    nlp_spacy = spacy.load("en_core_web_sm")
-except Exception:
-    nlp_spacy = None
+# === Model NLP (lazy) ===
+# Nama lama tetap bisa di-import (from nlp.cv_processor import embedding_model),
+# tapi model baru dimuat saat atribut tersebut pertama kali diakses.
+_LAZY_MODELS = {
+    "embedding_model": get_embedding_model,
+    "kw_model": get_kw_model,
+    "nlp_spacy": lambda: get_spacy_model("en"),
+    "nlp_multilang": lambda: get_spacy_model("id"),
+    "indo_stopwords": get_indo_stopwords,
+}
 
-try:
-    nlp_multilang = spacy.load("xx_ent_wiki_sm")
-except Exception:
-    nlp_multilang = None
 
-# === Stopword Bahasa Indonesia ===
-stopword_factory = StopWordRemoverFactory()
-indo_stopwords = set(stopword_factory.get_stop_words())
+def __getattr__(name):
+    if name in _LAZY_MODELS:
+        return _LAZY_MODELS[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # === PDF to Text ===
+# Dibatasi PDF_MAX_PAGES / PDF_MAX_CHARS / PDF_TIMEOUT_SECONDS (lihat nlp/pdf_extractor.py)
 def extract_text_from_pdf(file_path: str) -> str:
     try:
-        with pdfplumber.open(file_path) as pdf:
-            return ''.join(page.extract_text() or '' for page in pdf.pages)
+        result = extract_pdf(file_path)
+        if result["truncated"] or result["timed_out"]:
+            print(f"[PDF] {file_path}: {result['pages_read']}/{result['pages_total']} halaman dibaca "
+                  f"(timeout={result['timed_out']}, {result['seconds']}s)")
+        return result["text"]
     except Exception as e:
         print(f"[ERROR] PDF extract failed: {e}")
         return ""
@@ -42,16 +52,8 @@ def clean_text(text: str) -> str:
     text = re.sub(r'\s+', ' ', text)
     return text.strip()
 
-# === Section Headers ===
-SECTION_HEADERS = {
-    "deskripsi": ["deskripsi diri", "profil", "profile", "summary", "tentang saya", "about me", "ringkasan", "objective"],
-    "pendidikan": ["pendidikan", "education", "academic background"],
-    "pengalaman": ["pengalaman kerja", "pengalaman", "experience", "work history", "employment"],
-    "organisasi": ["organisasi", "aktivitas", "organization", "extracurricular", "volunteer"],
-    "skill": ["skill", "keahlian", "kemampuan", "technical skill", "tools", "kompetensi", "expertise", "proficiency"]
-}
-
 # === Keyword Position ===
+# Implementasi lama per-frasa; dipakai sebagai acuan oleh nlp/sections.py (verify_boundaries, benchmark)
 def find_all_keyword_positions(text: str, keywords: list[str]) -> list[int]:
     positions = []
     for k in keywords:
@@ -71,53 +73,139 @@ def extract_section(text: str, keywords: list[str], next_keywords: list[str]) ->
     return text[start:end].strip()
 
 # === Entity Extraction ===
-def extract_entities(text: str, language: str) -> list[str]:
-    if language == "en" and nlp_spacy:
-        doc = nlp_spacy(text)
-    elif language == "id" and nlp_multilang:
-        doc = nlp_multilang(text)
-    else:
+ENTITY_LABELS = ("ORG", "PRODUCT", "SKILL", "PERSON", "GPE", "WORK_OF_ART")
+
+def _entity_texts(doc) -> list[str]:
+    return [ent.text for ent in doc.ents if ent.label_ in ENTITY_LABELS]
+
+# Teks dibatasi NER_MAX_CHARS lalu dipotong di batas kata (tanpa overlap supaya entitas tidak dobel)
+def _ner_chunks(text: str) -> list[str]:
+    return chunk_text(text[:NER_MAX_CHARS], NER_CHUNK_CHARS, 0)
+
+def _pipe(nlp_model, chunks: list[str], batch_size: int, n_process: int):
+    n_process = min(n_process, len(chunks))
+    # Komponen selain NER yang masih dimuat (mis. tagger untuk KEYWORD_POS_FILTER) dilewati
+    disabled = [p for p in nlp_model.pipe_names if p not in ("tok2vec", "ner")]
+    return nlp_model.pipe(chunks, batch_size=batch_size, n_process=max(n_process, 1), disable=disabled)
+
+def extract_entities(text: str, language: str, batch_size: int = SPACY_BATCH_SIZE,
+                     n_process: int = SPACY_N_PROCESS) -> list[str]:
+    nlp_model = get_spacy_model(language)
+    if not nlp_model:
         return []
+    return [ent for doc in _pipe(nlp_model, _ner_chunks(text), batch_size, n_process) for ent in _entity_texts(doc)]
 
-    return [
-        ent.text for ent in doc.ents
-        if ent.label_ in ("ORG", "PRODUCT", "SKILL", "PERSON", "GPE", "WORK_OF_ART")
-    ]
+# Versi batch: dokumen dikelompokkan per bahasa, chunk semua dokumen diproses dalam satu nlp.pipe
+def extract_entities_batch(texts: list[str], languages: list[str], batch_size: int = SPACY_BATCH_SIZE,
+                           n_process: int = SPACY_N_PROCESS) -> list[list[str]]:
+    results: list[list[str]] = [[] for _ in texts]
+    for language in set(languages):
+        nlp_model = get_spacy_model(language)
+        if not nlp_model:
+            continue
+        owners, chunks = [], []
+        for i, lang in enumerate(languages):
+            if lang == language:
+                for chunk in _ner_chunks(texts[i]):
+                    owners.append(i)
+                    chunks.append(chunk)
+        for i, doc in zip(owners, _pipe(nlp_model, chunks, batch_size, n_process)):
+            results[i].extend(_entity_texts(doc))
+    return results
 
 # === Keyword Extraction ===
-def extract_keywords(text: str, language: str = "en", top_n: int = 25) -> list[str]:
+def extract_keywords(text: str, language: str = "en", top_n: int = KEYWORD_TOP_N,
+                     tokens: list[str] | None = None) -> list[str]:
     if not text or len(text.strip()) < 10:
         return []
 
     try:
-        stop_lang = "english" if language == "en" else None
-        candidates = kw_model.extract_keywords(
-            text,
-            keyphrase_ngram_range=(1, 3),
-            stop_words=stop_lang,
-            use_mmr=True,
-            diversity=0.7,
-            top_n=top_n * 3
-        )
+        if KEYWORD_ENGINE == "fast":
+            candidates = extract_keyword_scores(
+                text,
+                language,
+                ngram_range=KEYWORD_NGRAM_RANGE,
+                top_n=top_n * 3,
+                diversity=KEYWORD_DIVERSITY,
+                tokens=tokens
+            )
+        else:
+            stop_lang = "english" if language == "en" else None
+            candidates = get_kw_model().extract_keywords(
+                text,
+                keyphrase_ngram_range=KEYWORD_NGRAM_RANGE,
+                stop_words=stop_lang,
+                use_mmr=True,
+                diversity=KEYWORD_DIVERSITY,
+                top_n=top_n * 3
+            )
+        return _filter_keywords(candidates, language, top_n)
+    except Exception as e:
+        print(f"[ERROR] Keyword extraction failed: {e}")
+        return []
+
+def _filter_keywords(candidates: list[tuple[str, float]], language: str, top_n: int) -> list[str]:
+    keywords = [
+        kw for kw, score in candidates
+        if score > KEYWORD_MIN_SCORE and len(kw) > 2 and not kw.isdigit()
+    ]
+
+    # Filter stopwords Indonesia
+    if language == "id":
+        indo_stopwords = get_indo_stopwords()
         keywords = [
-            kw for kw, score in candidates
-            if score > 0.35 and len(kw) > 2 and not kw.isdigit()
+            k for k in keywords
+            if all(word.lower() not in indo_stopwords for word in k.split())
         ]
 
-        # Filter stopwords Indonesia
-        if language == "id":
-            keywords = [
-                k for k in keywords
-                if all(word.lower() not in indo_stopwords for word in k.split())
-            ]
+    return list(dict.fromkeys(keywords[:top_n]))
+
+# Versi batch: semua CV berbagi satu batch embedding (hanya untuk engine "fast")
+def extract_keywords_batch(texts: list[str], languages: list[str], top_n: int = KEYWORD_TOP_N) -> list[list[str]]:
+    results: list[list[str]] = [[] for _ in texts]
+    idx = [i for i, t in enumerate(texts) if t and len(t.strip()) >= 10]
+    if not idx:
+        return results
+
+    if KEYWORD_ENGINE != "fast":
+        for i in idx:
+            results[i] = extract_keywords(texts[i], languages[i], top_n)
+        return results
 
-        return list(dict.fromkeys(keywords[:top_n]))
+    try:
+        scored = extract_keyword_scores_batch(
+            [texts[i] for i in idx],
+            [languages[i] for i in idx],
+            ngram_range=KEYWORD_NGRAM_RANGE,
+            top_n=top_n * 3,
+            diversity=KEYWORD_DIVERSITY
+        )
+        for i, candidates in zip(idx, scored):
+            results[i] = _filter_keywords(candidates, languages[i], top_n)
     except Exception as e:
-        print(f"[ERROR] Keyword extraction failed: {e}")
-        return []
+        print(f"[ERROR] Batch keyword extraction failed: {e}")
+    return results
 
 # === Boost Keywords ===
-def boost_keywords(keywords: list[str], raw_text: str, min_required: int = 25) -> list[str]:
+# Tambah frasa (bigram/trigram) paling sering jika keyword kurang dari min_required.
+# Penghitungan streaming dengan memori terbatas (nlp/phrase_counter.py); `tokens` = hasil tokenize()
+# yang sudah dipakai untuk ekstraksi keyword, supaya teks tidak di-tokenize dua kali.
+def boost_keywords(keywords: list[str], raw_text: str, min_required: int = 25, tokens: list[str] | None = None,
+                   language: str | None = None) -> list[str]:
+    if len(keywords) >= min_required:
+        return keywords
+
+    stopwords = _stopwords(language) if BOOST_FILTER_STOPWORDS and language else frozenset()
+    phrases = top_phrases(
+        tokens if tokens is not None else tokenize(raw_text),
+        min_required - len(keywords),
+        exclude=set(keywords),
+        stopwords=stopwords,
+    )
+    return list(dict.fromkeys(keywords + phrases))
+
+# Implementasi lama (Counter atas semua n-gram); acuan untuk python -m nlp.phrase_counter
+def boost_keywords_legacy(keywords: list[str], raw_text: str, min_required: int = 25) -> list[str]:
     if len(keywords) >= min_required:
         return keywords
 
@@ -133,30 +221,46 @@ def boost_keywords(keywords: list[str], raw_text: str, min_required: int = 25) -
     return list(dict.fromkeys(boosted))
 
 # === Language Detection ===
+# Seed tetap: hasil langdetect deterministik untuk teks yang sama
+DetectorFactory.seed = 0
+
+_language_cache: OrderedDict[str, str] = OrderedDict()
+_language_cache_lock = threading.Lock()
+
+# Sampel terbatas: awal, tengah, dan akhir teks (header CV saja sering berisi nama/alamat)
+def language_sample(text: str, max_chars: int = LANGDETECT_SAMPLE_CHARS) -> str:
+    if len(text) <= max_chars:
+        return text
+    part = max_chars // 3
+    middle = (len(text) - part) // 2
+    return " ".join([text[:part], text[middle:middle + part], text[-part:]])
+
 def detect_language(text: str) -> str:
+    sample = language_sample(text)
+    # Cache per isi sampel (proses worker menerima CV yang sama berulang kali, mis. upload ulang)
+    key = hashlib.blake2b(sample.encode("utf-8", "ignore"), digest_size=16).hexdigest()
+    with _language_cache_lock:
+        if key in _language_cache:
+            _language_cache.move_to_end(key)
+            return _language_cache[key]
+
     try:
-        return detect(text)
+        language = detect(sample)
     except LangDetectException:
-        return "unknown"
+        language = "unknown"
+
+    with _language_cache_lock:
+        _language_cache[key] = language
+        if len(_language_cache) > LANGDETECT_CACHE_SIZE:
+            _language_cache.popitem(last=False)
+    return language
 
 # === Final CV Processing ===
+# Stage pipeline ada di nlp/pipeline.py (CVDocument); durasi tiap stage dicatat ke histogram matchcv_stage_seconds
 def process_cv(file_path: str) -> list[str]:
-    raw_text = extract_text_from_pdf(file_path)
-    cleaned_text = clean_text(raw_text)
-    lang = detect_language(cleaned_text)
-
-    deskripsi = extract_section(cleaned_text, SECTION_HEADERS["deskripsi"], SECTION_HEADERS["pendidikan"])
-    pengalaman = extract_section(cleaned_text, SECTION_HEADERS["pengalaman"], SECTION_HEADERS["organisasi"])
-    skill = extract_section(cleaned_text, SECTION_HEADERS["skill"], [])
-
-    if not deskripsi:
-        deskripsi = cleaned_text[:1000]
-
-    keyword_text = " ".join([deskripsi, pengalaman, skill])
-    keywords = extract_keywords(keyword_text, language=lang, top_n=25)
-
-    entities = extract_entities(cleaned_text, language=lang)
-    keywords += [e for e in entities if e.lower() not in [k.lower() for k in keywords]]
+    from nlp.pipeline import CVDocument
 
-    final_keywords = boost_keywords(keywords, keyword_text, min_required=25)
-    return list(dict.fromkeys(final_keywords))
\ No newline at end of file
+    doc = CVDocument(file_path, profile="full")
+    keywords = doc.boosted_keywords
+    record_timings(doc.timings)
+    return keywords
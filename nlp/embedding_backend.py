@@ -0,0 +1,222 @@
+import os
+import time
+import numpy as np
+from keybert.backend import BaseEmbedder
+from nlp.settings import EMBEDDING_MODEL_NAME, EMBEDDING_BACKEND
+
+# === Konfigurasi Backend Embedding ===
+# torch     -> SentenceTransformer PyTorch (default, perilaku lama)
+# quantized -> SentenceTransformer dengan Linear layer di-quantize dinamis ke int8 (CPU)
+# onnx      -> ONNX Runtime session (model diekspor sekali ke EMBEDDING_ONNX_DIR)
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+EMBEDDING_ONNX_DIR = os.getenv("EMBEDDING_ONNX_DIR", "models/onnx")
+EMBEDDING_MAX_SEQ_LENGTH = 128  # sama dengan max_seq_length model paraphrase-multilingual-MPNet
+
+
+# === Resident memory proses (MB) ===
+def current_rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    import resource
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+# === Base: API encode() mirip SentenceTransformer + embed() untuk KeyBERT ===
+class EmbeddingBackend(BaseEmbedder):
+    name = "base"
+
+    def __init__(self):
+        super().__init__()
+        rss_before = current_rss_mb()
+        start = time.perf_counter()
+        self._load()
+        self.load_seconds = round(time.perf_counter() - start, 3)
+        self.load_rss_mb = round(current_rss_mb() - rss_before, 1)
+        self.documents = 0
+        self.encode_seconds = 0.0
+
+    def _load(self):
+        raise NotImplementedError
+
+    def _encode(self, sentences: list[str], batch_size: int) -> np.ndarray:
+        raise NotImplementedError
+
+    def encode(self, sentences, batch_size: int = EMBEDDING_BATCH_SIZE, normalize_embeddings: bool = False,
+               show_progress_bar: bool = False, **kwargs) -> np.ndarray:
+        single = isinstance(sentences, str)
+        batch = [sentences] if single else list(sentences)
+
+        start = time.perf_counter()
+        vectors = self._encode(batch, batch_size).astype(np.float32)
+        self.encode_seconds += time.perf_counter() - start
+        self.documents += len(batch)
+
+        if normalize_embeddings:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.clip(norms, 1e-12, None)
+        return vectors[0] if single else vectors
+
+    # Dipanggil KeyBERT
+    def embed(self, documents: list[str], verbose: bool = False) -> np.ndarray:
+        return self.encode(documents, show_progress_bar=verbose)
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.name,
+            "model": EMBEDDING_MODEL_NAME,
+            "load_seconds": self.load_seconds,
+            "load_rss_mb": self.load_rss_mb,
+            "rss_mb": current_rss_mb(),
+            "documents": self.documents,
+            "ms_per_document": round(1000 * self.encode_seconds / self.documents, 3) if self.documents else None,
+        }
+
+
+class TorchBackend(EmbeddingBackend):
+    name = "torch"
+
+    def _load(self):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(EMBEDDING_MODEL_NAME, device="cpu")
+
+    def _encode(self, sentences: list[str], batch_size: int) -> np.ndarray:
+        return self.model.encode(sentences, batch_size=batch_size, show_progress_bar=False, convert_to_numpy=True)
+
+
+class QuantizedBackend(TorchBackend):
+    name = "quantized"
+
+    def _load(self):
+        import torch
+        super()._load()
+        # Dynamic quantization: bobot Linear disimpan int8, aktivasi di-quantize saat runtime
+        self.model = torch.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+class OnnxBackend(EmbeddingBackend):
+    name = "onnx"
+
+    def _model_path(self) -> str:
+        safe_name = EMBEDDING_MODEL_NAME.replace("/", "__")
+        return os.path.join(EMBEDDING_ONNX_DIR, f"{safe_name}.onnx")
+
+    def _export(self, path: str):
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        transformer = SentenceTransformer(EMBEDDING_MODEL_NAME, device="cpu")[0]
+        dummy = transformer.tokenizer(["ekspor onnx"], return_tensors="pt")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        torch.onnx.export(
+            transformer.auto_model,
+            (dummy["input_ids"], dummy["attention_mask"]),
+            path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "last_hidden_state": {0: "batch", 1: "sequence"},
+            },
+            opset_version=14,
+        )
+        transformer.tokenizer.save_pretrained(os.path.dirname(path))
+
+    def _load(self):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        path = self._model_path()
+        if not os.path.exists(path):
+            self._export(path)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.tokenizer = AutoTokenizer.from_pretrained(os.path.dirname(path))
+
+    def _encode(self, sentences: list[str], batch_size: int) -> np.ndarray:
+        outputs = []
+        for i in range(0, len(sentences), batch_size):
+            tokens = self.tokenizer(
+                sentences[i:i + batch_size], padding=True, truncation=True,
+                max_length=EMBEDDING_MAX_SEQ_LENGTH, return_tensors="np"
+            )
+            mask = tokens["attention_mask"].astype(np.int64)
+            hidden = self.session.run(None, {
+                "input_ids": tokens["input_ids"].astype(np.int64),
+                "attention_mask": mask,
+            })[0]
+            # Mean pooling, sama seperti pooling layer SentenceTransformer model ini
+            mask = mask[..., None].astype(np.float32)
+            outputs.append((hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None))
+        return np.vstack(outputs) if outputs else np.zeros((0, 768), dtype=np.float32)
+
+
+BACKENDS = {
+    "torch": TorchBackend,
+    "quantized": QuantizedBackend,
+    "onnx": OnnxBackend,
+}
+
+
+def load_backend(name: str = EMBEDDING_BACKEND) -> EmbeddingBackend:
+    if name not in BACKENDS:
+        raise ValueError(f"EMBEDDING_BACKEND tidak dikenal: {name} (pilihan: {', '.join(BACKENDS)})")
+    return BACKENDS[name]()
+
+
+# === Parity check: seberapa jauh keyword backend lain bergeser dari baseline torch ===
+# Jalankan: python -m nlp.embedding_backend quantized cv1.pdf cv2.pdf ...
+def parity_check(backend_name: str, texts: list[str], language: str = "en", top_n: int = 25) -> dict:
+    from keybert import KeyBERT
+    from nlp.settings import KEYWORD_NGRAM_RANGE, KEYWORD_DIVERSITY
+
+    def run(backend: EmbeddingBackend) -> list[list[str]]:
+        kw_model = KeyBERT(backend)
+        return [
+            [kw for kw, _ in kw_model.extract_keywords(
+                text, keyphrase_ngram_range=KEYWORD_NGRAM_RANGE,
+                stop_words="english" if language == "en" else None,
+                use_mmr=True, diversity=KEYWORD_DIVERSITY, top_n=top_n
+            )]
+            for text in texts
+        ]
+
+    baseline, candidate = load_backend("torch"), load_backend(backend_name)
+    base_keywords, cand_keywords = run(baseline), run(candidate)
+
+    overlaps = [
+        len(set(a) & set(b)) / len(set(a) | set(b)) if (a or b) else 1.0
+        for a, b in zip(base_keywords, cand_keywords)
+    ]
+    doc_similarity = [
+        float(np.dot(x, y))
+        for x, y in zip(baseline.encode(texts, normalize_embeddings=True),
+                        candidate.encode(texts, normalize_embeddings=True))
+    ]
+    return {
+        "baseline": baseline.stats(),
+        "candidate": candidate.stats(),
+        "keyword_jaccard_mean": round(float(np.mean(overlaps)), 4) if overlaps else None,
+        "keyword_jaccard_min": round(float(np.min(overlaps)), 4) if overlaps else None,
+        "embedding_cosine_min": round(min(doc_similarity), 4) if doc_similarity else None,
+    }
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+    from nlp.cv_processor import extract_text_from_pdf, clean_text
+
+    if len(sys.argv) < 3:
+        print("Pemakaian: python -m nlp.embedding_backend <torch|quantized|onnx> file1.pdf [file2.pdf ...]")
+        sys.exit(1)
+
+    docs = [clean_text(extract_text_from_pdf(p)) for p in sys.argv[2:]]
+    print(json.dumps(parity_check(sys.argv[1], docs), indent=2))
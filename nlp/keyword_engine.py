@@ -0,0 +1,199 @@
+import os
+import re
+import time
+from collections import Counter
+import numpy as np
+from nlp.settings import KEYWORD_MAX_CANDIDATES, KEYWORD_POS_FILTER
+
+# === Keyword Engine Cepat (pengganti kw_model.extract_keywords) ===
+# 1. Kandidat n-gram dipangkas murah SEBELUM di-embed: stopword (Inggris + indo_stopwords),
+#    token angka/pendek, frekuensi dalam dokumen (maks KEYWORD_MAX_CANDIDATES), dan opsional POS.
+# 2. Dokumen + kandidat di-embed dalam batch (KEYWORD_EMBED_BATCH_SIZE).
+# 3. MMR dihitung vektor dengan NumPy: similarity ke kandidat terpilih di-update inkremental
+#    (O(N * top_n)), tidak membangun matriks N x N seperti KeyBERT.
+#
+# Target: overlap keyword vs KeyBERT (Jaccard rata-rata) >= KEYWORD_OVERLAP_TOLERANCE pada korpus CV.
+# Ukur dengan: python -m nlp.keyword_engine cv1.pdf cv2.pdf ...
+
+KEYWORD_EMBED_BATCH_SIZE = int(os.getenv("KEYWORD_EMBED_BATCH_SIZE", "64"))
+KEYWORD_OVERLAP_TOLERANCE = 0.6
+
+# Token pattern sama dengan CountVectorizer default yang dipakai KeyBERT
+TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+
+# POS yang tidak mungkin jadi awal/akhir frasa keahlian
+_NON_PHRASE_POS = {"VERB", "AUX", "ADV", "ADP", "PRON", "DET", "CCONJ", "SCONJ", "PART", "INTJ", "NUM"}
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def _stopwords(language: str) -> frozenset[str]:
+    from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+    from nlp.model_loader import get_indo_stopwords
+
+    if language == "en":
+        return ENGLISH_STOP_WORDS
+    if language == "id":
+        return frozenset(get_indo_stopwords())
+    return frozenset()
+
+
+def _non_phrase_words(text: str, language: str) -> set[str]:
+    from nlp.model_loader import get_spacy_model
+
+    nlp_model = get_spacy_model(language)
+    if nlp_model is None or "tagger" not in nlp_model.pipe_names:
+        return set()
+    needed = {"tok2vec", "tagger", "attribute_ruler"}
+    with nlp_model.select_pipes(disable=[p for p in nlp_model.pipe_names if p not in needed]):
+        doc = nlp_model(text)
+    noun_like = {t.lower_ for t in doc if t.pos_ not in _NON_PHRASE_POS}
+    return {t.lower_ for t in doc if t.pos_ in _NON_PHRASE_POS} - noun_like
+
+
+# === Kandidat n-gram ===
+def generate_candidates(tokens: list[str], language: str, ngram_range: tuple[int, int] = (1, 3),
+                        max_candidates: int = KEYWORD_MAX_CANDIDATES,
+                        blocked_words: set[str] | None = None) -> list[str]:
+    stopwords = _stopwords(language)
+    # Seperti CountVectorizer: stopword dibuang dulu, baru n-gram dibentuk
+    words = [t for t in tokens if t not in stopwords and not t.isdigit()]
+    blocked = blocked_words or set()
+
+    counts: Counter[str] = Counter()
+    low, high = ngram_range
+    for n in range(low, high + 1):
+        for i in range(len(words) - n + 1):
+            gram = words[i:i + n]
+            if gram[0] in blocked or gram[-1] in blocked:
+                continue
+            counts[" ".join(gram)] += 1
+
+    # Prioritaskan n-gram yang paling sering muncul; urutan stabil untuk hasil deterministik
+    ranked = sorted((kv for kv in counts.items() if len(kv[0]) > 2), key=lambda kv: (-kv[1], kv[0]))
+    return [gram for gram, _ in ranked[:max_candidates]]
+
+
+# === MMR vektor ===
+def mmr(doc_embedding: np.ndarray, candidate_embeddings: np.ndarray, candidates: list[str],
+        top_n: int, diversity: float) -> list[tuple[str, float]]:
+    doc_sim = candidate_embeddings @ doc_embedding
+    top_n = min(top_n, len(candidates))
+    if top_n == 0:
+        return []
+
+    selected = [int(np.argmax(doc_sim))]
+    remaining = np.ones(len(candidates), dtype=bool)
+    remaining[selected[0]] = False
+    max_sim_to_selected = candidate_embeddings @ candidate_embeddings[selected[0]]
+
+    for _ in range(top_n - 1):
+        scores = (1 - diversity) * doc_sim - diversity * max_sim_to_selected
+        scores[~remaining] = -np.inf
+        idx = int(np.argmax(scores))
+        selected.append(idx)
+        remaining[idx] = False
+        np.maximum(max_sim_to_selected, candidate_embeddings @ candidate_embeddings[idx], out=max_sim_to_selected)
+
+    return [(candidates[i], round(float(doc_sim[i]), 4)) for i in selected]
+
+
+# === Ekstraksi keyword (output sama dengan kw_model.extract_keywords: list (keyword, skor)) ===
+def extract_keyword_scores(text: str, language: str, ngram_range: tuple[int, int], top_n: int,
+                           diversity: float, tokens: list[str] | None = None) -> list[tuple[str, float]]:
+    from nlp.model_loader import get_embedding_model
+
+    tokens = tokens if tokens is not None else tokenize(text)
+    blocked = _non_phrase_words(text, language) if KEYWORD_POS_FILTER else None
+    candidates = generate_candidates(tokens, language, ngram_range, blocked_words=blocked)
+    if not candidates:
+        return []
+
+    model = get_embedding_model()
+    doc_embedding = model.encode([text], batch_size=1, normalize_embeddings=True)[0]
+    candidate_embeddings = model.encode(candidates, batch_size=KEYWORD_EMBED_BATCH_SIZE, normalize_embeddings=True)
+    return mmr(doc_embedding, candidate_embeddings, candidates, top_n, diversity)
+
+
+# === Versi batch: satu batch embedding dokumen + satu batch kandidat unik lintas dokumen ===
+def extract_keyword_scores_batch(texts: list[str], languages: list[str], ngram_range: tuple[int, int],
+                                 top_n: int, diversity: float) -> list[list[tuple[str, float]]]:
+    from nlp.model_loader import get_embedding_model
+
+    per_doc = []
+    for text, language in zip(texts, languages):
+        blocked = _non_phrase_words(text, language) if KEYWORD_POS_FILTER else None
+        per_doc.append(generate_candidates(tokenize(text), language, ngram_range, blocked_words=blocked))
+
+    # Kandidat yang sama di beberapa CV (mis. "python") cukup di-embed sekali
+    vocabulary = list(dict.fromkeys(c for candidates in per_doc for c in candidates))
+    if not vocabulary:
+        return [[] for _ in texts]
+    index = {c: i for i, c in enumerate(vocabulary)}
+
+    model = get_embedding_model()
+    doc_embeddings = model.encode(texts, batch_size=KEYWORD_EMBED_BATCH_SIZE, normalize_embeddings=True)
+    vocab_embeddings = model.encode(vocabulary, batch_size=KEYWORD_EMBED_BATCH_SIZE, normalize_embeddings=True)
+
+    results = []
+    for doc_embedding, candidates in zip(doc_embeddings, per_doc):
+        if not candidates:
+            results.append([])
+            continue
+        rows = vocab_embeddings[[index[c] for c in candidates]]
+        results.append(mmr(doc_embedding, rows, candidates, top_n, diversity))
+    return results
+
+
+# === Perbandingan dengan KeyBERT (speedup + overlap) ===
+def compare_with_keybert(texts: list[str], language: str = "en", top_n: int = 75) -> dict:
+    from nlp.model_loader import get_kw_model
+    from nlp.settings import KEYWORD_NGRAM_RANGE, KEYWORD_DIVERSITY
+
+    kw_model = get_kw_model()
+    baseline_seconds = fast_seconds = 0.0
+    overlaps = []
+    for text in texts:
+        start = time.perf_counter()
+        baseline = kw_model.extract_keywords(
+            text, keyphrase_ngram_range=KEYWORD_NGRAM_RANGE,
+            stop_words="english" if language == "en" else None,
+            use_mmr=True, diversity=KEYWORD_DIVERSITY, top_n=top_n
+        )
+        baseline_seconds += time.perf_counter() - start
+
+        start = time.perf_counter()
+        fast = extract_keyword_scores(text, language, KEYWORD_NGRAM_RANGE, top_n, KEYWORD_DIVERSITY)
+        fast_seconds += time.perf_counter() - start
+
+        a, b = {k for k, _ in baseline}, {k for k, _ in fast}
+        overlaps.append(len(a & b) / len(a | b) if (a or b) else 1.0)
+
+    mean_overlap = float(np.mean(overlaps)) if overlaps else 1.0
+    return {
+        "documents": len(texts),
+        "keybert_seconds": round(baseline_seconds, 3),
+        "fast_seconds": round(fast_seconds, 3),
+        "speedup": round(baseline_seconds / fast_seconds, 2) if fast_seconds else None,
+        "jaccard_mean": round(mean_overlap, 4),
+        "jaccard_min": round(min(overlaps), 4) if overlaps else None,
+        "within_tolerance": mean_overlap >= KEYWORD_OVERLAP_TOLERANCE,
+    }
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+    from nlp.cv_processor import extract_text_from_pdf, clean_text, detect_language
+
+    if len(sys.argv) < 2:
+        print("Pemakaian: python -m nlp.keyword_engine file1.pdf [file2.pdf ...]")
+        sys.exit(1)
+
+    docs = [clean_text(extract_text_from_pdf(p)) for p in sys.argv[1:]]
+    by_language: dict[str, list[str]] = {}
+    for doc in docs:
+        by_language.setdefault(detect_language(doc), []).append(doc)
+    print(json.dumps({lang: compare_with_keybert(texts, lang) for lang, texts in by_language.items()}, indent=2))
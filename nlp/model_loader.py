@@ -0,0 +1,115 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# === Lazy Model Registry ===
+# Model NLP tidak lagi dimuat saat import; getter di bawah memuat sekali (thread-safe)
+# saat pertama kali dipakai, atau lebih awal lewat load_all_models() di startup / worker.
+
+# 1 = jalankan satu inferensi dummy setelah load supaya request pertama tidak kena biaya warmup
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "1") == "1"
+
+_models: dict = {}
+_locks = {name: threading.Lock() for name in ("embedding", "keybert", "spacy_en", "spacy_xx", "indo_stopwords")}
+load_times: dict[str, float] = {}
+
+
+def _get_or_load(name: str, loader):
+    if name in _models:
+        return _models[name]
+    with _locks[name]:
+        if name not in _models:
+            start = time.perf_counter()
+            _models[name] = loader()
+            load_times[name] = round(time.perf_counter() - start, 3)
+    return _models[name]
+
+
+def _load_embedding():
+    # Backend dipilih lewat EMBEDDING_BACKEND (torch | quantized | onnx)
+    from nlp.embedding_backend import load_backend
+    return load_backend()
+
+
+def _load_keybert():
+    from keybert import KeyBERT
+    return KeyBERT(get_embedding_model())
+
+
+def _load_spacy(name: str):
+    import spacy
+    from nlp.settings import SPACY_EXCLUDE, KEYWORD_POS_FILTER
+
+    exclude = SPACY_EXCLUDE
+    if KEYWORD_POS_FILTER:
+        # Filter POS di keyword_engine butuh tagger + attribute_ruler
+        exclude = [p for p in exclude if p not in ("tagger", "attribute_ruler")]
+    try:
+        # Hanya doc.ents yang dipakai: parser, tagger, lemmatizer, dll. tidak dimuat
+        return spacy.load(name, exclude=exclude)
+    except Exception:
+        return None
+
+
+def _load_indo_stopwords():
+    from Sastrawi.StopWordRemover.StopWordRemoverFactory import StopWordRemoverFactory
+    return set(StopWordRemoverFactory().get_stop_words())
+
+
+# === Getter ===
+def get_embedding_model():
+    return _get_or_load("embedding", _load_embedding)
+
+
+def get_kw_model():
+    return _get_or_load("keybert", _load_keybert)
+
+
+def get_spacy_model(language: str):
+    if language == "en":
+        return _get_or_load("spacy_en", lambda: _load_spacy("en_core_web_sm"))
+    if language == "id":
+        return _get_or_load("spacy_xx", lambda: _load_spacy("xx_ent_wiki_sm"))
+    return None
+
+
+def get_indo_stopwords() -> set[str]:
+    return _get_or_load("indo_stopwords", _load_indo_stopwords)
+
+
+# === Load semua model secara paralel ===
+# Model yang saling independen (embedding/KeyBERT, dua spaCy, Sastrawi) dimuat bersamaan.
+def load_all_models() -> dict[str, float]:
+    loaders = [get_kw_model, lambda: get_spacy_model("en"), lambda: get_spacy_model("id"), get_indo_stopwords]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(loaders)) as executor:
+        for future in [executor.submit(loader) for loader in loaders]:
+            future.result()
+    load_times["total"] = round(time.perf_counter() - start, 3)
+    return dict(load_times)
+
+
+def warmup_models():
+    from nlp.cv_processor import extract_keywords, extract_entities
+
+    sample = (
+        "Experienced software engineer skilled in Python, SQL and cloud infrastructure. "
+        "Worked at Example Corp building data pipelines and REST APIs."
+    )
+    start = time.perf_counter()
+    extract_keywords(sample, language="en", top_n=5)
+    extract_entities(sample, language="en")
+    extract_entities(sample, language="id")
+    load_times["warmup"] = round(time.perf_counter() - start, 3)
+
+
+def model_stats() -> dict:
+    stats = {"load_seconds": dict(load_times)}
+    if "embedding" in _models:
+        stats["embedding"] = _models["embedding"].stats()
+    return stats
+
+
+def models_loaded() -> bool:
+    return all(name in _models for name in _locks)
@@ -0,0 +1,189 @@
+import multiprocessing as mp
+import os
+import threading
+import time
+
+from nlp.settings import PDF_MAX_PAGES, PDF_MAX_CHARS, PDF_TIMEOUT_SECONDS, PDF_FAST_PATH
+
+# === Konfigurasi Ekstraksi PDF ===
+# process_cv hanya butuh bagian awal CV, jadi halaman/karakter setelah budget tidak dibaca.
+# 0 = halaman diproses berurutan (default; worker pool sudah paralel per dokumen)
+# >0 = halaman dibagi ke beberapa proses (berguna untuk PDF besar / CLI bulk)
+PDF_PAGE_WORKERS = int(os.getenv("PDF_PAGE_WORKERS", "0"))
+# 1 = PDF_TIMEOUT_SECONDS ditegakkan keras: ekstraksi berjalan di proses anak yang dimatikan saat timeout
+#     (satu halaman patologis di pdfplumber tidak bisa menahan worker). 0 = batas waktu hanya dicek
+#     di antara halaman, di proses ini (best-effort).
+PDF_HARD_TIMEOUT = os.getenv("PDF_HARD_TIMEOUT", "1") == "1"
+# Waktu tambahan setelah deadline supaya proses anak sempat mengembalikan halaman yang sudah dibaca
+PDF_TIMEOUT_GRACE_SECONDS = 1.0
+PDF_FAST_MIN_CHARS = 20
+
+# Pool halaman per thread: timeout satu dokumen hanya mematikan proses milik thread itu
+# (CV_WORKER_POOL_SIZE=0 menjalankan ekstraksi di beberapa thread proses web sekaligus)
+_local = threading.local()
+
+
+def _page_count(file_path: str) -> int:
+    if PDF_FAST_PATH:
+        try:
+            import pypdfium2 as pdfium
+            pdf = pdfium.PdfDocument(file_path)
+            try:
+                return len(pdf)
+            finally:
+                pdf.close()
+        except Exception:
+            pass
+    import pdfplumber
+    with pdfplumber.open(file_path) as pdf:
+        return len(pdf.pages)
+
+
+# === Ekstraksi satu rentang halaman (dipakai serial maupun di proses terpisah) ===
+# Mengembalikan list (teks, pakai_fallback) per halaman.
+def _extract_pages(file_path: str, page_numbers: list[int], deadline: float | None = None,
+                   max_chars: int | None = None) -> list[tuple[str, bool]]:
+    results: list[tuple[str, bool]] = []
+    fast_doc = None
+    plumber_doc = None
+    chars = 0
+
+    try:
+        if PDF_FAST_PATH:
+            try:
+                import pypdfium2 as pdfium
+                fast_doc = pdfium.PdfDocument(file_path)
+            except Exception:
+                fast_doc = None
+
+        for number in page_numbers:
+            if deadline is not None and time.monotonic() > deadline:
+                break
+
+            text, fallback = "", False
+            if fast_doc is not None:
+                try:
+                    page = fast_doc[number]
+                    textpage = page.get_textpage()
+                    text = textpage.get_text_range() or ""
+                    textpage.close()
+                    page.close()
+                except Exception:
+                    text = ""
+
+            if len(text.strip()) < PDF_FAST_MIN_CHARS:
+                # Halaman layout-heavy / jalur cepat gagal: pakai pdfplumber
+                import pdfplumber
+                if plumber_doc is None:
+                    plumber_doc = pdfplumber.open(file_path)
+                text = plumber_doc.pages[number].extract_text() or ""
+                fallback = True
+
+            results.append((text, fallback))
+            chars += len(text)
+            if max_chars is not None and chars >= max_chars:
+                break
+    finally:
+        if fast_doc is not None:
+            fast_doc.close()
+        if plumber_doc is not None:
+            plumber_doc.close()
+
+    return results
+
+
+def _get_page_pool():
+    pool = getattr(_local, "pool", None)
+    if pool is None:
+        pool = _local.pool = mp.get_context("spawn").Pool(processes=max(PDF_PAGE_WORKERS, 1))
+    return pool
+
+
+# Task yang sedang berjalan tidak bisa dibatalkan: pool milik thread ini di-terminate() dan dibuat ulang
+# saat dokumen berikutnya, supaya tidak ada parsing sisa yang menahan slot
+def _terminate_page_pool():
+    pool, _local.pool = getattr(_local, "pool", None), None
+    if pool is None:
+        return
+    pool.terminate()
+    pool.join()
+
+
+# Proses daemon (mis. multiprocessing.Pool) tidak boleh membuat proses anak
+def _can_use_subprocess() -> bool:
+    return not mp.current_process().daemon
+
+
+# === Ekstraksi dengan budget halaman, karakter, dan waktu ===
+def extract_pdf(file_path: str, max_pages: int = PDF_MAX_PAGES, max_chars: int = PDF_MAX_CHARS,
+                timeout: float = PDF_TIMEOUT_SECONDS) -> dict:
+    start = time.monotonic()
+    deadline = start + timeout
+    total_pages = _page_count(file_path)
+    pages = list(range(min(total_pages, max_pages)))
+    timed_out = False
+
+    parallel = PDF_PAGE_WORKERS > 0 and len(pages) > 1
+    if (parallel or PDF_HARD_TIMEOUT) and pages and _can_use_subprocess():
+        if parallel:
+            # Halaman dibagi selang-seling (0,n,2n..) supaya beban rata; tiap proses membuka PDF sendiri
+            n = min(PDF_PAGE_WORKERS, len(pages))
+            ranges = [pages[i::n] for i in range(n)]
+            page_max_chars = None
+        else:
+            # Satu proses anak membaca halaman berurutan (berhenti di max_chars seperti jalur serial)
+            ranges = [pages]
+            page_max_chars = max_chars
+        pool = _get_page_pool()
+        tasks = [pool.apply_async(_extract_pages, (file_path, r, deadline, page_max_chars)) for r in ranges]
+        limit = deadline + PDF_TIMEOUT_GRACE_SECONDS
+        for task in tasks:
+            task.wait(max(limit - time.monotonic(), 0))
+            if not task.ready() or not task.successful():
+                break
+        timed_out = not all(task.ready() for task in tasks)
+        if timed_out:
+            _terminate_page_pool()
+
+        by_page: dict[int, tuple[str, bool]] = {}
+        for r, task in zip(ranges, tasks):
+            if task.ready():
+                # Exception dari proses anak dilempar ulang oleh get()
+                by_page.update(zip(r, task.get()))
+        # Hanya halaman berurutan dari awal yang dipakai, supaya teks tidak bolong di tengah
+        extracted = []
+        for number in pages:
+            if number not in by_page:
+                timed_out = timed_out or time.monotonic() > deadline
+                break
+            extracted.append(by_page[number])
+    else:
+        extracted = _extract_pages(file_path, pages, deadline, max_chars)
+        timed_out = len(extracted) < len(pages) and time.monotonic() > deadline
+
+    text = "\n".join(t for t, _ in extracted)
+    truncated = len(text) > max_chars or len(extracted) < total_pages
+    return {
+        "text": text[:max_chars],
+        "pages_total": total_pages,
+        "pages_read": len(extracted),
+        "fallback_pages": sum(1 for _, fallback in extracted if fallback),
+        "truncated": truncated,
+        "timed_out": timed_out,
+        "seconds": round(time.monotonic() - start, 3),
+    }
+
+
+# Ukur: python -m nlp.pdf_extractor cv1.pdf cv2.pdf ...
+if __name__ == "__main__":
+    import json
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Pemakaian: python -m nlp.pdf_extractor file1.pdf [file2.pdf ...]")
+        sys.exit(1)
+
+    for path in sys.argv[1:]:
+        result = extract_pdf(path)
+        result["chars"] = len(result.pop("text"))
+        print(json.dumps({path: result}))
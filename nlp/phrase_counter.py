@@ -0,0 +1,164 @@
+import heapq
+from collections import Counter
+from collections.abc import Iterable
+from itertools import compress, chain
+from operator import or_, not_
+from nlp.settings import BOOST_PHRASE_CAPACITY
+
+# === Penghitung frasa top-k streaming (dipakai boost_keywords) ===
+# Token diproses per blok BOOST_BLOCK_TOKENS; bigram & trigram tiap blok dibentuk lewat map/zip dan
+# langsung dihitung oleh Counter (di C), tanpa list n-gram untuk seluruh teks.
+# Memori dibatasi BOOST_PHRASE_CAPACITY frasa unik: jika penuh, hanya separuh frasa teratas yang
+# disimpan (lossy counting). Selama frasa unik <= kapasitas (CV normal), hasil persis sama dengan
+# Counter(bigram + trigram).most_common() pada boost_keywords lama.
+BOOST_BLOCK_TOKENS = 4096
+BOOST_MIN_TOKEN_CHARS = 3
+
+
+# Urutan = most_common() lama: hitungan terbanyak dulu; seri -> bigram dulu, lalu urutan kemunculan pertama
+# (Counter menyimpan urutan insert, jadi posisi di dict = kemunculan pertama)
+def _ranked(bigrams: Counter, trigrams: Counter) -> Iterable[tuple[int, int, int, str]]:
+    return chain(
+        ((-count, 0, i, phrase) for i, (phrase, count) in enumerate(bigrams.items())),
+        ((-count, 1, i, phrase) for i, (phrase, count) in enumerate(trigrams.items())),
+    )
+
+
+# Simpan `keep` frasa teratas (urutan sama dengan _ranked) tanpa mengubah urutan insert
+def _prune(bigrams: Counter, trigrams: Counter, keep: int) -> tuple[Counter, Counter]:
+    keep = max(keep, 1)
+    threshold = heapq.nlargest(keep, chain(bigrams.values(), trigrams.values()))[-1]
+    room = keep - sum(1 for count in chain(bigrams.values(), trigrams.values()) if count > threshold)
+
+    def kept(counter: Counter) -> Counter:
+        nonlocal room
+        result = Counter()
+        for phrase, count in counter.items():
+            if count > threshold:
+                result[phrase] = count
+            elif count == threshold and room > 0:
+                result[phrase] = count
+                room -= 1
+        return result
+
+    return kept(bigrams), kept(trigrams)
+
+
+def top_phrases(tokens: list[str], k: int, exclude: set[str] | frozenset[str] = frozenset(),
+                stopwords: set[str] | frozenset[str] = frozenset(),
+                capacity: int = BOOST_PHRASE_CAPACITY) -> list[str]:
+    if k <= 0:
+        return []
+    # Kapasitas < 2 (salah konfigurasi) tetap menyimpan minimal satu frasa setelah prune
+    capacity = max(capacity, 2)
+
+    # Semua filter per token lewat map/compress (tanpa loop Python per token)
+    words = list(compress(tokens, map((BOOST_MIN_TOKEN_CHARS - 1).__lt__, map(len, tokens))))
+    # Frasa yang seluruh tokennya angka/stopword dibuang saat dihitung
+    skip = map(str.isdigit, words)
+    if stopwords:
+        skip = map(or_, skip, map(stopwords.__contains__, words))
+    content = list(map(not_, skip))
+    bigrams: Counter[str] = Counter()
+    trigrams: Counter[str] = Counter()
+
+    for start in range(0, len(words), BOOST_BLOCK_TOKENS):
+        end = start + BOOST_BLOCK_TOKENS
+        # n-gram yang berakhir di blok ini (mulai 1-2 token sebelum blok)
+        w, c = words[max(start - 1, 0):end], content[max(start - 1, 0):end]
+        bigrams.update(compress(map(" ".join, zip(w, w[1:])), map(or_, c, c[1:])))
+        w, c = words[max(start - 2, 0):end], content[max(start - 2, 0):end]
+        trigrams.update(compress(
+            map(" ".join, zip(w, w[1:], w[2:])), map(or_, map(or_, c, c[1:]), c[2:])
+        ))
+        if len(bigrams) + len(trigrams) > capacity:
+            bigrams, trigrams = _prune(bigrams, trigrams, capacity // 2)
+
+    top = heapq.nsmallest(k + len(exclude), _ranked(bigrams, trigrams))
+    return [phrase for *_, phrase in top if phrase not in exclude][:k]
+
+
+# === Verifikasi terhadap boost_keywords lama + micro-benchmark ===
+# Jalankan: python -m nlp.phrase_counter [cv1.pdf cv2.pdf ...]
+# Versi lama memeriksa p.isdigit() pada frasa berspasi (tidak pernah True), jadi n-gram angka
+# ("2019 2021") ikut terpilih. "mismatches" membandingkan dengan versi lama setelah n-gram angka dibuang
+# (maksud filter lama); "raw_mismatches" membandingkan apa adanya.
+def verify(texts: list[str], min_required: int = 25) -> dict:
+    from nlp.cv_processor import boost_keywords, boost_keywords_legacy
+
+    def without_numeric(phrases: list[str]) -> list[str]:
+        return [p for p in phrases if not all(t.isdigit() for t in p.split())]
+
+    mismatches, raw_mismatches = [], []
+    for i, text in enumerate(texts):
+        streaming = boost_keywords([], text, min_required)
+        legacy = boost_keywords_legacy([], text, min_required)
+        legacy_more = boost_keywords_legacy([], text, min_required + len(legacy))
+        if streaming != without_numeric(legacy_more)[:min_required]:
+            mismatches.append(i)
+        if streaming != legacy:
+            raw_mismatches.append(i)
+    return {
+        "documents": len(texts),
+        "mismatches": len(mismatches),
+        "mismatch_indexes": mismatches[:20],
+        "raw_mismatches": len(raw_mismatches),
+    }
+
+
+def benchmark(texts: list[str], repeat: int = 20, min_required: int = 25) -> dict:
+    import timeit
+    import tracemalloc
+    from nlp.cv_processor import boost_keywords, boost_keywords_legacy
+    from nlp.keyword_engine import tokenize
+
+    # Jalur streaming memakai token hasil tokenize() yang sudah ada dari ekstraksi keyword
+    tokens = [tokenize(text) for text in texts]
+
+    def run(func):
+        for text, toks in zip(texts, tokens):
+            if func is boost_keywords:
+                func([], text, min_required, tokens=toks)
+            else:
+                func([], text, min_required)
+
+    def peak_kb(func) -> float:
+        tracemalloc.start()
+        run(func)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return round(peak / 1024, 1)
+
+    legacy_seconds = min(timeit.repeat(lambda: run(boost_keywords_legacy), number=repeat, repeat=3)) / repeat
+    stream_seconds = min(timeit.repeat(lambda: run(boost_keywords), number=repeat, repeat=3)) / repeat
+    return {
+        "documents": len(texts),
+        "chars": sum(len(t) for t in texts),
+        "legacy_ms": round(legacy_seconds * 1000, 3),
+        "streaming_ms": round(stream_seconds * 1000, 3),
+        "speedup": round(legacy_seconds / stream_seconds, 2) if stream_seconds else None,
+        "legacy_peak_kb": peak_kb(boost_keywords_legacy),
+        "streaming_peak_kb": peak_kb(boost_keywords),
+    }
+
+
+if __name__ == "__main__":
+    import json
+    import random
+    import sys
+    from benchmarks.corpus import build_corpus
+
+    docs = [doc["text"] for doc in build_corpus(per_bucket=5)]
+    if len(sys.argv) > 1:
+        from nlp.cv_processor import extract_text_from_pdf, clean_text
+        docs += [clean_text(extract_text_from_pdf(p)) for p in sys.argv[1:]]
+
+    # PDF "sampah": token acak tanpa pengulangan frasa -> n-gram unik sebanyak jumlah token
+    rng = random.Random(0)
+    junk = [" ".join(f"tok{rng.randrange(10**9)}" for _ in range(60000))]
+
+    print(json.dumps({
+        "verify": verify(docs),
+        "benchmark": benchmark(docs),
+        "junk_benchmark": benchmark(junk, repeat=1),
+    }, indent=2))
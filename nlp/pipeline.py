@@ -0,0 +1,274 @@
+import os
+import time
+from nlp.settings import CV_PIPELINE_PROFILE, KEYWORD_TOP_N, KEYWORD_ENGINE
+
+# === Pipeline analisis CV ===
+# Satu objek dokumen, stage dihitung saat pertama dibutuhkan lalu disimpan (memo):
+#   raw_text -> cleaned_text -> language -> sections -> keyword_text -> tokens -> keywords -> entities -> boosted_keywords
+# Modul NLP di-import di dalam stage supaya proses web bisa memakai stage ringan (mis. sections)
+# tanpa ikut memuat model.
+#
+# Profil (CV_PIPELINE_PROFILE):
+#   basic -> keyword dari seluruh teks, tanpa NER/boost (perilaku upload lama)
+#   full  -> keyword dari section deskripsi + pengalaman + skill, ditambah entitas NER lalu boost
+#            (perilaku process_cv lama)
+PIPELINE_PROFILES = ("basic", "full")
+
+
+# Durasi tiap stage dicatat eksklusif (tanpa durasi stage lain yang dipanggil di dalamnya),
+# dengan nama stage metrics (matchcv_stage_seconds)
+class pipeline_stage:
+    def __init__(self, metric_name: str):
+        self.metric_name = metric_name
+
+    def __call__(self, func):
+        self.func = func
+        self.name = func.__name__
+        return self
+
+    def __get__(self, doc, owner=None):
+        if doc is None:
+            return self
+        if self.name not in doc._values:
+            outer = doc._nested
+            doc._nested = 0.0
+            start = time.perf_counter()
+            try:
+                value = self.func(doc)
+            finally:
+                elapsed = time.perf_counter() - start
+                inner = doc._nested
+                doc._nested = outer + elapsed
+            doc._values[self.name] = value
+            doc._add_timing(self.metric_name, elapsed - inner)
+        return doc._values[self.name]
+
+
+class CVDocument:
+    def __init__(self, file_path: str | None = None, raw_text: str | None = None,
+                 profile: str = CV_PIPELINE_PROFILE, **known):
+        if file_path is None and raw_text is None:
+            raise ValueError("file_path atau raw_text wajib diisi")
+        if profile not in PIPELINE_PROFILES:
+            raise ValueError(f"Profil pipeline tidak dikenal: {profile}")
+        self.file_path = file_path
+        self.profile = profile
+        self.timings: dict[str, float] = {}
+        self._values: dict = {}
+        self._nested = 0.0
+        if raw_text is not None:
+            self.set("raw_text", raw_text)
+        for name, value in known.items():
+            self.set(name, value)
+
+    # Dokumen dari hasil analisis tersimpan (analysis_cache): stage yang sudah ada tidak dihitung ulang
+    @classmethod
+    def from_analysis(cls, analysis: dict, profile: str = CV_PIPELINE_PROFILE) -> "CVDocument":
+        result_stage = "keywords" if profile == "basic" else "boosted_keywords"
+        return cls(raw_text=analysis["raw_text"], profile=profile,
+                   language=analysis["lang_code"], **{result_stage: analysis["keywords"]})
+
+    # === Akses memo ===
+    def set(self, name: str, value, seconds: float = 0.0):
+        if not isinstance(getattr(type(self), name, None), pipeline_stage):
+            raise AttributeError(f"Stage pipeline tidak dikenal: {name}")
+        self._values[name] = value
+        if seconds:
+            self._add_timing(getattr(type(self), name).metric_name, seconds)
+
+    def computed(self, name: str) -> bool:
+        return name in self._values
+
+    def _add_timing(self, metric_name: str, seconds: float):
+        self.timings[metric_name] = self.timings.get(metric_name, 0.0) + seconds
+
+    # === Stage ===
+    @pipeline_stage("pdf")
+    def raw_text(self) -> str:
+        from nlp.cv_processor import extract_text_from_pdf
+        return extract_text_from_pdf(self.file_path).replace('\x00', '')
+
+    @pipeline_stage("clean")
+    def cleaned_text(self) -> str:
+        from nlp.cv_processor import clean_text
+        return clean_text(self.raw_text)
+
+    @pipeline_stage("detect_language")
+    def language(self) -> str:
+        from nlp.cv_processor import detect_language
+        return detect_language(self.cleaned_text)
+
+    @pipeline_stage("sections")
+    def sections(self) -> dict[str, str]:
+        from nlp.sections import extract_sections
+        return extract_sections(self.cleaned_text)
+
+    @pipeline_stage("sections")
+    def keyword_text(self) -> str:
+        if self.profile == "basic":
+            return self.cleaned_text
+        sections = self.sections
+        deskripsi = sections["deskripsi"] or self.cleaned_text[:1000]
+        return " ".join([deskripsi, sections["pengalaman"], sections["skill"]])
+
+    # Token dipakai bersama oleh engine keyword dan boost_keywords
+    @pipeline_stage("tokenize")
+    def tokens(self) -> list[str]:
+        from nlp.keyword_engine import tokenize
+        return tokenize(self.keyword_text)
+
+    @pipeline_stage("keywords")
+    def keywords(self) -> list[str]:
+        from nlp.cv_processor import extract_keywords
+        tokens = self.tokens if KEYWORD_ENGINE == "fast" else None
+        return extract_keywords(self.keyword_text, language=self.language, top_n=KEYWORD_TOP_N, tokens=tokens)
+
+    @pipeline_stage("entities")
+    def entities(self) -> list[str]:
+        from nlp.cv_processor import extract_entities
+        return extract_entities(self.cleaned_text, language=self.language)
+
+    @pipeline_stage("boost")
+    def boosted_keywords(self) -> list[str]:
+        from nlp.cv_processor import boost_keywords
+        keywords = list(self.keywords)
+        known = {k.lower() for k in keywords}
+        keywords += [e for e in self.entities if e.lower() not in known]
+        boosted = boost_keywords(keywords, self.keyword_text, min_required=KEYWORD_TOP_N,
+                                 tokens=self.tokens, language=self.language)
+        return list(dict.fromkeys(boosted))
+
+    # === Hasil ===
+    @property
+    def result_keywords(self) -> list[str]:
+        return self.keywords if self.profile == "basic" else self.boosted_keywords
+
+    # Format yang disimpan di analysis_cache / dipakai finalize_upload
+    def analysis(self, include_entities: bool = False) -> dict:
+        result = {
+            "raw_text": self.raw_text,
+            "lang_code": self.language,
+            "keywords": self.result_keywords,
+        }
+        if include_entities:
+            result["entities"] = self.entities
+        result["timings"] = dict(self.timings)
+        return result
+
+
+# === Banyak dokumen sekaligus ===
+# Keyword dan NER dokumen yang belum punya hasil dihitung dalam satu batch (embedding / nlp.pipe bersama);
+# durasi batch dibagi rata ke tiap dokumen. Stage lain tetap lazy per dokumen.
+def run_batch(docs: list[CVDocument], entities: bool = True) -> list[CVDocument]:
+    from nlp.cv_processor import extract_keywords_batch, extract_entities_batch
+
+    todo = [d for d in docs if not d.computed("keywords") and not d.computed("boosted_keywords")]
+    if todo:
+        texts, languages = [d.keyword_text for d in todo], [d.language for d in todo]
+        start = time.perf_counter()
+        extracted = extract_keywords_batch(texts, languages, top_n=KEYWORD_TOP_N)
+        share = (time.perf_counter() - start) / len(todo)
+        for doc, keywords in zip(todo, extracted):
+            doc.set("keywords", keywords, share)
+
+    todo = [d for d in docs if entities and not d.computed("entities")]
+    if todo:
+        texts, languages = [d.cleaned_text for d in todo], [d.language for d in todo]
+        start = time.perf_counter()
+        extracted = extract_entities_batch(texts, languages)
+        share = (time.perf_counter() - start) / len(todo)
+        for doc, ents in zip(todo, extracted):
+            doc.set("entities", ents, share)
+    return docs
+
+
+# === CLI: proses satu direktori PDF secara offline ===
+# Jalankan: python -m nlp.pipeline DIR [--workers 4] [--profile full] [--entities] [--output hasil.jsonl]
+# Tiap proses worker memuat model sekali (sama seperti worker pool server), lalu memproses CV satu per satu.
+def _process_file(args: tuple[str, str, bool]) -> dict:
+    path, profile, include_entities = args
+    try:
+        doc = CVDocument(path, profile=profile)
+        analysis = doc.analysis(include_entities=include_entities)
+        analysis.pop("raw_text")
+        return {"file": path, "ok": True, **analysis}
+    except Exception as e:
+        return {"file": path, "ok": False, "error": str(e)}
+
+
+def _summary(results: list[dict], wall_seconds: float) -> dict:
+    stages: dict[str, list[float]] = {}
+    for result in results:
+        for name, seconds in result.get("timings", {}).items():
+            stages.setdefault(name, []).append(seconds)
+    ok = sum(1 for r in results if r["ok"])
+    return {
+        "files": len(results),
+        "ok": ok,
+        "failed": len(results) - ok,
+        "wall_seconds": round(wall_seconds, 3),
+        "docs_per_second": round(len(results) / wall_seconds, 2) if wall_seconds else None,
+        "stages": {
+            name: {"total_seconds": round(sum(values), 4), "mean_ms": round(sum(values) / len(values) * 1000, 2)}
+            for name, values in stages.items()
+        },
+    }
+
+
+def _run(tasks: list[tuple[str, str, bool]], workers: int):
+    if workers <= 0:
+        yield from map(_process_file, tasks)
+        return
+
+    import multiprocessing as mp
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from nlp.worker_pool import _init_worker
+
+    # ProcessPoolExecutor (bukan multiprocessing.Pool): proses worker bukan daemon, jadi ekstraksi PDF
+    # tetap bisa memakai proses halaman dengan timeout keras (PDF_HARD_TIMEOUT)
+    with ProcessPoolExecutor(workers, mp_context=mp.get_context("spawn"), initializer=_init_worker) as executor:
+        futures = [executor.submit(_process_file, task) for task in tasks]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def main(argv: list[str] | None = None):
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Analisis CV (PDF) satu direktori secara offline")
+    parser.add_argument("directory")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="0 = tanpa proses terpisah")
+    parser.add_argument("--profile", choices=PIPELINE_PROFILES, default=CV_PIPELINE_PROFILE)
+    parser.add_argument("--entities", action="store_true", help="sertakan entitas NER di hasil")
+    parser.add_argument("--output", default=None, help="file JSONL hasil per CV")
+    args = parser.parse_args(argv)
+
+    paths = sorted(
+        os.path.join(root, name)
+        for root, _, names in os.walk(args.directory)
+        for name in names if name.lower().endswith(".pdf")
+    )
+    tasks = [(path, args.profile, args.entities) for path in paths]
+    print(f"[PIPELINE] {len(paths)} PDF, {args.workers} worker, profil {args.profile}")
+
+    start = time.perf_counter()
+    results = []
+    output = open(args.output, "w", encoding="utf-8") if args.output else None
+    try:
+        for result in _run(tasks, args.workers):
+            results.append(result)
+            if output:
+                output.write(json.dumps(result, ensure_ascii=False) + "\n")
+    finally:
+        if output:
+            output.close()
+
+    for result in results:
+        if not result["ok"]:
+            print(f"[PIPELINE] gagal {result['file']}: {result['error']}")
+    print(json.dumps(_summary(results, time.perf_counter() - start), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import re
+
+# === Section Headers ===
+# Urutan dict = urutan section di CV; tiap section berakhir di header pertama section berikutnya
+# (deskripsi -> pendidikan, pengalaman -> organisasi, skill -> akhir teks, sama seperti process_cv).
+SECTION_HEADERS = {
+    "deskripsi": ["deskripsi diri", "profil", "profile", "summary", "tentang saya", "about me", "ringkasan", "objective"],
+    "pendidikan": ["pendidikan", "education", "academic background"],
+    "pengalaman": ["pengalaman kerja", "pengalaman", "experience", "work history", "employment"],
+    "organisasi": ["organisasi", "aktivitas", "organization", "extracurricular", "volunteer"],
+    "skill": ["skill", "keahlian", "kemampuan", "technical skill", "tools", "kompetensi", "expertise", "proficiency"]
+}
+
+
+# === Segmenter satu kali scan ===
+# Satu regex untuk semua header dari semua section. Tiap alternatif section dibungkus lookahead
+# (lebar nol), jadi finditer berhenti di SETIAP posisi tempat header mana pun dimulai, termasuk
+# header yang tumpang tindih ("technical skill" / "skill") atau dimiliki beberapa section sekaligus.
+# Hasilnya sama dengan menjalankan re.finditer per frasa seperti find_all_keyword_positions,
+# selama tidak ada frasa yang bisa tumpang tindih dengan dirinya sendiri (dicek di verify_boundaries).
+def _compile(headers: dict[str, list[str]]) -> re.Pattern:
+    def alternation(phrases: list[str]) -> str:
+        # Frasa panjang dulu supaya urutan alternatif tidak memotong match
+        return "|".join(re.escape(p) for p in sorted(phrases, key=len, reverse=True))
+
+    any_header = alternation([p for phrases in headers.values() for p in phrases])
+    per_section = "".join(
+        f"(?=(?P<s{i}>{alternation(phrases)})?)" for i, phrases in enumerate(headers.values())
+    )
+    return re.compile(f"(?=(?:{any_header})){per_section}", flags=re.IGNORECASE)
+
+
+_SECTION_NAMES = list(SECTION_HEADERS)
+_SECTION_PATTERN = _compile(SECTION_HEADERS)
+
+
+def find_section_positions(text: str) -> dict[str, list[int]]:
+    positions: dict[str, list[int]] = {name: [] for name in _SECTION_NAMES}
+    for match in _SECTION_PATTERN.finditer(text):
+        for i, name in enumerate(_SECTION_NAMES):
+            if match.group(f"s{i}") is not None:
+                positions[name].append(match.start())
+    return positions
+
+
+# === Span semua section: {nama: (start, end)} atau None jika header tidak ditemukan ===
+def segment_sections(text: str) -> dict[str, tuple[int, int] | None]:
+    positions = find_section_positions(text)
+    spans: dict[str, tuple[int, int] | None] = {}
+    for i, name in enumerate(_SECTION_NAMES):
+        if not positions[name]:
+            spans[name] = None
+            continue
+        start = positions[name][0]
+        if i + 1 < len(_SECTION_NAMES):
+            ends = positions[_SECTION_NAMES[i + 1]]
+            end = next((e for e in ends if e > start), len(text))
+        else:
+            end = len(text)
+        spans[name] = (start, end)
+    return spans
+
+
+def extract_sections(text: str) -> dict[str, str]:
+    return {
+        name: text[span[0]:span[1]].strip() if span else ""
+        for name, span in segment_sections(text).items()
+    }
+
+
+# === Verifikasi & micro-benchmark terhadap extract_section lama ===
+# Jalankan: python -m nlp.sections [cv1.pdf cv2.pdf ...]
+def _self_overlapping(phrase: str) -> bool:
+    phrase = phrase.lower()
+    return any(phrase[:k] == phrase[-k:] for k in range(1, len(phrase)))
+
+
+def verify_boundaries(texts: list[str]) -> dict:
+    from nlp.cv_processor import extract_section
+
+    mismatches = []
+    for n, text in enumerate(texts):
+        fast = extract_sections(text)
+        for i, name in enumerate(_SECTION_NAMES):
+            next_headers = SECTION_HEADERS[_SECTION_NAMES[i + 1]] if i + 1 < len(_SECTION_NAMES) else []
+            if extract_section(text, SECTION_HEADERS[name], next_headers) != fast[name]:
+                mismatches.append({"document": n, "section": name})
+    return {
+        "documents": len(texts),
+        "mismatches": mismatches,
+        "self_overlapping_headers": [p for ps in SECTION_HEADERS.values() for p in ps if _self_overlapping(p)],
+    }
+
+
+def benchmark(texts: list[str], repeat: int = 200) -> dict:
+    import timeit
+    from nlp.cv_processor import extract_section
+
+    def legacy():
+        for text in texts:
+            for i, name in enumerate(_SECTION_NAMES):
+                next_headers = SECTION_HEADERS[_SECTION_NAMES[i + 1]] if i + 1 < len(_SECTION_NAMES) else []
+                extract_section(text, SECTION_HEADERS[name], next_headers)
+
+    def single_pass():
+        for text in texts:
+            extract_sections(text)
+
+    legacy_seconds = min(timeit.repeat(legacy, number=repeat, repeat=3)) / repeat
+    fast_seconds = min(timeit.repeat(single_pass, number=repeat, repeat=3)) / repeat
+    return {
+        "documents": len(texts),
+        "legacy_ms": round(legacy_seconds * 1000, 3),
+        "single_pass_ms": round(fast_seconds * 1000, 3),
+        "speedup": round(legacy_seconds / fast_seconds, 2) if fast_seconds else None,
+    }
+
+
+_SAMPLE_CVS = [
+    "Profil Saya mahasiswa informatika. Pendidikan Universitas Indonesia 2019-2023. "
+    "Pengalaman Kerja Backend developer di PT Contoh, membangun API. Organisasi BEM Fasilkom. "
+    "Keahlian Python, SQL, Docker. Tools: Git, Figma.",
+    "SUMMARY Data engineer with 5 years of experience. EDUCATION BSc Computer Science. "
+    "WORK HISTORY Example Corp - built pipelines; Employment at Acme. Volunteer: Code for Good. "
+    "Technical Skill: Python, Spark. Expertise in Airflow; proficiency in SQL.",
+    "Experience first: Software Engineer at Foo. Profile: passionate about ML. Education: MIT. "
+    "Skill Python. Organization: IEEE. Summary again at the end.",
+    "No headers here, just a plain paragraph about a person.",
+    "",
+]
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+
+    docs = list(_SAMPLE_CVS)
+    if len(sys.argv) > 1:
+        from nlp.cv_processor import extract_text_from_pdf, clean_text
+        docs += [clean_text(extract_text_from_pdf(p)) for p in sys.argv[1:]]
+
+    print(json.dumps({"verify": verify_boundaries(docs), "benchmark": benchmark(docs)}, indent=2))
@@ -0,0 +1,87 @@
+import os
+import hashlib
+import json
+
+# === Model NLP ===
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "paraphrase-multilingual-MPNet-base-v2")
+# torch | quantized | onnx (lihat nlp/embedding_backend.py)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+
+# === Parameter Ekstraksi Keyword ===
+KEYWORD_TOP_N = 25
+KEYWORD_NGRAM_RANGE = (1, 3)
+KEYWORD_DIVERSITY = 0.7
+KEYWORD_MIN_SCORE = 0.35
+# fast    -> nlp/keyword_engine.py (kandidat dipangkas, embedding batch, MMR NumPy)
+# keybert -> kw_model.extract_keywords (perilaku lama, default)
+# Ukur: python -m benchmarks.run --suite keywords. Hasil terakhir (korpus sintetis 18 CV, 1 CPU):
+# speedup fast 1.09x (en) / 1.16x (id), Jaccard rata-rata 0.46 / 0.21 (< KEYWORD_OVERLAP_TOLERANCE),
+# jadi default tetap keybert; waktu didominasi embedding kandidat, bukan MMR.
+KEYWORD_ENGINE = os.getenv("KEYWORD_ENGINE", "keybert")
+# Engine fast: kandidat n-gram maksimal per dokumen; 1 = kandidat diawali/diakhiri kata non-frasa (POS) dibuang
+KEYWORD_MAX_CANDIDATES = int(os.getenv("KEYWORD_MAX_CANDIDATES", "800"))
+KEYWORD_POS_FILTER = os.getenv("KEYWORD_POS_FILTER", "0") == "1"
+
+# === Pipeline Analisis CV (nlp/pipeline.py) ===
+# basic -> keyword dari seluruh teks CV; full -> section + NER + boost keyword
+CV_PIPELINE_PROFILE = os.getenv("CV_PIPELINE_PROFILE", "basic")
+
+# === Budget Ekstraksi PDF (dipakai nlp/pdf_extractor.py) ===
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "10"))
+PDF_MAX_CHARS = int(os.getenv("PDF_MAX_CHARS", "40000"))
+PDF_TIMEOUT_SECONDS = float(os.getenv("PDF_TIMEOUT_SECONDS", "20"))
+# Jalur cepat pypdfium2 (text-only); halaman dengan teks terlalu sedikit dibaca ulang dengan pdfplumber
+PDF_FAST_PATH = os.getenv("PDF_FAST_PATH", "1") == "1"
+
+# === Boost Keywords ===
+# 1 = frasa yang seluruh tokennya stopword (mis. "and the") tidak dipakai untuk boost
+BOOST_FILTER_STOPWORDS = os.getenv("BOOST_FILTER_STOPWORDS", "0") == "1"
+# Batas frasa unik penghitung boost (nlp/phrase_counter.py); di atas batas ini penghitungan lossy
+BOOST_PHRASE_CAPACITY = int(os.getenv("BOOST_PHRASE_CAPACITY", "20000"))
+
+# === NER (spaCy) ===
+# Hanya tokenizer + NER (dan tok2vec bila dibutuhkan NER) yang dimuat; komponen di bawah di-exclude
+SPACY_EXCLUDE = [p for p in os.getenv(
+    "SPACY_EXCLUDE", "tagger,parser,attribute_ruler,lemmatizer,morphologizer,senter"
+).split(",") if p]
+# Teks CV dibaca maksimal NER_MAX_CHARS, dipotong per NER_CHUNK_CHARS lalu diproses lewat nlp.pipe
+NER_MAX_CHARS = int(os.getenv("NER_MAX_CHARS", "20000"))
+NER_CHUNK_CHARS = int(os.getenv("NER_CHUNK_CHARS", "3000"))
+SPACY_BATCH_SIZE = int(os.getenv("SPACY_BATCH_SIZE", "16"))
+# > 1 hanya untuk batch besar (CLI / upload-batch); tiap panggilan pipe membuat proses baru
+SPACY_N_PROCESS = int(os.getenv("SPACY_N_PROCESS", "1"))
+
+# === Deteksi Bahasa ===
+# langdetect hanya membaca sampel (awal + tengah + akhir teks) sepanjang maksimal LANGDETECT_SAMPLE_CHARS
+LANGDETECT_SAMPLE_CHARS = int(os.getenv("LANGDETECT_SAMPLE_CHARS", "3000"))
+LANGDETECT_CACHE_SIZE = int(os.getenv("LANGDETECT_CACHE_SIZE", "4096"))
+
+# Naikkan jika logika ekstraksi teks/keyword berubah tanpa perubahan parameter di atas
+EXTRACTION_VERSION = "3"
+
+
+# === Fingerprint untuk invalidasi cache ===
+def extraction_fingerprint() -> str:
+    params = {
+        "version": EXTRACTION_VERSION,
+        "model": EMBEDDING_MODEL_NAME,
+        "backend": EMBEDDING_BACKEND,
+        "top_n": KEYWORD_TOP_N,
+        "ngram_range": KEYWORD_NGRAM_RANGE,
+        "diversity": KEYWORD_DIVERSITY,
+        "min_score": KEYWORD_MIN_SCORE,
+        "engine": KEYWORD_ENGINE,
+        "max_candidates": KEYWORD_MAX_CANDIDATES,
+        "pos_filter": KEYWORD_POS_FILTER,
+        "pipeline_profile": CV_PIPELINE_PROFILE,
+        "pdf_max_pages": PDF_MAX_PAGES,
+        "pdf_max_chars": PDF_MAX_CHARS,
+        "pdf_fast_path": PDF_FAST_PATH,
+        "langdetect_sample_chars": LANGDETECT_SAMPLE_CHARS,
+        "spacy_exclude": sorted(SPACY_EXCLUDE),
+        "ner_max_chars": NER_MAX_CHARS,
+        "ner_chunk_chars": NER_CHUNK_CHARS,
+        "boost_filter_stopwords": BOOST_FILTER_STOPWORDS,
+        "boost_phrase_capacity": BOOST_PHRASE_CAPACITY,
+    }
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:16]
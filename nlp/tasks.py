@@ -0,0 +1,46 @@
+# === Task yang dijalankan di worker pool ===
+# Fungsi di sini harus top-level (bisa di-pickle) dan meng-import modul NLP secara lazy,
+# supaya proses web tidak ikut memuat model NLP.
+
+
+# Stage pipeline (pdf -> clean -> detect_language -> keywords, plus section/NER/boost untuk profil full)
+# ada di nlp/pipeline.py. "timings" berisi durasi per stage (detik); dicatat ke metrics oleh proses web
+def analyze_cv_file(file_path: str) -> dict:
+    from nlp.pipeline import CVDocument
+
+    return CVDocument(file_path).analysis()
+
+
+def extract_pdf_text(file_path: str) -> str:
+    from nlp.pipeline import CVDocument
+
+    return CVDocument(file_path).raw_text
+
+
+# Analisis banyak CV sekaligus: deteksi bahasa per dokumen, lalu keyword dan NER dalam batch.
+# cached[i] (jika ada) berisi hasil analisis dari cache; dokumen itu hanya perlu NER.
+def analyze_texts_batch(raw_texts: list[str], cached: list[dict | None] | None = None) -> list[dict]:
+    from nlp.pipeline import CVDocument, run_batch
+
+    cached = cached or [None] * len(raw_texts)
+    docs = [
+        CVDocument.from_analysis({**c, "raw_text": raw}) if c else CVDocument(raw_text=raw)
+        for raw, c in zip(raw_texts, cached)
+    ]
+    run_batch(docs)
+    return [doc.analysis(include_entities=True) for doc in docs]
+
+
+def embed_text(text: str) -> list[float]:
+    from nlp.model_loader import get_embedding_model
+
+    vector = get_embedding_model().encode(text, normalize_embeddings=True)
+    return vector.tolist()
+
+
+def embed_texts(texts: list[str]):
+    from nlp.model_loader import get_embedding_model
+    import numpy as np
+
+    vectors = get_embedding_model().encode(texts, normalize_embeddings=True, batch_size=32)
+    return np.asarray(vectors, dtype=np.float32)
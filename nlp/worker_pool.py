@@ -0,0 +1,154 @@
+import asyncio
+import multiprocessing as mp
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# === Konfigurasi Worker Pool ===
+# CV_WORKER_POOL_SIZE=0 -> pipeline NLP dijalankan di thread proses web (tanpa proses terpisah)
+CV_WORKER_POOL_SIZE = int(os.getenv("CV_WORKER_POOL_SIZE", "2"))
+# Jumlah task yang boleh antre di luar yang sedang diproses
+CV_WORKER_QUEUE_LIMIT = int(os.getenv("CV_WORKER_QUEUE_LIMIT", "8"))
+# Batas tunggu satu worker selesai memuat model saat warm_pool
+CV_WORKER_READY_TIMEOUT_SECONDS = float(os.getenv("CV_WORKER_READY_TIMEOUT_SECONDS", "600"))
+
+
+class WorkerPoolFull(Exception):
+    pass
+
+
+_executor: ProcessPoolExecutor | None = None
+# Tiap worker melapor (pid, model_stats) ke sini setelah initializer selesai
+_ready_queue = None
+_warm_task: asyncio.Task | None = None
+_in_flight = 0
+_pool_ready = False
+_worker_stats: dict[int, dict] = {}
+# Slot task (diproses + antre); asyncio.Semaphore terikat ke satu event loop, jadi satu per loop
+_slots: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+# === Inisialisasi per proses worker ===
+def _init_worker(ready_queue):
+    # Import di sini supaya model NLP hanya dimuat di proses worker, bukan di proses web
+    from nlp.model_loader import load_all_models, warmup_models, model_stats, MODEL_WARMUP
+
+    load_all_models()
+    if MODEL_WARMUP:
+        warmup_models()
+    ready_queue.put((os.getpid(), model_stats()))
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+# === Lifecycle ===
+def start_pool():
+    global _executor, _ready_queue
+    if CV_WORKER_POOL_SIZE <= 0 or _executor is not None:
+        return
+
+    # Proses worker baru di-spawn saat warm_pool / task pertama; task yang masuk
+    # sebelum worker siap cukup menunggu di antrian executor
+    context = mp.get_context("spawn")
+    _ready_queue = context.Queue()
+    _executor = ProcessPoolExecutor(
+        max_workers=CV_WORKER_POOL_SIZE,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(_ready_queue,),
+    )
+
+
+async def warm_pool():
+    global _pool_ready
+    executor, ready_queue = _executor, _ready_queue
+    if executor is None:
+        return
+
+    # Pre-warm: ping serentak memaksa semua proses spawn. Satu worker bisa menjawab beberapa ping,
+    # jadi kesiapan dihitung dari laporan initializer tiap proses, bukan dari jawaban ping.
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(*[loop.run_in_executor(executor, _ping) for _ in range(CV_WORKER_POOL_SIZE)])
+    for _ in range(CV_WORKER_POOL_SIZE):
+        pid, stats = await asyncio.to_thread(ready_queue.get, True, CV_WORKER_READY_TIMEOUT_SECONDS)
+        _worker_stats[pid] = stats
+        print(f"[WORKER POOL] worker {pid} siap: {stats}")
+    if executor is _executor:
+        _pool_ready = True
+
+
+# Proses worker mati (mis. OOM / segfault) membuat executor rusak permanen: buat ulang dan warm lagi
+def _restart_pool(broken: ProcessPoolExecutor):
+    global _warm_task
+    if _executor is not broken:
+        # Sudah dibuat ulang oleh task lain yang gagal bersamaan
+        return
+    print("[WORKER POOL] proses worker mati, pool dibuat ulang")
+    shutdown_pool()
+    _worker_stats.clear()
+    start_pool()
+    _warm_task = asyncio.get_running_loop().create_task(warm_pool())
+
+
+def pool_ready() -> bool:
+    return _pool_ready
+
+
+def shutdown_pool():
+    global _executor, _ready_queue, _pool_ready
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _ready_queue.close()
+        _executor = _ready_queue = None
+        _pool_ready = False
+
+
+def pool_stats() -> dict:
+    return {
+        "size": CV_WORKER_POOL_SIZE,
+        "queue_limit": CV_WORKER_QUEUE_LIMIT,
+        "in_flight": _in_flight,
+        "ready": _pool_ready,
+        "workers": _worker_stats,
+    }
+
+
+# === Submit Task ===
+def _capacity() -> int:
+    return max(CV_WORKER_POOL_SIZE, 1) + CV_WORKER_QUEUE_LIMIT
+
+
+def _loop_slots() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    slots = _slots.get(loop)
+    if slots is None:
+        slots = _slots[loop] = asyncio.Semaphore(_capacity())
+    return slots
+
+
+# wait=True: tunggu slot kosong alih-alih langsung menolak (dipakai job & batch)
+async def run_in_pool(func, *args, wait: bool = False):
+    global _in_flight
+
+    slots = _loop_slots()
+    if slots.locked() and not wait:
+        raise WorkerPoolFull(f"Antrian pemrosesan CV penuh ({_in_flight}/{_capacity()})")
+
+    async with slots:
+        _in_flight += 1
+        try:
+            executor = _executor
+            if executor is None:
+                return await asyncio.to_thread(func, *args)
+            loop = asyncio.get_running_loop()
+            try:
+                return await loop.run_in_executor(executor, func, *args)
+            except BrokenProcessPool as e:
+                _restart_pool(executor)
+                # Pemanggil sudah menangani WorkerPoolFull (503 / coba lagi nanti)
+                raise WorkerPoolFull("Proses worker mati; pool sedang dibuat ulang") from e
+        finally:
+            _in_flight -= 1
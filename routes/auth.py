@@ -37,7 +37,7 @@ def login(
     if not user:
         raise HTTPException(status_code=401, detail="Username atau password salah.")
 
-    request.session["user"] = {"id": user.id, "username": user.username}
+    request.session["user"] = {"id": user.id, "username": user.username, "role": user.role}
     return {"message": "Login berhasil."}
 
 # === Logout ===
@@ -0,0 +1,29 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from nlp.model_loader import load_times
+from nlp.worker_pool import pool_stats
+from databases.database import db_pool_stats
+from services.llm_client import llm_client
+from services.startup import readiness, startup_errors, startup_times, is_ready
+
+router = APIRouter()
+
+# === Liveness: proses hidup dan event loop merespons ===
+@router.get("/live")
+def live():
+    return {"status": "ok"}
+
+# === Readiness: DB schema siap dan model NLP sudah dimuat ===
+@router.get("/ready")
+def ready():
+    body = {
+        "status": "ready" if is_ready() else "starting",
+        "components": readiness,
+        "errors": {k: v.strip().splitlines()[-1] for k, v in startup_errors.items()},
+        "startup_seconds": startup_times,
+        "model_load_seconds": load_times,
+        "worker_pool": pool_stats(),
+        "db_pool": db_pool_stats(),
+        "llm": llm_client.stats()
+    }
+    return JSONResponse(body, status_code=200 if is_ready() else 503)
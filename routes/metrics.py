@@ -0,0 +1,41 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from monitoring.metrics import CallbackGauge, render_metrics
+from nlp.worker_pool import pool_stats
+from services.analysis_cache import analysis_cache
+from services.llm_cache import recommendation_cache
+
+router = APIRouter()
+
+# === Gauge ukuran cache dan antrian (dibaca saat scrape) ===
+CallbackGauge(
+    "matchcv_cache_entries", "Jumlah entri di cache in-process", ("cache",),
+    lambda: {
+        ("analysis",): analysis_cache.stats()["size"],
+        ("recommendation",): recommendation_cache.stats()["size"],
+    },
+)
+CallbackGauge(
+    "matchcv_cache_lookups", "Jumlah lookup cache per hasil sejak proses start", ("cache", "result"),
+    lambda: {
+        ("analysis", "memory_hit"): analysis_cache.stats()["memory_hits"],
+        ("analysis", "db_hit"): analysis_cache.stats()["db_hits"],
+        ("analysis", "miss"): analysis_cache.stats()["misses"],
+        ("recommendation", "hit"): recommendation_cache.stats()["hits"],
+        ("recommendation", "near_hit"): recommendation_cache.stats()["near_hits"],
+        ("recommendation", "miss"): recommendation_cache.stats()["misses"],
+    },
+)
+CallbackGauge(
+    "matchcv_worker_pool_tasks", "Task NLP yang sedang diproses/antre dan kapasitas worker pool", ("kind",),
+    lambda: {
+        ("in_flight",): pool_stats()["in_flight"],
+        ("workers",): pool_stats()["size"],
+        ("queue_limit",): pool_stats()["queue_limit"],
+    },
+)
+
+# === Endpoint scrape Prometheus ===
+@router.get("/metrics")
+def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
@@ -1,171 +1,437 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Request, Depends
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, UploadFile, File, HTTPException, Request, Depends, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from pathlib import Path
-import tempfile, uuid, os, json
+from sqlalchemy.ext.asyncio import AsyncSession
+import os, json
 import traceback
-import shutil
-from databases.models import User, CVUpload, ChatHistory
-from databases.database import get_db
-from nlp.cv_processor import extract_text_from_pdf, clean_text, extract_keywords, detect_language
-import google.generativeai as genai
+from contextlib import aclosing
+from databases.models import User, CVUpload, ChatHistory, CVJob, CVChunk, CVKeyword, CVEmbedding
+from databases.database import get_db, get_async_db, SessionLocal, AsyncSessionLocal
+from nlp.worker_pool import WorkerPoolFull, pool_stats
+from nlp.pipeline import CVDocument
+from services.analysis_cache import analysis_cache
+from services.cv_analysis import (
+    analyze_cv, finalize_upload, save_upload, ask_gemini_stream, ask_gemini_fallback
+)
+from services.chat import save_chat_turn
+from services.cv_context import build_cv_chat_prompt, schedule_cv_indexing
+from services.llm_cache import recommendation_cache
+from services.jobs import create_job, dispatch_job, CV_JOB_DIR
+from services.cv_storage import stream_upload_to_disk, release_blob, purge_blob, UploadTooLarge
+from services.batch_upload import process_batch, CV_BATCH_MAX_FILES
+from services.pagination import before_cursor, page_of, NEXT_CURSOR_HEADER
+from services.keyword_index import search_uploads, SEARCH_MAX_SKILLS
+from services.job_index import job_index, JobIndexMismatch
+from services.cv_embeddings import similar_index, EMBEDDING_KINDS, DOCUMENT_KIND
+from services.job_matching import match_jobs, explain_matches, stored_query_vector, JOB_MATCH_TOP_N
+from services.llm_client import llm_client, LLMUnavailable, LLM_UNAVAILABLE_DETAIL
+from monitoring.metrics import stage
 
 router = APIRouter()
 
-# === Fungsi Gemini ===
-def ask_gemini(keywords: list[str]) -> str:
-    keyword_summary = "\n".join([f"- {kw}" for kw in keywords])
-
-    prompt = (
-        f"Berikut ini adalah ringkasan keterampilan, pengalaman, dan latar belakang pengguna:\n\n"
-        f"{keyword_summary}\n\n"
-        f"Tugas Anda:\n"
-        f"1. Bayangkan Anda adalah seorang career coach profesional.\n"
-        f"2. Rekomendasikan **5 pekerjaan** yang paling sesuai dengan profil pengguna di atas.\n"
-        f"3. Untuk setiap pekerjaan yang Anda rekomendasikan:\n"
-        f"   - Berikan **nama posisi** yang spesifik dan umum dikenal.\n"
-        f"   - Jelaskan **mengapa pengguna cocok** untuk posisi tersebut berdasarkan profil.\n"
-        f"   - **Jangan menyebut kata 'keyword'** dan **hindari mengutip frasa dari daftar di atas secara persis**.\n"
-        f"   - Parafrase informasi agar terdengar alami dan profesional.\n"
-        f"4. **Gunakan format Markdown yang rapi**:\n"
-        f"   - Gunakan heading dengan `##` untuk nama pekerjaan.\n"
-        f"   - Pisahkan **setiap heading** dengan **satu baris kosong di atas dan bawah**.\n"
-        f"   - Gunakan bullet list (`-`) atau numbered list (`1.`) dengan **satu baris kosong sebelum list**.\n"
-        f"   - Gunakan `**bold**` jika ingin menyorot istilah penting atau nama proyek.\n"
-        f"   - Pisahkan paragraf dengan satu baris kosong.\n"
-        f"5. Hindari jawaban yang terlalu umum. Buat jawaban terasa personal dan kontekstual.\n\n"
-        f"Tambahkan kalimat pembuka berikut sebelum daftar pekerjaan:\n"
-        f"`## **Berikut adalah 5 rekomendasi pekerjaan yang paling sesuai dengan profil pengguna, beserta alasannya:**`\n"
-    )
+# === Ukuran halaman listing (keyset pagination) ===
+MY_UPLOADS_PAGE_SIZE = int(os.getenv("MY_UPLOADS_PAGE_SIZE", "50"))
+CHAT_HISTORY_PAGE_SIZE = int(os.getenv("CHAT_HISTORY_PAGE_SIZE", "100"))
+MAX_PAGE_SIZE = 200
 
-    try:
-        model = genai.GenerativeModel("models/gemini-2.0-flash")
-        response = model.generate_content(prompt)
-        return response.text
-    except Exception as e:
-        return f"Error from Gemini: {str(e)}"
+# === Server-Sent Events ===
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+def _sse(data: dict, event: str | None = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
 
 # === Upload CV Endpoint ===
+# mode=sync (default): proses langsung dan kembalikan hasil
+# mode=job: simpan sebagai job, langsung kembalikan job_id (cek lewat /jobs/{job_id})
 @router.post("/upload")
 async def upload_cv(
     file: UploadFile = File(...),
+    mode: str = Query("sync"),
     request: Request = None,
     db: Session = Depends(get_db)
 ):
     if file.content_type != "application/pdf":
         raise HTTPException(status_code=400, detail="File harus berformat PDF.")
+    if mode not in ("sync", "job"):
+        raise HTTPException(status_code=400, detail="Mode harus 'sync' atau 'job'.")
 
     try:
-        tmp_path = Path(tempfile.gettempdir()) / f"{uuid.uuid4()}.pdf"
-        with open(tmp_path, "wb") as f:
-            f.write(await file.read())
-
-        raw_text = extract_text_from_pdf(str(tmp_path)).replace('\x00', '')
-        cleaned = clean_text(raw_text)
-        lang_code = detect_language(cleaned)
-        lang = "English" if lang_code == "en" else "Non-English"
-        keywords = extract_keywords(cleaned, language=lang_code, top_n=25)
-
         user = request.session.get("user") if hasattr(request, "session") else None
 
-        # === Jika keyword terlalu sedikit, tetap kirim ke Gemini ===
-        if not keywords or len(keywords) < 5:
-            fallback_prompt = (
-                "Balas pengguna dengan **tepat sesuai isi berikut**. Jangan tambahkan atau ubah apapun:\n\n"
-                "Saya mencoba membaca file yang Anda unggah, namun tidak berhasil menemukan informasi khas dari sebuah CV "
-                "seperti pengalaman kerja, pendidikan, atau keahlian. "
-                "Mohon pastikan bahwa file yang Anda unggah memang merupakan CV (Curriculum Vitae) yang valid.\n\n"
-                "Jika Anda membutuhkan bantuan cara membuat CV, saya siap membantu!"
-            )
-
-            model = genai.GenerativeModel("models/gemini-2.0-flash")
-            response = model.generate_content(fallback_prompt)
-
-            os.remove(tmp_path)
-
-            return JSONResponse({
-                "language": lang,
-                "keywords": [],
-                "raw_gemini_response": response.text,
-                "saved": False,
-                "upload_id": None
-            })
+        if mode == "job":
+            try:
+                job_path, content_hash, _ = await stream_upload_to_disk(file, target_dir=CV_JOB_DIR)
+            except UploadTooLarge as e:
+                raise HTTPException(status_code=413, detail=str(e))
+            job = await run_in_threadpool(create_job, db, job_path, content_hash, file.filename, user)
+            dispatch_job(job.id)
+            return JSONResponse({"job_id": job.id, "status": job.status}, status_code=202)
+
+        # File di-stream ke disk per chunk sambil di-hash (tidak ditampung utuh di memori)
+        try:
+            with stage("upload_io"):
+                tmp_path, content_hash, _ = await stream_upload_to_disk(file)
+        except UploadTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
+
+        # Pipeline NLP dijalankan di worker pool agar event loop tidak terblokir;
+        # CV yang sama (hash identik) diambil dari cache
+        try:
+            try:
+                analysis = await analyze_cv(db, tmp_path, content_hash)
+            except WorkerPoolFull:
+                raise HTTPException(status_code=503, detail="Server sedang sibuk memproses CV lain. Silakan coba lagi nanti.")
+
+            result = await run_in_threadpool(finalize_upload, analysis, tmp_path, content_hash, file.filename, user, db)
+        finally:
+            # File sementara sudah dipindah ke blob / dihapus jika finalize_upload sukses
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        # Chunk + embedding CV untuk retrieval chat dibuat di background
+        schedule_cv_indexing(result["upload_id"], analysis["raw_text"])
+        return JSONResponse(result)
+
+    except HTTPException:
+        raise
+    except LLMUnavailable:
+        raise HTTPException(status_code=503, detail=LLM_UNAVAILABLE_DETAIL)
+    except Exception as e:
+        print("[UPLOAD ERROR]")
+        print(traceback.format_exc())
+        raise HTTPException(status_code=500, detail="Internal server error: " + str(e))
 
-        raw_response = ask_gemini(keywords)
-        saved = False
+# === Batch Upload (banyak CV sekaligus) ===
+@router.post("/upload-batch")
+async def upload_cv_batch(
+    files: list[UploadFile] = File(...),
+    request: Request = None,
+    db: Session = Depends(get_db)
+):
+    if len(files) > CV_BATCH_MAX_FILES:
+        raise HTTPException(status_code=400, detail=f"Maksimal {CV_BATCH_MAX_FILES} file per batch.")
 
-        if user:
-            os.makedirs("cv_uploads", exist_ok=True)
-            saved_path = f"cv_uploads/{uuid.uuid4()}.pdf"
-            shutil.copy(str(tmp_path), saved_path)
-            os.remove(tmp_path)
-
-            cv_record = CVUpload(
-                user_id=user["id"],
-                original_filename=file.filename,
-                saved_path=saved_path,
-                extracted_text=raw_text,
-                keywords=json.dumps(keywords),
-            )
-            db.add(cv_record)
-            db.commit()
-            db.refresh(cv_record)
-
-            db.add_all([
-                ChatHistory(
-                    user_id=user["id"],
-                    cv_upload_id=cv_record.id,
-                    role="user",
-                    message="Berikut CV saya. Mohon rekomendasi pekerjaan."
-                ),
-                ChatHistory(
-                    user_id=user["id"],
-                    cv_upload_id=cv_record.id,
-                    role="llm",
-                    message=raw_response
-                )
-            ])
-            db.commit()
-
-            saved = True
-        else:
-            os.remove(tmp_path)
+    try:
+        user = request.session.get("user") if hasattr(request, "session") else None
+        payload = []
+        for f in files:
+            try:
+                tmp_path, content_hash, _ = await stream_upload_to_disk(f)
+                payload.append((f.filename, f.content_type, tmp_path, content_hash, None))
+            except UploadTooLarge as e:
+                payload.append((f.filename, f.content_type, None, None, str(e)))
+        results = await process_batch(db, payload, user)
 
         return JSONResponse({
-            "language": lang,
-            "keywords": keywords,
-            "raw_gemini_response": raw_response,
-            "saved": saved,
-            "upload_id": cv_record.id if saved else None
+            "count": len(results),
+            "succeeded": sum(1 for r in results if r["ok"]),
+            "failed": sum(1 for r in results if not r["ok"]),
+            "results": results
         })
 
     except Exception as e:
-        print("[UPLOAD ERROR]")
+        print("[BATCH UPLOAD ERROR]")
         print(traceback.format_exc())
         raise HTTPException(status_code=500, detail="Internal server error: " + str(e))
 
+# === Upload CV (streaming SSE) ===
+# Event: "analysis" (bahasa + keyword), "delta" per potongan rekomendasi,
+# "done" berisi payload yang sama dengan /upload, "error" jika gagal.
+@router.post("/upload/stream")
+async def upload_cv_stream(file: UploadFile = File(...), request: Request = None):
+    if file.content_type != "application/pdf":
+        raise HTTPException(status_code=400, detail="File harus berformat PDF.")
+
+    user = request.session.get("user") if hasattr(request, "session") else None
+    try:
+        tmp_path, content_hash, _ = await stream_upload_to_disk(file)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    # Session dibuat sendiri karena dipakai di dalam generator, setelah handler selesai
+    db = SessionLocal()
+    try:
+        analysis = await analyze_cv(db, tmp_path, content_hash)
+    except WorkerPoolFull:
+        db.close()
+        os.remove(tmp_path)
+        raise HTTPException(status_code=503, detail="Server sedang sibuk memproses CV lain. Silakan coba lagi nanti.")
+    except Exception:
+        db.close()
+        os.remove(tmp_path)
+        raise
+
+    keywords = analysis["keywords"]
+    lang = "English" if analysis["lang_code"] == "en" else "Non-English"
+
+    async def event_stream():
+        try:
+            if not keywords or len(keywords) < 5:
+                yield _sse({"language": lang, "keywords": []}, event="analysis")
+                fallback_response = await run_in_threadpool(ask_gemini_fallback)
+                yield _sse({"text": fallback_response}, event="delta")
+                yield _sse({
+                    "language": lang,
+                    "keywords": [],
+                    "raw_gemini_response": fallback_response,
+                    "saved": False,
+                    "upload_id": None
+                }, event="done")
+                return
+
+            yield _sse({"language": lang, "keywords": keywords}, event="analysis")
+
+            parts = []
+            # aclosing: stream Gemini (dan slot client LLM) langsung dilepas saat client putus
+            async with aclosing(ask_gemini_stream(keywords, analysis.get("keyword_embedding"))) as chunks:
+                async for text in chunks:
+                    if await request.is_disconnected():
+                        return
+                    parts.append(text)
+                    yield _sse({"text": text}, event="delta")
+
+            raw_response = "".join(parts)
+            upload_id = await run_in_threadpool(
+                save_upload, db, tmp_path, content_hash, file.filename, user, analysis, raw_response
+            )
+            schedule_cv_indexing(upload_id, analysis["raw_text"])
+            yield _sse({
+                "language": lang,
+                "keywords": keywords,
+                "raw_gemini_response": raw_response,
+                "saved": upload_id is not None,
+                "upload_id": upload_id
+            }, event="done")
+        except LLMUnavailable:
+            yield _sse({"detail": LLM_UNAVAILABLE_DETAIL}, event="error")
+        except Exception as e:
+            print("[UPLOAD STREAM ERROR]")
+            print(traceback.format_exc())
+            yield _sse({"detail": "Internal server error: " + str(e)}, event="error")
+        finally:
+            db.close()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+# === Status Job Upload ===
+def _get_job_for_user(db: Session, job_id: str, user: dict | None) -> CVJob:
+    job = db.get(CVJob, job_id)
+    # Job milik user login hanya bisa dilihat user tersebut; job anonim cukup dengan job_id
+    if not job or (job.user_id and (not user or job.user_id != user["id"])):
+        raise HTTPException(status_code=404, detail="Job tidak ditemukan.")
+    return job
+
+@router.get("/jobs/{job_id}")
+def get_job_status(job_id: str, request: Request, db: Session = Depends(get_db)):
+    user = request.session.get("user") if hasattr(request, "session") else None
+    job = _get_job_for_user(db, job_id, user)
+
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "error": job.error,
+        "upload_id": job.upload_id,
+        "created_at": job.created_at.isoformat(),
+        "updated_at": job.updated_at.isoformat() if job.updated_at else None
+    }
+
+@router.get("/jobs/{job_id}/result")
+def get_job_result(job_id: str, request: Request, db: Session = Depends(get_db)):
+    user = request.session.get("user") if hasattr(request, "session") else None
+    job = _get_job_for_user(db, job_id, user)
+
+    # Job gagal bukan error server: 409 dengan error yang tersimpan
+    if job.status == "failed":
+        raise HTTPException(status_code=409, detail=f"Job gagal: {job.error}")
+    if job.status != "done":
+        return JSONResponse({"job_id": job.id, "status": job.status}, status_code=202)
+
+    return JSONResponse(job.get_result())
+
+# === Statistik Cache & Worker Pool ===
+@router.get("/cache-stats")
+def get_cache_stats():
+    return {
+        "analysis_cache": analysis_cache.stats(),
+        "recommendation_cache": recommendation_cache.stats(),
+        "worker_pool": pool_stats(),
+        "job_index": job_index.stats(),
+        "similar_index": similar_index.stats()
+    }
+
 # === Ambil Riwayat Upload User ===
+# Terbaru dulu, per halaman `limit`; halaman berikutnya: ?cursor=<header X-Next-Cursor>.
+# Hanya kolom yang ditampilkan yang di-select (extracted_text tidak ikut diambil).
 @router.get("/my-uploads")
-def get_my_uploads(request: Request, db: Session = Depends(get_db)):
+async def get_my_uploads(
+    request: Request,
+    limit: int = Query(MY_UPLOADS_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(None),
+    db: AsyncSession = Depends(get_async_db)
+):
     user = request.session.get("user") if hasattr(request, "session") else None
     if not user:
         raise HTTPException(status_code=401, detail="Belum login")
 
-    uploads = db.query(CVUpload).filter(CVUpload.user_id == user["id"]).order_by(CVUpload.created_at.desc()).all()
+    query = select(CVUpload.id, CVUpload.original_filename, CVUpload.keywords, CVUpload.created_at)\
+        .where(CVUpload.user_id == user["id"])
+    if cursor:
+        query = query.where(before_cursor(CVUpload.created_at, CVUpload.id, cursor))
+    query = query.order_by(CVUpload.created_at.desc(), CVUpload.id.desc()).limit(limit + 1)
 
-    return [
+    uploads, next_cursor = page_of((await db.execute(query)).all(), limit)
+
+    body = [
         {
             "id": u.id,
             "original_filename": u.original_filename,
-            "keywords": json.loads(u.keywords),
+            "keywords": u.keywords,
             "created_at": u.created_at.isoformat()
         }
         for u in uploads
     ]
+    return JSONResponse(body, headers={NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None)
+
+# Role dibaca dari DB, bukan dari session (session lama belum menyimpan role)
+async def _require_recruiter(db: AsyncSession, user: dict):
+    role = (await db.execute(select(User.role).where(User.id == user["id"]))).scalar()
+    if role != "recruiter":
+        raise HTTPException(status_code=403, detail="Hanya recruiter yang dapat mencari semua CV.")
+
+# === Cari CV berdasarkan skill ===
+# ?skills=python,sql -> CV dengan skill paling banyak cocok dulu.
+# scope=mine (default): CV milik user; scope=all: semua CV, hanya untuk role recruiter.
+@router.get("/search")
+async def search_cvs(
+    request: Request,
+    skills: str = Query(...),
+    scope: str = Query("mine"),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db)
+):
+    user = request.session.get("user") if hasattr(request, "session") else None
+    if not user:
+        raise HTTPException(status_code=401, detail="Belum login")
+    if scope not in ("mine", "all"):
+        raise HTTPException(status_code=400, detail="Scope harus 'mine' atau 'all'.")
+
+    skill_list = [s for s in skills.split(",") if s.strip()]
+    if not skill_list:
+        raise HTTPException(status_code=400, detail="Minimal satu skill harus diisi.")
+    if len(skill_list) > SEARCH_MAX_SKILLS:
+        raise HTTPException(status_code=400, detail=f"Maksimal {SEARCH_MAX_SKILLS} skill per pencarian.")
+
+    if scope == "all":
+        await _require_recruiter(db, user)
+
+    with stage("search"):
+        results = await search_uploads(db, skill_list, None if scope == "all" else user["id"], limit)
+    return {"skills": skill_list, "scope": scope, "results": results}
+
+# === Section CV (deskripsi, pendidikan, pengalaman, organisasi, skill) ===
+# Segmenter regex satu kali scan; tidak butuh model NLP, jadi aman dijalankan di proses web.
+@router.get("/sections/{upload_id}")
+async def get_cv_sections(upload_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    user = request.session.get("user") if hasattr(request, "session") else None
+    if not user:
+        raise HTTPException(status_code=401, detail="Belum login")
+
+    cv = await _get_user_cv(db, upload_id, user)
+    return {"upload_id": cv.id, "sections": CVDocument(raw_text=cv.extracted_text).sections}
+
+# === CV serupa (embedding tersimpan, tanpa menjalankan model) ===
+# section=document (default) atau nama section (mis. skill, pengalaman); scope seperti /search.
+@router.get("/similar/{upload_id}")
+async def get_similar_cvs(
+    upload_id: int,
+    request: Request,
+    k: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    scope: str = Query("mine"),
+    section: str = Query(DOCUMENT_KIND),
+    db: AsyncSession = Depends(get_async_db)
+):
+    user = request.session.get("user") if hasattr(request, "session") else None
+    if not user:
+        raise HTTPException(status_code=401, detail="Belum login")
+    if scope not in ("mine", "all"):
+        raise HTTPException(status_code=400, detail="Scope harus 'mine' atau 'all'.")
+    if section not in EMBEDDING_KINDS:
+        raise HTTPException(status_code=400, detail=f"Section harus salah satu dari: {', '.join(EMBEDDING_KINDS)}.")
+    if scope == "all":
+        await _require_recruiter(db, user)
+
+    cv = await _get_user_cv(db, upload_id, user)
+    with stage("similar_search"):
+        results = await similar_index.find_similar(
+            db, cv.id, k, None if scope == "all" else user["id"], section
+        )
+    if results is None:
+        raise HTTPException(status_code=409, detail="Embedding CV (atau section ini) belum tersedia. Silakan coba lagi nanti.")
+    return {"upload_id": cv.id, "section": section, "scope": scope, "results": results}
+
+# === Rekomendasi lowongan dari katalog lokal ===
+# Ranking dari index vektor (deterministik, tanpa LLM); explain=true -> Gemini hanya menulis penjelasan.
+# Index di-build terpisah: python -m services.job_index build
+@router.get("/match-jobs/{upload_id}")
+async def match_jobs_for_cv(
+    upload_id: int,
+    request: Request,
+    top_n: int = Query(JOB_MATCH_TOP_N, ge=1, le=50),
+    explain: bool = Query(False),
+    db: AsyncSession = Depends(get_async_db)
+):
+    user = request.session.get("user") if hasattr(request, "session") else None
+    if not user:
+        raise HTTPException(status_code=401, detail="Belum login")
+    if not await run_in_threadpool(job_index.available):
+        raise HTTPException(status_code=503, detail="Katalog lowongan belum tersedia.")
+
+    cv = await _get_user_cv(db, upload_id, user)
+    keywords = cv.get_keywords()
+    if not keywords:
+        raise HTTPException(status_code=400, detail="CV tidak memiliki keyword untuk dicocokkan.")
+
+    try:
+        query_vector = await stored_query_vector(db, cv.id, cv.user_id, keywords)
+        result = await match_jobs(keywords, top_n, query_vector)
+    except WorkerPoolFull:
+        raise HTTPException(status_code=503, detail="Server sedang sibuk, silakan coba lagi nanti.")
+    except JobIndexMismatch as e:
+        print(f"[JOBS] index lowongan tidak cocok dengan model embedding: {e}")
+        raise HTTPException(status_code=503, detail="Katalog lowongan perlu di-build ulang untuk model saat ini.")
+
+    body = {"upload_id": cv.id, **result}
+    if explain and result["matches"]:
+        try:
+            body["explanation"] = await explain_matches(keywords, result["matches"])
+        except LLMUnavailable:
+            raise HTTPException(status_code=503, detail=LLM_UNAVAILABLE_DETAIL)
+    return body
 
 # === Chat lanjutan dengan LLM ===
+# Route chat memakai AsyncSession: query & commit tidak memakai thread dari threadpool
+async def _get_chat_cv(db: AsyncSession, upload_id: int | None, user: dict) -> CVUpload | None:
+    # Ambil CV (jika ada upload_id valid)
+    if not upload_id:
+        return None
+    return await _get_user_cv(db, upload_id, user)
+
+
+# Route dengan upload_id di path: selalu mengembalikan CV milik user, atau 404 / 403
+async def _get_user_cv(db: AsyncSession, upload_id: int, user: dict) -> CVUpload:
+    cv = (await db.execute(select(CVUpload).where(CVUpload.id == upload_id))).scalars().first()
+    if not cv:
+        raise HTTPException(status_code=404, detail="CV tidak ditemukan.")
+    if cv.user_id != user["id"]:
+        raise HTTPException(status_code=403, detail="CV tidak ditemukan atau bukan milik Anda.")
+    return cv
+
 @router.post("/chat")
-async def chat_llm(payload: dict, request: Request = None, db: Session = Depends(get_db)):
+async def chat_llm(payload: dict, request: Request = None, db: AsyncSession = Depends(get_async_db)):
     message = payload.get("message", "")
     upload_id = payload.get("upload_id")  # opsional
 
@@ -177,86 +443,108 @@ async def chat_llm(payload: dict, request: Request = None, db: Session = Depends
 
         # Jika user tidak login, langsung kirim hasil Gemini tanpa simpan ke DB
         if not user:
-            model = genai.GenerativeModel("models/gemini-2.0-flash")
-            response = model.generate_content(message)
-            return {"response": response.text}
-
-        model = genai.GenerativeModel("models/gemini-2.0-flash")
-
-        # Ambil teks CV & keyword (jika ada upload_id valid)
-        cv_text = ""
-        cv = None
-        if upload_id:
-            cv = db.query(CVUpload).filter(
-                CVUpload.id == upload_id,
-                CVUpload.user_id == user["id"]
-            ).first()
-            if not cv:
-                raise HTTPException(status_code=403, detail="CV tidak ditemukan atau bukan milik Anda.")
-            cv_text = cv.extracted_text
-
-        prompt = (
-            f"Berikut ini adalah isi CV dari pengguna:\n\n{cv_text}\n\n"
-            f"Pengguna bertanya:\n{message}\n\n"
-            f"Tugas Anda:\n"
-            f"1. Jawablah pertanyaan berdasarkan isi CV di atas, baik secara langsung maupun implisit (misalnya: skill, pengalaman, minat).\n"
-            f"2. Jika pertanyaannya terkait prospek kerja, industri, atau contoh perusahaan yang cocok dengan profil CV, berikan jawaban yang **spesifik dan aplikatif**.\n"
-            f"3. **Gunakan format Markdown yang rapi**:\n"
-            f"   - Gunakan heading dengan `##` untuk subjudul, dan `###` untuk bagian dalamnya.\n"
-            f"   - Pisahkan **setiap heading** dengan **satu baris kosong di atas dan bawah**.\n"
-            f"   - Gunakan bullet list (`-`) atau numbered list (`1.`) dengan **satu baris kosong sebelum list**.\n"
-            f"   - Gunakan `**bold**` jika ingin menyorot istilah penting atau nama proyek.\n"
-            f"   - Pisahkan paragraf dengan satu baris kosong.\n"
-            f"4. Jika pertanyaan tidak relevan, tolak dengan sopan dan arahkan user kembali ke topik CV atau pekerjaan yang relevan.\n"
-            f"5. Hindari jawaban yang terlalu umum. Buat jawaban terasa personal dan kontekstual.\n"
-        )
+            return {"response": await llm_client.generate(message, "chat")}
 
-        response = model.generate_content(prompt)
-        response_text = response.text
-
-        db.add_all([
-            ChatHistory(
-                user_id=user["id"],
-                cv_upload_id=upload_id,
-                role="user",
-                message=message
-            ),
-            ChatHistory(
-                user_id=user["id"],
-                cv_upload_id=upload_id,
-                role="llm",
-                message=response_text
-            )
-        ])
-        db.commit()
+        # Hanya potongan CV yang relevan + riwayat chat terbaru yang masuk ke prompt
+        with stage("retrieval"):
+            cv = await _get_chat_cv(db, upload_id, user)
+            prompt, prompt_stats = await build_cv_chat_prompt(db, cv, user["id"], message)
+
+        response_text = await llm_client.generate(prompt, "chat")
 
-        return {"response": response_text}
+        await save_chat_turn(db, user["id"], upload_id, message, response_text)
 
+        return {"response": response_text, "prompt_stats": prompt_stats}
+
+    except HTTPException:
+        raise
+    except LLMUnavailable:
+        raise HTTPException(status_code=503, detail=LLM_UNAVAILABLE_DETAIL)
     except Exception as e:
         print("[CHAT ERROR]")
         print(traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"Terjadi kesalahan: {str(e)}")
 
+# === Chat lanjutan (streaming SSE) ===
+# Event: "delta" per potongan teks, "done" berisi jawaban lengkap, "error" jika gagal.
+# Riwayat chat baru disimpan setelah stream selesai; stream yang dibatalkan client tidak menyimpan apa pun.
+@router.post("/chat/stream")
+async def chat_llm_stream(payload: dict, request: Request):
+    message = payload.get("message", "")
+    upload_id = payload.get("upload_id")  # opsional
+
+    if not message.strip():
+        raise HTTPException(status_code=400, detail="Pesan tidak boleh kosong.")
+
+    user = request.session.get("user") if hasattr(request, "session") else None
+
+    # Session dibuat sendiri karena dipakai di dalam generator, setelah handler selesai
+    db = AsyncSessionLocal()
+    prompt, prompt_stats = message, None
+    try:
+        if user:
+            cv = await _get_chat_cv(db, upload_id, user)
+            prompt, prompt_stats = await build_cv_chat_prompt(db, cv, user["id"], message)
+    except Exception:
+        await db.close()
+        raise
+
+    async def event_stream():
+        try:
+            parts = []
+            async with aclosing(llm_client.stream(prompt, "chat_stream")) as chunks:
+                async for text in chunks:
+                    if await request.is_disconnected():
+                        return
+                    parts.append(text)
+                    yield _sse({"text": text}, event="delta")
+
+            response_text = "".join(parts)
+            if user:
+                await save_chat_turn(db, user["id"], upload_id, message, response_text)
+            yield _sse({"response": response_text, "prompt_stats": prompt_stats}, event="done")
+        except LLMUnavailable:
+            yield _sse({"detail": LLM_UNAVAILABLE_DETAIL}, event="error")
+        except Exception as e:
+            print("[CHAT STREAM ERROR]")
+            print(traceback.format_exc())
+            yield _sse({"detail": f"Terjadi kesalahan: {str(e)}"}, event="error")
+        finally:
+            await db.close()
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
 @router.get("/chat-history/{upload_id}")
-def get_chat_history(upload_id: int, request: Request, db: Session = Depends(get_db)):
+async def get_chat_history(
+    upload_id: int,
+    request: Request,
+    limit: int = Query(CHAT_HISTORY_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(None),
+    db: AsyncSession = Depends(get_async_db)
+):
     user = request.session.get("user") if hasattr(request, "session") else None
     if not user:
         raise HTTPException(status_code=401, detail="Belum login")
 
-    chat = db.query(ChatHistory)\
-        .filter(ChatHistory.user_id == user["id"])\
-        .filter(ChatHistory.cv_upload_id == upload_id)\
-        .order_by(ChatHistory.created_at.asc())\
-        .all()
+    # Halaman = `limit` pesan terbaru sebelum cursor; isi halaman tetap dikembalikan urut lama -> baru.
+    # Pesan yang lebih lama: ?cursor=<header X-Next-Cursor>.
+    query = select(ChatHistory.id, ChatHistory.role, ChatHistory.message, ChatHistory.created_at)\
+        .where(ChatHistory.user_id == user["id"], ChatHistory.cv_upload_id == upload_id)
+    if cursor:
+        query = query.where(before_cursor(ChatHistory.created_at, ChatHistory.id, cursor))
+    query = query.order_by(ChatHistory.created_at.desc(), ChatHistory.id.desc()).limit(limit + 1)
+
+    chat, next_cursor = page_of((await db.execute(query)).all(), limit)
 
-    return [
+    body = [
         {
             "role": c.role,
             "message": c.message,
             "created_at": c.created_at.isoformat()
         }
-        for c in chat
+        for c in reversed(chat)
     ]
+    return JSONResponse(body, headers={NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None)
 
 @router.delete("/delete-upload/{upload_id}")
 def delete_upload(upload_id: int, request: Request, db: Session = Depends(get_db)):
@@ -272,16 +560,25 @@ def delete_upload(upload_id: int, request: Request, db: Session = Depends(get_db
     if not cv:
         raise HTTPException(status_code=404, detail="Upload tidak ditemukan atau bukan milik Anda.")
 
-    # Hapus file PDF dari disk
-    try:
-        if os.path.exists(cv.saved_path):
-            os.remove(cv.saved_path)
-    except Exception as e:
-        print(f"[FILE DELETE ERROR] {e}")
+    # Lepas referensi blob; file baru di-purge jika tidak ada upload lain yang memakai isi yang sama
+    file_to_delete = release_blob(db, cv.saved_path)
 
-    # Hapus chat history & record CV
+    # Hapus chat history & record CV (job yang merujuk upload ini dilepas dulu)
+    db.query(CVJob).filter(CVJob.upload_id == upload_id).update({"upload_id": None})
     db.query(ChatHistory).filter(ChatHistory.cv_upload_id == upload_id).delete()
+    db.query(CVChunk).filter(CVChunk.cv_upload_id == upload_id).delete()
+    db.query(CVKeyword).filter(CVKeyword.cv_upload_id == upload_id).delete()
+    db.query(CVEmbedding).filter(CVEmbedding.cv_upload_id == upload_id).delete()
     db.delete(cv)
     db.commit()
+    # Vektor CV ini langsung keluar dari pencarian CV serupa (tanpa menunggu reload berkala)
+    similar_index.evict(upload_id)
+
+    # Hapus file PDF dari disk (setelah commit, dicek ulang di bawah lock row blob)
+    try:
+        if file_to_delete:
+            purge_blob(db, file_to_delete)
+    except Exception as e:
+        print(f"[FILE DELETE ERROR] {e}")
 
     return {"message": f"Upload CV dan histori chat berhasil dihapus."}
\ No newline at end of file
@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from sqlalchemy.orm import Session
+from databases.models import CVAnalysisCache
+from nlp.settings import extraction_fingerprint
+
+# === Konfigurasi Cache ===
+ANALYSIS_CACHE_SIZE = int(os.getenv("ANALYSIS_CACHE_SIZE", "256"))
+
+
+# === Hash isi PDF ===
+def hash_content(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def hash_file(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    h = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# === Cache hasil ekstraksi teks + keyword ===
+# Tier 1: LRU di memori proses; Tier 2: tabel cv_analysis_cache.
+# Fingerprint ikut jadi kunci, jadi ganti model/parameter otomatis membuat entri lama tidak terpakai.
+class AnalysisCache:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.fingerprint = extraction_fingerprint()
+        self._lru: OrderedDict[str, dict] = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    def _remember(self, content_hash: str, analysis: dict):
+        with self._lock:
+            self._lru[content_hash] = analysis
+            self._lru.move_to_end(content_hash)
+            while len(self._lru) > self.maxsize:
+                self._lru.popitem(last=False)
+
+    def get(self, db: Session, content_hash: str) -> dict | None:
+        with self._lock:
+            analysis = self._lru.get(content_hash)
+            if analysis is not None:
+                self._lru.move_to_end(content_hash)
+                self.memory_hits += 1
+                return analysis
+
+        row = db.get(CVAnalysisCache, (content_hash, self.fingerprint))
+        if row is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        analysis = {
+            "raw_text": row.extracted_text,
+            "lang_code": row.lang_code,
+            "keywords": json.loads(row.keywords),
+        }
+        self._remember(content_hash, analysis)
+        with self._lock:
+            self.db_hits += 1
+        return analysis
+
+    def put(self, db: Session, content_hash: str, analysis: dict):
+        self._remember(content_hash, analysis)
+        try:
+            db.merge(CVAnalysisCache(
+                content_hash=content_hash,
+                fingerprint=self.fingerprint,
+                extracted_text=analysis["raw_text"],
+                lang_code=analysis["lang_code"],
+                keywords=json.dumps(analysis["keywords"]),
+            ))
+            db.commit()
+        except Exception as e:
+            # Cache bersifat best-effort, kegagalan simpan tidak boleh menggagalkan upload
+            db.rollback()
+            print(f"[CACHE ERROR] {e}")
+
+    def purge_stale(self, db: Session) -> int:
+        deleted = db.query(CVAnalysisCache)\
+            .filter(CVAnalysisCache.fingerprint != self.fingerprint)\
+            .delete(synchronize_session=False)
+        db.commit()
+        return deleted
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.memory_hits + self.db_hits + self.misses
+            return {
+                "fingerprint": self.fingerprint,
+                "size": len(self._lru),
+                "maxsize": self.maxsize,
+                "memory_hits": self.memory_hits,
+                "db_hits": self.db_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.db_hits) / lookups, 4) if lookups else 0.0,
+            }
+
+
+analysis_cache = AnalysisCache(ANALYSIS_CACHE_SIZE)
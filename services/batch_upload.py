@@ -0,0 +1,162 @@
+import asyncio
+import os
+from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from nlp.tasks import extract_pdf_text, analyze_texts_batch
+from nlp.worker_pool import run_in_pool
+from services.analysis_cache import analysis_cache
+from services.cv_storage import is_pdf
+from services.cv_analysis import ask_gemini, ask_gemini_fallback, save_uploads_bulk
+from services.cv_context import schedule_cv_indexing
+from monitoring.metrics import stage, record_timings
+
+# === Konfigurasi Batch Upload ===
+CV_BATCH_MAX_FILES = int(os.getenv("CV_BATCH_MAX_FILES", "50"))
+# Maksimal panggilan Gemini paralel dalam satu batch
+CV_BATCH_GEMINI_CONCURRENCY = int(os.getenv("CV_BATCH_GEMINI_CONCURRENCY", "4"))
+
+
+def _error(filename: str, message: str) -> dict:
+    return {"filename": filename, "ok": False, "error": message}
+
+
+# === Analisis batch, dengan fallback per file ===
+# Jika panggilan batch gagal (mis. satu teks bermasalah atau pool penuh), tiap CV dianalisis sendiri;
+# hasil per index berisi analisis atau Exception.
+async def _analyze(ready: list[int], raw_texts: dict[int, str], cached: list[dict | None]) -> list:
+    if not ready:
+        return []
+    try:
+        return await run_in_pool(
+            analyze_texts_batch, [raw_texts[i] for i in ready], [cached[i] for i in ready], wait=True
+        )
+    except Exception as e:
+        print(f"[BATCH] analisis batch gagal, diulang per file: {e}")
+    single = await asyncio.gather(
+        *[run_in_pool(analyze_texts_batch, [raw_texts[i]], [cached[i]], wait=True) for i in ready],
+        return_exceptions=True
+    )
+    return [result if isinstance(result, Exception) else result[0] for result in single]
+
+
+# === Simpan batch, dengan fallback per file ===
+# Transaksi gabungan yang gagal di-rollback seluruhnya; tiap CV lalu disimpan di transaksinya sendiri.
+async def _save(db: Session, items: list[tuple], user: dict | None) -> list:
+    try:
+        return await run_in_threadpool(save_uploads_bulk, db, items, user)
+    except Exception as e:
+        print(f"[BATCH] simpan batch gagal, diulang per file: {e}")
+    upload_ids = []
+    for item in items:
+        try:
+            upload_ids.append((await run_in_threadpool(save_uploads_bulk, db, [item], user))[0])
+        except Exception as e:
+            upload_ids.append(e)
+    return upload_ids
+
+
+# === Proses batch CV ===
+# 1. Cache lookup per file (hash isi PDF)
+# 2. Parse PDF yang belum ada di cache secara paralel di worker pool
+# 3. Deteksi bahasa, keyword dan NER untuk semua CV dalam satu panggilan batch (gagal -> per file)
+# 4. Rekomendasi Gemini paralel (dibatasi semaphore)
+# 5. Semua CVUpload/ChatHistory ditulis dalam satu transaksi (gagal -> transaksi per file)
+# Error per file dicatat di hasil file tersebut tanpa menggagalkan file lain.
+# files: (filename, content_type, tmp_path, content_hash, upload_error) hasil stream_upload_to_disk.
+async def process_batch(db: Session, files: list[tuple[str, str, str | None, str | None, str | None]],
+                        user: dict | None) -> list[dict]:
+    results: list[dict | None] = [None] * len(files)
+    tmp_paths = [f[2] for f in files]
+    hashes = [f[3] for f in files]
+    cached: list[dict | None] = [None] * len(files)
+
+    try:
+        for i, (filename, content_type, tmp_path, content_hash, upload_error) in enumerate(files):
+            if upload_error:
+                results[i] = _error(filename, upload_error)
+                continue
+            if content_type != "application/pdf" or not is_pdf(tmp_path):
+                results[i] = _error(filename, "File harus berformat PDF.")
+                continue
+            cached[i] = await run_in_threadpool(analysis_cache.get, db, content_hash)
+
+        # Parse PDF paralel (hanya yang belum ada di cache)
+        pending = [i for i in range(len(files)) if results[i] is None]
+        to_parse = [i for i in pending if cached[i] is None]
+        with stage("pdf"):
+            parsed = await asyncio.gather(
+                *[run_in_pool(extract_pdf_text, tmp_paths[i], wait=True) for i in to_parse],
+                return_exceptions=True
+            )
+        raw_texts = {i: cached[i]["raw_text"] for i in pending if cached[i] is not None}
+        for i, text in zip(to_parse, parsed):
+            if isinstance(text, Exception):
+                results[i] = _error(files[i][0], f"Gagal membaca PDF: {text}")
+            else:
+                raw_texts[i] = text
+
+        # Satu panggilan batch untuk bahasa + keyword + NER
+        ready = [i for i in pending if results[i] is None]
+        with stage("nlp_batch"):
+            analyses = await _analyze(ready, raw_texts, cached)
+        for i, analysis in zip(ready, analyses):
+            if isinstance(analysis, Exception):
+                results[i] = _error(files[i][0], f"Gagal menganalisis CV: {analysis}")
+                continue
+            # Durasi stage dari proses worker (dijumlahkan untuk semua CV dalam batch)
+            record_timings(analysis.pop("timings", None))
+            if cached[i] is None:
+                await run_in_threadpool(analysis_cache.put, db, hashes[i], analysis)
+        analyses = [a for i, a in zip(ready, analyses) if results[i] is None]
+        ready = [i for i in ready if results[i] is None]
+
+        # Rekomendasi Gemini paralel
+        semaphore = asyncio.Semaphore(CV_BATCH_GEMINI_CONCURRENCY)
+
+        async def recommend(analysis: dict) -> str:
+            async with semaphore:
+                if len(analysis["keywords"]) < 5:
+                    return await run_in_threadpool(ask_gemini_fallback)
+                return await run_in_threadpool(ask_gemini, analysis["keywords"])
+
+        responses = await asyncio.gather(*[recommend(a) for a in analyses], return_exceptions=True)
+
+        to_save = []
+        for i, analysis, response in zip(ready, analyses, responses):
+            filename = files[i][0]
+            if isinstance(response, Exception):
+                results[i] = _error(filename, f"Gagal mendapatkan rekomendasi: {response}")
+                continue
+
+            lang = "English" if analysis["lang_code"] == "en" else "Non-English"
+            valid = len(analysis["keywords"]) >= 5
+            results[i] = {
+                "filename": filename,
+                "ok": True,
+                "language": lang,
+                "keywords": analysis["keywords"] if valid else [],
+                "entities": analysis["entities"],
+                "raw_gemini_response": response,
+                "saved": False,
+                "upload_id": None
+            }
+            if valid:
+                to_save.append((i, analysis, response))
+
+        # Simpan semua CV valid dalam satu transaksi
+        if to_save:
+            items = [(tmp_paths[i], hashes[i], files[i][0], analysis, response) for i, analysis, response in to_save]
+            upload_ids = await _save(db, items, user)
+            for (i, analysis, _), upload_id in zip(to_save, upload_ids):
+                if isinstance(upload_id, Exception):
+                    results[i] = _error(files[i][0], f"Gagal menyimpan CV: {upload_id}")
+                    continue
+                results[i]["saved"] = upload_id is not None
+                results[i]["upload_id"] = upload_id
+                schedule_cv_indexing(upload_id, analysis["raw_text"])
+
+        return results
+    finally:
+        for path in tmp_paths:
+            if path is not None and os.path.exists(path):
+                os.remove(path)
@@ -0,0 +1,49 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from databases.models import ChatHistory
+from monitoring.metrics import stage
+
+
+# === Prompt Chat Lanjutan ===
+# cv_text berisi potongan CV yang relevan; history berisi (role, pesan) terbaru, urut lama -> baru.
+def build_chat_prompt(cv_text: str, message: str, history: list[tuple[str, str]] | None = None) -> str:
+    history_text = ""
+    if history:
+        lines = "\n".join(f"- {'Pengguna' if role == 'user' else 'Asisten'}: {msg}" for role, msg in history)
+        history_text = f"Percakapan sebelumnya:\n{lines}\n\n"
+
+    return (
+        f"Berikut ini adalah isi CV dari pengguna:\n\n{cv_text}\n\n"
+        f"{history_text}"
+        f"Pengguna bertanya:\n{message}\n\n"
+        f"Tugas Anda:\n"
+        f"1. Jawablah pertanyaan berdasarkan isi CV di atas, baik secara langsung maupun implisit (misalnya: skill, pengalaman, minat).\n"
+        f"2. Jika pertanyaannya terkait prospek kerja, industri, atau contoh perusahaan yang cocok dengan profil CV, berikan jawaban yang **spesifik dan aplikatif**.\n"
+        f"3. **Gunakan format Markdown yang rapi**:\n"
+        f"   - Gunakan heading dengan `##` untuk subjudul, dan `###` untuk bagian dalamnya.\n"
+        f"   - Pisahkan **setiap heading** dengan **satu baris kosong di atas dan bawah**.\n"
+        f"   - Gunakan bullet list (`-`) atau numbered list (`1.`) dengan **satu baris kosong sebelum list**.\n"
+        f"   - Gunakan `**bold**` jika ingin menyorot istilah penting atau nama proyek.\n"
+        f"   - Pisahkan paragraf dengan satu baris kosong.\n"
+        f"4. Jika pertanyaan tidak relevan, tolak dengan sopan dan arahkan user kembali ke topik CV atau pekerjaan yang relevan.\n"
+        f"5. Hindari jawaban yang terlalu umum. Buat jawaban terasa personal dan kontekstual.\n"
+    )
+
+
+# === Simpan satu giliran chat (pertanyaan + jawaban) dalam satu transaksi ===
+async def save_chat_turn(db: AsyncSession, user_id: int, upload_id: int | None, message: str, response_text: str):
+    db.add_all([
+        ChatHistory(
+            user_id=user_id,
+            cv_upload_id=upload_id,
+            role="user",
+            message=message
+        ),
+        ChatHistory(
+            user_id=user_id,
+            cv_upload_id=upload_id,
+            role="llm",
+            message=response_text
+        )
+    ])
+    with stage("db_commit"):
+        await db.commit()
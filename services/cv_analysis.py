@@ -0,0 +1,253 @@
+import os
+from contextlib import aclosing
+from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from databases.models import CVUpload, ChatHistory
+from nlp.tasks import analyze_cv_file, embed_text
+from nlp.worker_pool import run_in_pool, WorkerPoolFull
+from services.analysis_cache import analysis_cache
+from services.cv_embeddings import keyword_embedding_rows
+from services.cv_storage import store_blob
+from services.keyword_index import keyword_rows
+from services.llm_cache import recommendation_cache, keyword_set_text
+from services.llm_client import llm_client, GEMINI_MODEL_NAME, LLMUnavailable
+from monitoring.metrics import stage, record_timings, tag_language
+
+# Naikkan setiap kali isi prompt rekomendasi diubah (ikut jadi kunci cache)
+RECOMMENDATION_PROMPT_VERSION = "1"
+
+# === Prompt fallback jika CV tidak punya cukup keyword ===
+FALLBACK_PROMPT = (
+    "Balas pengguna dengan **tepat sesuai isi berikut**. Jangan tambahkan atau ubah apapun:\n\n"
+    "Saya mencoba membaca file yang Anda unggah, namun tidak berhasil menemukan informasi khas dari sebuah CV "
+    "seperti pengalaman kerja, pendidikan, atau keahlian. "
+    "Mohon pastikan bahwa file yang Anda unggah memang merupakan CV (Curriculum Vitae) yang valid.\n\n"
+    "Jika Anda membutuhkan bantuan cara membuat CV, saya siap membantu!"
+)
+
+# === Prompt Rekomendasi ===
+def build_recommendation_prompt(keywords: list[str]) -> str:
+    keyword_summary = "\n".join([f"- {kw}" for kw in keywords])
+
+    return (
+        f"Berikut ini adalah ringkasan keterampilan, pengalaman, dan latar belakang pengguna:\n\n"
+        f"{keyword_summary}\n\n"
+        f"Tugas Anda:\n"
+        f"1. Bayangkan Anda adalah seorang career coach profesional.\n"
+        f"2. Rekomendasikan **5 pekerjaan** yang paling sesuai dengan profil pengguna di atas.\n"
+        f"3. Untuk setiap pekerjaan yang Anda rekomendasikan:\n"
+        f"   - Berikan **nama posisi** yang spesifik dan umum dikenal.\n"
+        f"   - Jelaskan **mengapa pengguna cocok** untuk posisi tersebut berdasarkan profil.\n"
+        f"   - **Jangan menyebut kata 'keyword'** dan **hindari mengutip frasa dari daftar di atas secara persis**.\n"
+        f"   - Parafrase informasi agar terdengar alami dan profesional.\n"
+        f"4. **Gunakan format Markdown yang rapi**:\n"
+        f"   - Gunakan heading dengan `##` untuk nama pekerjaan.\n"
+        f"   - Pisahkan **setiap heading** dengan **satu baris kosong di atas dan bawah**.\n"
+        f"   - Gunakan bullet list (`-`) atau numbered list (`1.`) dengan **satu baris kosong sebelum list**.\n"
+        f"   - Gunakan `**bold**` jika ingin menyorot istilah penting atau nama proyek.\n"
+        f"   - Pisahkan paragraf dengan satu baris kosong.\n"
+        f"5. Hindari jawaban yang terlalu umum. Buat jawaban terasa personal dan kontekstual.\n\n"
+        f"Tambahkan kalimat pembuka berikut sebelum daftar pekerjaan:\n"
+        f"`## **Berikut adalah 5 rekomendasi pekerjaan yang paling sesuai dengan profil pengguna, beserta alasannya:**`\n"
+    )
+
+# === Fungsi Gemini ===
+# Kandidat near-duplicate di cache dibatasi ke model + versi prompt yang sama dengan cache_key
+_RECOMMENDATION_SCOPE = (GEMINI_MODEL_NAME, RECOMMENDATION_PROMPT_VERSION)
+
+def ask_gemini(keywords: list[str], keyword_embedding: list[float] | None = None) -> str:
+    cache_key = recommendation_cache.make_key(keywords, GEMINI_MODEL_NAME, RECOMMENDATION_PROMPT_VERSION)
+    cached = recommendation_cache.get(cache_key, keyword_embedding, _RECOMMENDATION_SCOPE)
+    if cached is not None:
+        return cached
+
+    prompt = build_recommendation_prompt(keywords)
+
+    try:
+        text = llm_client.generate_blocking(prompt, "recommendation")
+    except LLMUnavailable:
+        # Breaker terbuka / retry habis: jangan disimpan sebagai jawaban, pemanggil membalas 503
+        raise
+    except Exception as e:
+        return f"Error from Gemini: {str(e)}"
+
+    recommendation_cache.put(cache_key, text, keyword_embedding, _RECOMMENDATION_SCOPE)
+    return text
+
+# === Versi streaming: yield potongan teks saat diterima dari Gemini ===
+# Hasil lengkap baru masuk cache jika stream selesai (bukan dibatalkan client).
+async def ask_gemini_stream(keywords: list[str], keyword_embedding: list[float] | None = None):
+    cache_key = recommendation_cache.make_key(keywords, GEMINI_MODEL_NAME, RECOMMENDATION_PROMPT_VERSION)
+    cached = recommendation_cache.get(cache_key, keyword_embedding, _RECOMMENDATION_SCOPE)
+    if cached is not None:
+        yield cached
+        return
+
+    parts = []
+    async with aclosing(llm_client.stream(build_recommendation_prompt(keywords), "recommendation_stream")) as chunks:
+        async for text in chunks:
+            parts.append(text)
+            yield text
+
+    recommendation_cache.put(cache_key, "".join(parts), keyword_embedding, _RECOMMENDATION_SCOPE)
+
+# === Response untuk CV dengan keyword terlalu sedikit (selalu dari cache setelah panggilan pertama) ===
+def ask_gemini_fallback() -> str:
+    cache_key = recommendation_cache.make_key(["__fallback__"], GEMINI_MODEL_NAME, RECOMMENDATION_PROMPT_VERSION)
+    cached = recommendation_cache.get_pinned(cache_key)
+    if cached is not None:
+        return cached
+
+    text = llm_client.generate_blocking(FALLBACK_PROMPT, "fallback")
+    recommendation_cache.pin(cache_key, text)
+    return text
+
+# === Analisis CV (cache berdasarkan hash isi PDF) ===
+# Cache hit melewati extract_text_from_pdf dan extract_keywords sepenuhnya.
+async def analyze_cv(db: Session, file_path: str, content_hash: str, wait_for_slot: bool = False) -> dict:
+    with stage("cache_lookup"):
+        analysis = await run_in_threadpool(analysis_cache.get, db, content_hash)
+    if analysis is not None:
+        tag_language(analysis["lang_code"])
+        return await _with_keyword_embedding(analysis)
+
+    with stage("worker_pool"):
+        analysis = await run_in_pool(analyze_cv_file, file_path, wait=wait_for_slot)
+    # Durasi stage dari proses worker (lihat nlp/pipeline.py)
+    record_timings(analysis.pop("timings", None))
+    tag_language(analysis["lang_code"])
+
+    await run_in_threadpool(analysis_cache.put, db, content_hash, analysis)
+    return await _with_keyword_embedding(analysis)
+
+
+def analyze_cv_sync(db: Session, file_path: str, content_hash: str) -> dict:
+    analysis = analysis_cache.get(db, content_hash)
+    if analysis is None:
+        analysis = analyze_cv_file(file_path)
+        record_timings(analysis.pop("timings", None))
+        analysis_cache.put(db, content_hash, analysis)
+    if _needs_keyword_embedding(analysis):
+        analysis = {**analysis, "keyword_embedding": embed_text(keyword_set_text(analysis["keywords"]))}
+    return analysis
+
+
+# Embedding keyword set hanya dibutuhkan untuk mode near-duplicate cache rekomendasi
+def _needs_keyword_embedding(analysis: dict) -> bool:
+    return (
+        recommendation_cache.near_duplicate_enabled
+        and len(analysis["keywords"]) >= 5
+        and "keyword_embedding" not in analysis
+    )
+
+
+async def _with_keyword_embedding(analysis: dict) -> dict:
+    if not _needs_keyword_embedding(analysis):
+        return analysis
+    try:
+        embedding = await run_in_pool(embed_text, keyword_set_text(analysis["keywords"]))
+    except WorkerPoolFull:
+        return analysis
+    return {**analysis, "keyword_embedding": embedding}
+
+# === Langkah akhir upload: Gemini + simpan ke DB ===
+# Dipakai oleh endpoint upload (sync) maupun job runner. Fungsi ini blocking,
+# jadi dari handler async panggil lewat threadpool.
+def finalize_upload(analysis: dict, tmp_path: str, content_hash: str, original_filename: str, user: dict | None,
+                    db: Session) -> dict:
+    raw_text = analysis["raw_text"]
+    lang_code = analysis["lang_code"]
+    keywords = analysis["keywords"]
+    lang = "English" if lang_code == "en" else "Non-English"
+
+    # === Jika keyword terlalu sedikit, tetap kirim ke Gemini ===
+    if not keywords or len(keywords) < 5:
+        fallback_response = ask_gemini_fallback()
+
+        os.remove(tmp_path)
+
+        return {
+            "language": lang,
+            "keywords": [],
+            "raw_gemini_response": fallback_response,
+            "saved": False,
+            "upload_id": None
+        }
+
+    raw_response = ask_gemini(keywords, analysis.get("keyword_embedding"))
+    upload_id = save_upload(db, tmp_path, content_hash, original_filename, user, analysis, raw_response)
+
+    return {
+        "language": lang,
+        "keywords": keywords,
+        "raw_gemini_response": raw_response,
+        "saved": upload_id is not None,
+        "upload_id": upload_id
+    }
+
+# === Simpan CV + chat awal (hanya untuk user login) ===
+# CVUpload, ChatHistory dan referensi blob ditulis dalam satu transaksi supaya tidak ada baris setengah jadi.
+def save_upload(db: Session, tmp_path: str, content_hash: str, original_filename: str, user: dict | None,
+                analysis: dict, raw_response: str) -> int | None:
+    return save_uploads_bulk(db, [(tmp_path, content_hash, original_filename, analysis, raw_response)], user)[0]
+
+
+# === Simpan banyak CV sekaligus dalam satu transaksi ===
+# items: (tmp_path, content_hash, original_filename, analysis, raw_response). Mengembalikan upload_id per item.
+# File PDF disimpan content-addressed: CV dengan isi identik berbagi satu blob.
+def save_uploads_bulk(db: Session, items: list[tuple[str, str, str, dict, str]], user: dict | None) -> list[int | None]:
+    if not user:
+        for tmp_path, *_ in items:
+            os.remove(tmp_path)
+        return [None] * len(items)
+
+    try:
+        records = [
+            CVUpload(
+                user_id=user["id"],
+                original_filename=original_filename,
+                saved_path=store_blob(db, tmp_path, content_hash),
+                extracted_text=analysis["raw_text"],
+                keywords=list(analysis["keywords"]),
+            )
+            for tmp_path, content_hash, original_filename, analysis, _ in items
+        ]
+        db.add_all(records)
+        db.flush()
+        db.add_all([
+            row
+            for record, (_, _, _, analysis, _) in zip(records, items)
+            for row in keyword_rows(record.id, user["id"], analysis["keywords"])
+        ])
+        # Vektor query /match-jobs, jika sudah dihitung analyze_cv
+        db.add_all([
+            row
+            for record, (_, _, _, analysis, _) in zip(records, items)
+            for row in keyword_embedding_rows(record.id, user["id"], analysis.get("keyword_embedding"))
+        ])
+        db.add_all([
+            chat
+            for record, (*_, raw_response) in zip(records, items)
+            for chat in (
+                ChatHistory(
+                    user_id=user["id"],
+                    cv_upload_id=record.id,
+                    role="user",
+                    message="Berikut CV saya. Mohon rekomendasi pekerjaan."
+                ),
+                ChatHistory(
+                    user_id=user["id"],
+                    cv_upload_id=record.id,
+                    role="llm",
+                    message=raw_response
+                ),
+            )
+        ])
+        with stage("db_commit"):
+            db.commit()
+    except Exception:
+        # Blob baru yang sudah dipindah tapi tidak ter-commit akan dipakai ulang saat upload berikutnya
+        db.rollback()
+        raise
+
+    return [record.id for record in records]
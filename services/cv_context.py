@@ -0,0 +1,192 @@
+import asyncio
+import os
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from databases.database import AsyncSessionLocal
+from databases.models import CVUpload, CVChunk, ChatHistory
+from nlp.chunking import chunk_text, estimate_tokens
+from nlp.tasks import embed_texts
+from nlp.worker_pool import run_in_pool, WorkerPoolFull
+from services.chat import build_chat_prompt
+from services.cv_embeddings import store_cv_embeddings
+from monitoring.metrics import Histogram
+
+# === Konfigurasi Retrieval Chat ===
+CHAT_CHUNK_CHARS = int(os.getenv("CHAT_CHUNK_CHARS", "800"))
+CHAT_CHUNK_OVERLAP = int(os.getenv("CHAT_CHUNK_OVERLAP", "100"))
+CHAT_TOP_K = int(os.getenv("CHAT_TOP_K", "4"))
+CHAT_HISTORY_MESSAGES = int(os.getenv("CHAT_HISTORY_MESSAGES", "6"))
+# Budget token (estimasi) untuk konteks CV + riwayat chat, di luar instruksi & pertanyaan
+CHAT_CONTEXT_TOKEN_BUDGET = int(os.getenv("CHAT_CONTEXT_TOKEN_BUDGET", "1500"))
+
+_background_tasks: set[asyncio.Task] = set()
+
+# === Metrics ukuran prompt chat ===
+CHAT_PROMPT_TOKENS = Histogram(
+    "matchcv_chat_prompt_tokens", "Estimasi token prompt chat (konteks CV + riwayat + pertanyaan)",
+    buckets=(250, 500, 1000, 1500, 2000, 3000, 5000, 10000),
+)
+CHAT_PROMPT_PARTS = Histogram(
+    "matchcv_chat_prompt_parts", "Jumlah chunk CV / pesan riwayat yang masuk prompt chat", ("part",),
+    buckets=(0, 1, 2, 4, 6, 8, 12, 20),
+)
+
+
+# === Indexing chunk CV (sekali per upload) ===
+# Route & task background memakai AsyncSession; job worker (proses terpisah) memakai versi _sync.
+def _chunk_rows(upload_id: int, chunks: list[str], vectors: np.ndarray) -> list[CVChunk]:
+    return [
+        CVChunk(cv_upload_id=upload_id, chunk_index=i, text=chunk, embedding=vector.tobytes())
+        for i, (chunk, vector) in enumerate(zip(chunks, vectors))
+    ]
+
+
+def _chunk_exists(upload_id: int):
+    return select(CVChunk.id).where(CVChunk.cv_upload_id == upload_id).limit(1)
+
+
+# Insert lewat session sendiri: rollback saat bentrok tidak meng-expire objek (mis. CVUpload)
+# yang sedang dipakai session request
+async def _store_chunks(upload_id: int, chunks: list[str], vectors: np.ndarray) -> bool:
+    async with AsyncSessionLocal() as session:
+        try:
+            session.add_all(_chunk_rows(upload_id, chunks, vectors))
+            await session.commit()
+            return True
+        except IntegrityError:
+            # Sudah di-index oleh request lain
+            await session.rollback()
+            return False
+
+
+async def index_cv_chunks(db: AsyncSession, upload_id: int, text: str):
+    if (await db.execute(_chunk_exists(upload_id))).first() is not None:
+        return
+    chunks = chunk_text(text, CHAT_CHUNK_CHARS, CHAT_CHUNK_OVERLAP)
+    if not chunks:
+        return
+    vectors = await run_in_pool(embed_texts, chunks)
+    await _store_chunks(upload_id, chunks, vectors)
+
+
+def index_cv_chunks_sync(db: Session, upload_id: int, text: str):
+    if db.execute(_chunk_exists(upload_id)).first() is not None:
+        return
+    chunks = chunk_text(text, CHAT_CHUNK_CHARS, CHAT_CHUNK_OVERLAP)
+    if not chunks:
+        return
+    try:
+        db.add_all(_chunk_rows(upload_id, chunks, embed_texts(chunks)))
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+
+
+async def _index_in_background(upload_id: int, text: str):
+    async with AsyncSessionLocal() as db:
+        for index in (index_cv_chunks, store_cv_embeddings):
+            try:
+                await index(db, upload_id, text)
+            except WorkerPoolFull:
+                # Tidak masalah: chunk dibuat saat chat pertama, embedding CV lewat backfill
+                pass
+            except Exception as e:
+                print(f"[CV INDEX ERROR] upload {upload_id}: {e}")
+
+
+def schedule_cv_indexing(upload_id: int | None, text: str):
+    if not upload_id:
+        return
+    task = asyncio.create_task(_index_in_background(upload_id, text))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+# === Retrieval ===
+async def _load_chunks(db: AsyncSession, upload_id: int) -> list[CVChunk]:
+    result = await db.execute(
+        select(CVChunk)
+        .where(CVChunk.cv_upload_id == upload_id)
+        .order_by(CVChunk.chunk_index.asc())
+    )
+    return list(result.scalars().all())
+
+
+async def _load_recent_history(db: AsyncSession, user_id: int, upload_id: int, limit: int) -> list[tuple[str, str]]:
+    result = await db.execute(
+        select(ChatHistory.role, ChatHistory.message)
+        .where(ChatHistory.user_id == user_id, ChatHistory.cv_upload_id == upload_id)
+        .order_by(ChatHistory.created_at.desc(), ChatHistory.id.desc())
+        .limit(limit)
+    )
+    return [(r.role, r.message) for r in reversed(result.all())]
+
+
+async def _rank_chunks(chunks: list[CVChunk], question: str) -> list[CVChunk]:
+    try:
+        query = (await run_in_pool(embed_texts, [question]))[0]
+    except WorkerPoolFull:
+        # Pool penuh: pakai urutan dokumen apa adanya
+        return chunks
+    matrix = np.stack([np.frombuffer(c.embedding, dtype=np.float32) for c in chunks])
+    scores = matrix @ query
+    order = np.argsort(-scores)
+    return [chunks[i] for i in order]
+
+
+def _fit_budget(texts: list[str], budget: int) -> tuple[list[str], int]:
+    selected, used = [], 0
+    for text in texts:
+        cost = estimate_tokens(text)
+        if used + cost > budget:
+            break
+        selected.append(text)
+        used += cost
+    return selected, used
+
+
+# === Bangun prompt chat: top-k chunk relevan + riwayat terbaru dalam batas budget ===
+async def build_cv_chat_prompt(db: AsyncSession, cv: CVUpload | None, user_id: int, message: str) -> tuple[str, dict]:
+    budget = CHAT_CONTEXT_TOKEN_BUDGET
+    context_chunks: list[str] = []
+    history: list[tuple[str, str]] = []
+
+    if cv is not None:
+        upload_id, cv_text = cv.id, cv.extracted_text
+        try:
+            await index_cv_chunks(db, upload_id, cv_text)
+        except WorkerPoolFull:
+            pass
+        chunks = await _load_chunks(db, upload_id)
+        if chunks:
+            ranked = [(c.chunk_index, c.text) for c in await _rank_chunks(chunks, message)]
+        else:
+            # Belum ter-index (pool penuh): pakai awal CV sesuai urutan dokumen
+            ranked = list(enumerate(chunk_text(cv_text, CHAT_CHUNK_CHARS, CHAT_CHUNK_OVERLAP)))
+
+        top = ranked[:CHAT_TOP_K]
+        selected, used = _fit_budget([text for _, text in top], budget)
+        # Kembalikan ke urutan asli dokumen supaya konteks tetap runtut
+        context_chunks = [text for _, text in sorted(top[:len(selected)])]
+        budget -= used
+
+        # Prioritaskan pesan paling baru jika budget tidak cukup
+        recent = await _load_recent_history(db, user_id, upload_id, CHAT_HISTORY_MESSAGES)
+        newest_first = recent[::-1]
+        kept, _ = _fit_budget([f"{role}: {msg}" for role, msg in newest_first], budget)
+        history = newest_first[:len(kept)][::-1]
+
+    prompt = build_chat_prompt("\n\n[...]\n\n".join(context_chunks), message, history)
+    stats = {
+        "prompt_chars": len(prompt),
+        "estimated_tokens": estimate_tokens(prompt),
+        "cv_chunks": len(context_chunks),
+        "history_messages": len(history),
+    }
+    CHAT_PROMPT_TOKENS.observe(stats["estimated_tokens"])
+    CHAT_PROMPT_PARTS.observe(stats["cv_chunks"], part="cv_chunks")
+    CHAT_PROMPT_PARTS.observe(stats["history_messages"], part="history_messages")
+    return prompt, stats
@@ -0,0 +1,383 @@
+import asyncio
+import os
+import threading
+import time
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, delete, exists
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from databases.database import AsyncSessionLocal
+from databases.models import CVUpload, CVEmbedding
+from nlp.chunking import chunk_text
+from nlp.sections import SECTION_HEADERS, extract_sections
+from nlp.settings import EMBEDDING_MODEL_NAME
+from nlp.tasks import embed_texts
+from nlp.worker_pool import run_in_pool
+
+# === Embedding CV tersimpan (tabel cv_embeddings) ===
+# Dihitung sekali setelah upload (task background / job worker) atau lewat backfill,
+# sehingga pencarian CV serupa tidak menjalankan model di jalur request.
+CV_EMBED_SECTIONS = os.getenv("CV_EMBED_SECTIONS", "1") == "1"
+# Model embedding memotong input di 128 token: teks dokumen/section dipotong per chunk (~1 jendela model),
+# vektornya = rata-rata embedding chunk (dinormalisasi ulang), supaya seluruh CV ikut terwakili
+CV_EMBED_CHUNK_CHARS = int(os.getenv("CV_EMBED_CHUNK_CHARS", "400"))
+CV_EMBED_CHUNK_OVERLAP = 50
+# Batas chunk per teks (CV sangat panjang): biaya encode tetap terbatas
+CV_EMBED_MAX_CHUNKS = int(os.getenv("CV_EMBED_MAX_CHUNKS", "32"))
+# Kolom model untuk vektor dokumen/section: model + cara pooling. Vektor lama (satu potongan 128 token)
+# tidak cocok lagi sehingga dihitung ulang oleh backfill
+CV_EMBEDDING_MODEL = f"{EMBEDDING_MODEL_NAME}#mean-chunks-{CV_EMBED_CHUNK_CHARS}"
+# Index in-memory dibangun ulang penuh secara berkala (memadatkan baris CV yang sudah dihapus)
+SIMILAR_INDEX_RELOAD_SECONDS = float(os.getenv("SIMILAR_INDEX_RELOAD_SECONDS", "3600"))
+SIMILAR_LOAD_BATCH_SIZE = 5000
+# Ambil kandidat lebih banyak dari k: CV yang sudah dihapus dibuang saat hydrate
+SIMILAR_OVERFETCH = 10
+DOCUMENT_KIND = "document"
+EMBEDDING_KINDS = (DOCUMENT_KIND, *SECTION_HEADERS)
+# Embedding keyword set (keyword_set_text), vektor query /match-jobs; bukan bagian pencarian CV serupa
+KEYWORDS_KIND = "keywords"
+
+
+# kind -> chunk teks; kind tanpa teks tidak disertakan (CV kosong: tanpa "document")
+def embedding_texts(text: str) -> dict[str, list[str]]:
+    normalized = " ".join(text.split())
+    texts = {DOCUMENT_KIND: normalized}
+    if CV_EMBED_SECTIONS:
+        texts.update({name: body for name, body in extract_sections(normalized).items() if body})
+    chunks = {kind: chunk_text(body, CV_EMBED_CHUNK_CHARS, CV_EMBED_CHUNK_OVERLAP)[:CV_EMBED_MAX_CHUNKS]
+              for kind, body in texts.items()}
+    return {kind: parts for kind, parts in chunks.items() if parts}
+
+
+def flat_chunks(texts: dict[str, list[str]]) -> list[str]:
+    return [chunk for parts in texts.values() for chunk in parts]
+
+
+# vectors: hasil embed_texts(flat_chunks(texts)); satu vektor (rata-rata chunk) per kind
+def pooled_vectors(texts: dict[str, list[str]], vectors: np.ndarray) -> list[np.ndarray]:
+    pooled, offset = [], 0
+    for parts in texts.values():
+        mean = np.asarray(vectors[offset:offset + len(parts)], dtype=np.float32).mean(axis=0)
+        offset += len(parts)
+        pooled.append(mean / (np.linalg.norm(mean) or 1.0))
+    return pooled
+
+
+def embedding_rows(upload_id: int, user_id: int | None, kinds: list[str], vectors,
+                   model: str = CV_EMBEDDING_MODEL) -> list[CVEmbedding]:
+    return [
+        CVEmbedding(
+            cv_upload_id=upload_id, user_id=user_id, kind=kind, model=model,
+            embedding=np.asarray(vector, dtype=np.float32).tobytes()
+        )
+        for kind, vector in zip(kinds, vectors)
+    ]
+
+
+def _has_embedding(upload_id: int):
+    return select(CVEmbedding.id).where(
+        CVEmbedding.cv_upload_id == upload_id,
+        CVEmbedding.kind == DOCUMENT_KIND,
+        CVEmbedding.model == CV_EMBEDDING_MODEL
+    ).limit(1)
+
+
+# Vektor dari model lama (jika ada) diganti; embedding keyword set disimpan terpisah saat upload
+def _delete_embeddings(upload_ids: list[int]):
+    return delete(CVEmbedding).where(CVEmbedding.cv_upload_id.in_(upload_ids), CVEmbedding.kind.in_(EMBEDDING_KINDS))
+
+
+async def store_cv_embeddings(db: AsyncSession, upload_id: int, text: str):
+    if (await db.execute(_has_embedding(upload_id))).first() is not None:
+        return
+    texts = embedding_texts(text)
+    if DOCUMENT_KIND not in texts:
+        return
+    user_id = (await db.execute(select(CVUpload.user_id).where(CVUpload.id == upload_id))).scalar()
+    vectors = await run_in_pool(embed_texts, flat_chunks(texts))
+    try:
+        await db.execute(_delete_embeddings([upload_id]))
+        db.add_all(embedding_rows(upload_id, user_id, list(texts), pooled_vectors(texts, vectors)))
+        await db.commit()
+    except IntegrityError:
+        # Sudah disimpan oleh request lain
+        await db.rollback()
+
+
+def store_cv_embeddings_sync(db: Session, upload_id: int, text: str):
+    if db.execute(_has_embedding(upload_id)).first() is not None:
+        return
+    texts = embedding_texts(text)
+    if DOCUMENT_KIND not in texts:
+        return
+    user_id = db.execute(select(CVUpload.user_id).where(CVUpload.id == upload_id)).scalar()
+    vectors = pooled_vectors(texts, embed_texts(flat_chunks(texts)))
+    try:
+        db.execute(_delete_embeddings([upload_id]))
+        db.add_all(embedding_rows(upload_id, user_id, list(texts), vectors))
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+
+
+# === Embedding keyword set ===
+# Ditulis bersama CVUpload jika analyze_cv sudah menghitungnya (mode near-duplicate cache rekomendasi);
+# selain itu dihitung sekali saat /match-jobs pertama lalu disimpan.
+def keyword_embedding_rows(upload_id: int, user_id: int | None, vector) -> list[CVEmbedding]:
+    if vector is None:
+        return []
+    return embedding_rows(upload_id, user_id, [KEYWORDS_KIND], [vector], model=EMBEDDING_MODEL_NAME)
+
+
+async def load_keyword_embedding(db: AsyncSession, upload_id: int) -> np.ndarray | None:
+    stored = (await db.execute(select(CVEmbedding.embedding).where(
+        CVEmbedding.cv_upload_id == upload_id,
+        CVEmbedding.kind == KEYWORDS_KIND,
+        CVEmbedding.model == EMBEDDING_MODEL_NAME
+    ))).scalar()
+    return None if stored is None else np.frombuffer(stored, dtype=np.float32)
+
+
+# Session sendiri: rollback saat bentrok tidak meng-expire objek session request
+async def store_keyword_embedding(upload_id: int, user_id: int | None, vector):
+    async with AsyncSessionLocal() as session:
+        try:
+            await session.execute(delete(CVEmbedding).where(
+                CVEmbedding.cv_upload_id == upload_id, CVEmbedding.kind == KEYWORDS_KIND
+            ))
+            session.add_all(keyword_embedding_rows(upload_id, user_id, vector))
+            await session.commit()
+        except IntegrityError:
+            # Sudah disimpan oleh request lain
+            await session.rollback()
+
+
+# === Backfill CV lama (bertahap, bisa dihentikan & dilanjutkan) ===
+# Jalankan: python -m services.cv_embeddings [batch_size]
+# Satu batch CV = satu panggilan encode untuk semua chunk dokumen + section.
+def backfill(db: Session, batch_size: int = 32) -> int:
+    done = exists().where(
+        CVEmbedding.cv_upload_id == CVUpload.id,
+        CVEmbedding.kind == DOCUMENT_KIND,
+        CVEmbedding.model == CV_EMBEDDING_MODEL
+    )
+    last_id, total = 0, 0
+    while True:
+        rows = db.execute(
+            select(CVUpload.id, CVUpload.user_id, CVUpload.extracted_text)
+            .where(CVUpload.id > last_id, ~done)
+            .order_by(CVUpload.id.asc())
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return total
+
+        per_cv = [embedding_texts(row.extracted_text or "") for row in rows]
+        flat = [chunk for texts in per_cv if DOCUMENT_KIND in texts for chunk in flat_chunks(texts)]
+        vectors = embed_texts(flat) if flat else []
+
+        db.execute(_delete_embeddings([row.id for row in rows]))
+        offset = 0
+        for row, texts in zip(rows, per_cv):
+            if DOCUMENT_KIND not in texts:
+                continue
+            count = len(flat_chunks(texts))
+            db.add_all(embedding_rows(row.id, row.user_id, list(texts),
+                                      pooled_vectors(texts, vectors[offset:offset + count])))
+            offset += count
+        db.commit()
+        last_id = rows[-1].id
+        total += len(rows)
+        print(f"[CV EMBEDDING] {total} CV di-embed (id terakhir {last_id})")
+
+
+# === Pencarian CV serupa: matriks NumPy per kind, dimuat inkremental dari cv_embeddings ===
+# Pencarian (di threadpool) hanya membaca snapshot: view [:size] yang tidak pernah ditulis lagi.
+# Baris baru ditulis di luar size snapshot; update baris lama (copy-on-write) dan _grow memakai array baru.
+class _Snapshot:
+    def __init__(self, vectors: np.ndarray, upload_ids: np.ndarray, user_ids: np.ndarray):
+        self.vectors = vectors
+        self.upload_ids = upload_ids
+        self.user_ids = user_ids
+
+    def search(self, query: np.ndarray, k: int, user_id: int | None = None,
+               exclude: int | None = None) -> list[tuple[int, float]]:
+        size = len(self.upload_ids)
+        if not size:
+            return []
+        scores = self.vectors @ query
+        # Baris CV yang sudah dihapus (upload_id -1)
+        scores[self.upload_ids < 0] = -np.inf
+        if user_id is not None:
+            scores[self.user_ids != user_id] = -np.inf
+        if exclude is not None:
+            scores[self.upload_ids == exclude] = -np.inf
+
+        k = min(k, size)
+        top = np.argpartition(-scores, k - 1)[:k] if k < size else np.arange(size)
+        top = top[np.argsort(-scores[top])]
+        return [(int(self.upload_ids[i]), round(float(scores[i]), 4)) for i in top if np.isfinite(scores[i])]
+
+
+class _EmbeddingMatrix:
+    def __init__(self):
+        self.vectors: np.ndarray | None = None
+        self.upload_ids = np.empty(0, dtype=np.int64)
+        self.user_ids = np.empty(0, dtype=np.int64)
+        self.positions: dict[int, int] = {}
+        self.size = 0
+        self.last_id = 0
+        self.loaded_at = time.monotonic()
+        # True selama array sekarang masih dibaca lewat snapshot
+        self._shared = False
+
+    def _grow(self, dim: int, capacity: int):
+        vectors = np.zeros((capacity, dim), dtype=np.float32)
+        upload_ids = np.zeros(capacity, dtype=np.int64)
+        user_ids = np.full(capacity, -1, dtype=np.int64)
+        if self.vectors is not None:
+            vectors[:self.size] = self.vectors[:self.size]
+            upload_ids[:self.size] = self.upload_ids[:self.size]
+            user_ids[:self.size] = self.user_ids[:self.size]
+        self.vectors, self.upload_ids, self.user_ids = vectors, upload_ids, user_ids
+        self._shared = False
+
+    def add(self, upload_id: int, user_id: int | None, vector: np.ndarray):
+        pos = self.positions.get(upload_id)
+        if pos is None:
+            if self.vectors is None or self.size == len(self.vectors):
+                self._grow(len(vector), max(1024, 2 * self.size))
+            pos = self.size
+            self.positions[upload_id] = pos
+            self.size += 1
+        elif self._shared:
+            # Baris ini terlihat oleh snapshot yang mungkin sedang dipakai mencari
+            self._grow(len(vector), len(self.vectors))
+        self.vectors[pos] = vector
+        self.upload_ids[pos] = upload_id
+        self.user_ids[pos] = user_id if user_id is not None else -1
+
+    def remove(self, upload_id: int):
+        pos = self.positions.pop(upload_id, None)
+        if pos is None:
+            return
+        if self._shared:
+            self._grow(self.vectors.shape[1], len(self.vectors))
+        self.vectors[pos] = 0
+        self.upload_ids[pos] = -1
+        self.user_ids[pos] = -1
+
+    def snapshot(self) -> _Snapshot:
+        self._shared = True
+        if self.vectors is None:
+            return _Snapshot(np.empty((0, 0), dtype=np.float32), self.upload_ids[:0], self.user_ids[:0])
+        return _Snapshot(self.vectors[:self.size], self.upload_ids[:self.size], self.user_ids[:self.size])
+
+
+class SimilarCVIndex:
+    def __init__(self):
+        self._lock = asyncio.Lock()
+        self._matrices: dict[str, _EmbeddingMatrix] = {}
+        self.searches = 0
+        # CV yang dihapus (delete_upload, route sync): dibuang dari semua matriks saat refresh berikutnya
+        self._evicted: set[int] = set()
+        self._evicted_lock = threading.Lock()
+
+    def evict(self, upload_id: int):
+        with self._evicted_lock:
+            self._evicted.add(upload_id)
+
+    async def refresh(self, db: AsyncSession, kind: str) -> _Snapshot:
+        async with self._lock:
+            with self._evicted_lock:
+                evicted, self._evicted = self._evicted, set()
+            for upload_id in evicted:
+                for loaded in self._matrices.values():
+                    loaded.remove(upload_id)
+            matrix = self._matrices.get(kind)
+            if matrix is None or time.monotonic() - matrix.loaded_at > SIMILAR_INDEX_RELOAD_SECONDS:
+                matrix = _EmbeddingMatrix()
+            while True:
+                rows = (await db.execute(
+                    select(CVEmbedding.id, CVEmbedding.cv_upload_id, CVEmbedding.user_id, CVEmbedding.embedding)
+                    .where(
+                        CVEmbedding.kind == kind,
+                        CVEmbedding.model == CV_EMBEDDING_MODEL,
+                        CVEmbedding.id > matrix.last_id
+                    )
+                    .order_by(CVEmbedding.id.asc())
+                    .limit(SIMILAR_LOAD_BATCH_SIZE)
+                )).all()
+                for row in rows:
+                    matrix.add(row.cv_upload_id, row.user_id, np.frombuffer(row.embedding, dtype=np.float32))
+                if rows:
+                    matrix.last_id = rows[-1].id
+                if len(rows) < SIMILAR_LOAD_BATCH_SIZE:
+                    break
+            self._matrices[kind] = matrix
+            return matrix.snapshot()
+
+    # None = CV sumber belum punya embedding (tunggu task background / jalankan backfill)
+    async def find_similar(self, db: AsyncSession, upload_id: int, k: int, user_id: int | None = None,
+                           kind: str = DOCUMENT_KIND) -> list[dict] | None:
+        source = (await db.execute(select(CVEmbedding.embedding).where(
+            CVEmbedding.cv_upload_id == upload_id,
+            CVEmbedding.kind == kind,
+            CVEmbedding.model == CV_EMBEDDING_MODEL
+        ))).scalar()
+        if source is None:
+            return None
+
+        snapshot = await self.refresh(db, kind)
+        self.searches += 1
+        query = np.frombuffer(source, dtype=np.float32)
+        hits = await run_in_threadpool(snapshot.search, query, k + SIMILAR_OVERFETCH, user_id, upload_id)
+        if not hits:
+            return []
+
+        uploads = {
+            row.id: row for row in (await db.execute(
+                select(CVUpload.id, CVUpload.user_id, CVUpload.original_filename, CVUpload.created_at)
+                .where(CVUpload.id.in_([upload for upload, _ in hits]))
+            )).all()
+        }
+        results = []
+        for upload, score in hits:
+            row = uploads.get(upload)
+            if row is None:
+                continue
+            results.append({
+                "upload_id": row.id,
+                "user_id": row.user_id,
+                "original_filename": row.original_filename,
+                "created_at": row.created_at.isoformat(),
+                "score": score,
+            })
+            if len(results) == k:
+                break
+        return results
+
+    def stats(self) -> dict:
+        return {
+            "searches": self.searches,
+            "kinds": {kind: len(m.positions) for kind, m in self._matrices.items()},
+        }
+
+
+similar_index = SimilarCVIndex()
+
+
+if __name__ == "__main__":
+    import sys
+    from databases.database import SessionLocal, engine
+    from databases.schema import ensure_schema
+
+    ensure_schema(engine)
+    session = SessionLocal()
+    try:
+        size = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+        print(f"[CV EMBEDDING] selesai: {backfill(session, size)} CV")
+    finally:
+        session.close()
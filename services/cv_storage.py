@@ -0,0 +1,137 @@
+import hashlib
+import os
+import shutil
+import uuid
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from databases.models import CVBlob
+
+# === Konfigurasi Penyimpanan CV ===
+CV_STORAGE_DIR = os.getenv("CV_STORAGE_DIR", "cv_uploads")
+CV_MAX_UPLOAD_BYTES = int(os.getenv("CV_MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+# === Stream upload ke disk sambil di-hash ===
+# File ditulis per chunk (tanpa menampung seluruh isi di memori) ke folder sementara di
+# dalam CV_STORAGE_DIR, supaya bisa dipindah ke blob dengan os.replace (tanpa copy kedua).
+async def stream_upload_to_disk(file: UploadFile, target_dir: str | None = None,
+                                max_bytes: int = CV_MAX_UPLOAD_BYTES) -> tuple[str, str, int]:
+    target_dir = target_dir or os.path.join(CV_STORAGE_DIR, ".tmp")
+    os.makedirs(target_dir, exist_ok=True)
+    path = os.path.join(target_dir, f"{uuid.uuid4()}.pdf")
+
+    h = hashlib.sha256()
+    size = 0
+    try:
+        with open(path, "wb") as out:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"Ukuran file melebihi batas {max_bytes // (1024 * 1024)} MB.")
+                # Hash + tulis di threadpool: I/O disk tidak memblokir event loop
+                await run_in_threadpool(_write_chunk, out, h, chunk)
+    except BaseException:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+
+    return path, h.hexdigest(), size
+
+
+def _write_chunk(out, h, chunk: bytes):
+    h.update(chunk)
+    out.write(chunk)
+
+
+def is_pdf(path: str) -> bool:
+    with open(path, "rb") as f:
+        return f.read(4) == b"%PDF"
+
+
+def _blob_path(content_hash: str) -> str:
+    return os.path.join(CV_STORAGE_DIR, content_hash[:2], f"{content_hash}.pdf")
+
+
+# === Simpan blob (dedup + reference counting) ===
+# Dipanggil di dalam transaksi yang sama dengan insert CVUpload; commit dilakukan pemanggil.
+# File sementara dipindah (atau dihapus jika isinya sudah pernah disimpan).
+# Row blob dengan ref_count 0 (menunggu purge_blob) dipakai ulang: update ref_count menunggu lock row
+# yang dipegang purge_blob, jadi file tidak bisa dihapus setelah blob dipakai lagi.
+def store_blob(db: Session, tmp_path: str, content_hash: str) -> str:
+    path = _blob_path(content_hash)
+    updated = db.query(CVBlob)\
+        .filter(CVBlob.content_hash == content_hash)\
+        .update({CVBlob.ref_count: CVBlob.ref_count + 1}, synchronize_session=False)
+
+    if not updated:
+        # tmp_path sudah dipindah = percobaan ulang setelah rollback (batch disimpan per file):
+        # file blob dari percobaan sebelumnya (isi sama) dipasang ulang lewat jalur yang sama
+        source = tmp_path if os.path.exists(tmp_path) else path
+        try:
+            with db.begin_nested():
+                db.add(CVBlob(content_hash=content_hash, path=path, size=os.path.getsize(source), ref_count=1))
+        except IntegrityError:
+            # Blob yang sama baru saja dibuat request lain
+            db.query(CVBlob)\
+                .filter(CVBlob.content_hash == content_hash)\
+                .update({CVBlob.ref_count: CVBlob.ref_count + 1}, synchronize_session=False)
+        else:
+            # Row dibuat transaksi ini: file selalu ditulis ulang, walaupun file lama masih ada
+            _place_file(source, path)
+            return path
+
+    blob_path = db.query(CVBlob.path).filter(CVBlob.content_hash == content_hash).scalar()
+    if not os.path.exists(blob_path):
+        # File hilang (mis. purge yang gagal commit setelah unlink): isi yang sama dipulihkan dari upload ini
+        _place_file(tmp_path, blob_path)
+    elif os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    return blob_path
+
+
+# shutil.move = rename jika satu filesystem, copy jika beda (mis. CV_JOB_DIR di volume lain);
+# os.replace terakhir membuat file muncul utuh di path blob
+def _place_file(tmp_path: str, path: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    staged = f"{path}.{uuid.uuid4().hex}.tmp"
+    shutil.move(tmp_path, staged)
+    os.replace(staged, path)
+
+
+# === Lepas referensi blob saat upload dihapus ===
+# Mengembalikan path file yang perlu di-purge setelah commit (None jika masih dipakai upload lain).
+# Row blob tidak dihapus di sini (ref_count 0); purge_blob yang memutuskan di transaksi terpisah.
+def release_blob(db: Session, saved_path: str) -> str | None:
+    blob = db.query(CVBlob).filter(CVBlob.path == saved_path).with_for_update().first()
+    if blob is None:
+        # Upload lama (sebelum content-addressed storage): file milik upload ini sendiri
+        return saved_path
+
+    blob.ref_count = max(blob.ref_count - 1, 0)
+    return saved_path if blob.ref_count == 0 else None
+
+
+# === Hapus file blob yang tidak dipakai lagi ===
+# Dicek ulang di bawah lock row: jika store_blob sudah memakai blob ini lagi, file dibiarkan.
+def purge_blob(db: Session, path: str) -> bool:
+    try:
+        blob = db.query(CVBlob).filter(CVBlob.path == path).with_for_update().first()
+        if blob is not None and blob.ref_count > 0:
+            db.commit()
+            return False
+        if blob is not None:
+            db.delete(blob)
+        if os.path.exists(path):
+            os.remove(path)
+        db.commit()
+        return True
+    except Exception:
+        db.rollback()
+        raise
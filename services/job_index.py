@@ -0,0 +1,218 @@
+import csv
+import json
+import os
+import threading
+import time
+import numpy as np
+from nlp.settings import EMBEDDING_MODEL_NAME, EMBEDDING_BACKEND
+
+# === Konfigurasi Katalog Lowongan ===
+# Sumber katalog: file (JSONL / CSV) atau tabel job_postings
+JOB_CATALOG_SOURCE = os.getenv("JOB_CATALOG_SOURCE", "file")  # file | table
+JOB_CATALOG_PATH = os.getenv("JOB_CATALOG_PATH", "data/jobs.jsonl")
+# Hasil build: matriks float32 (memmap), metadata lowongan, dan index ANN opsional
+JOB_INDEX_DIR = os.getenv("JOB_INDEX_DIR", "data/job_index")
+# none = brute force (matriks @ vektor, cukup untuk puluhan ribu lowongan); hnsw = hnswlib (opsional)
+JOB_INDEX_ANN = os.getenv("JOB_INDEX_ANN", "none")
+# ef HNSW saat query (harus >= top_n); makin besar makin akurat tapi makin lambat
+JOB_INDEX_ANN_EF = int(os.getenv("JOB_INDEX_ANN_EF", "200"))
+JOB_INDEX_BATCH_SIZE = 64
+JOB_DESCRIPTION_CHARS = 1000
+
+_MATRIX_FILE = "embeddings.f32"
+_JOBS_FILE = "jobs.json"
+_META_FILE = "meta.json"
+_ANN_FILE = "index.hnsw"
+
+
+# === Baca katalog ===
+def _split_skills(value) -> list[str]:
+    if isinstance(value, list):
+        return [str(s).strip() for s in value if str(s).strip()]
+    return [s.strip() for s in str(value or "").split(",") if s.strip()]
+
+
+def _normalize_job(row: dict, index: int) -> dict:
+    return {
+        "id": str(row.get("id") or index),
+        "title": (row.get("title") or "").strip(),
+        "company": (row.get("company") or "").strip(),
+        "location": (row.get("location") or "").strip(),
+        "url": (row.get("url") or "").strip(),
+        "skills": _split_skills(row.get("skills")),
+        "description": (row.get("description") or "").strip(),
+    }
+
+
+def load_catalog_file(path: str = JOB_CATALOG_PATH) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+    return [_normalize_job(row, i) for i, row in enumerate(rows)]
+
+
+def load_catalog_table() -> list[dict]:
+    from databases.database import SessionLocal
+    from databases.models import JobPosting
+
+    db = SessionLocal()
+    try:
+        postings = db.query(JobPosting).filter(JobPosting.active == 1).order_by(JobPosting.id.asc()).all()
+        return [_normalize_job({
+            "id": p.id, "title": p.title, "company": p.company, "location": p.location,
+            "url": p.url, "skills": p.skills or [], "description": p.description,
+        }, p.id) for p in postings]
+    finally:
+        db.close()
+
+
+def job_text(job: dict) -> str:
+    # Teks yang di-embed: judul + skill + awal deskripsi
+    parts = [job["title"], ", ".join(job["skills"]), job["description"][:JOB_DESCRIPTION_CHARS]]
+    return ". ".join(p for p in parts if p)
+
+
+# === Build index (CLI / job offline, butuh model embedding) ===
+# Jalankan: python -m services.job_index build
+def build_index(jobs: list[dict], index_dir: str = JOB_INDEX_DIR, ann: str = JOB_INDEX_ANN) -> dict:
+    from nlp.model_loader import get_embedding_model
+
+    start = time.perf_counter()
+    os.makedirs(index_dir, exist_ok=True)
+    model = get_embedding_model()
+    vectors = model.encode([job_text(j) for j in jobs], batch_size=JOB_INDEX_BATCH_SIZE,
+                           normalize_embeddings=True).astype(np.float32)
+    vectors = np.ascontiguousarray(vectors.reshape(len(jobs), -1))
+
+    # Tulis ke file sementara lalu rename supaya proses web tidak membaca index setengah jadi
+    tmp_matrix = os.path.join(index_dir, _MATRIX_FILE + ".tmp")
+    vectors.tofile(tmp_matrix)
+    with open(os.path.join(index_dir, _JOBS_FILE + ".tmp"), "w", encoding="utf-8") as f:
+        json.dump(jobs, f, ensure_ascii=False)
+
+    if ann == "hnsw" and len(jobs):
+        import hnswlib
+        ann_index = hnswlib.Index(space="ip", dim=vectors.shape[1])
+        ann_index.init_index(max_elements=len(jobs), ef_construction=200, M=16)
+        ann_index.add_items(vectors, np.arange(len(jobs)))
+        ann_index.save_index(os.path.join(index_dir, _ANN_FILE + ".tmp"))
+
+    meta = {
+        "count": len(jobs),
+        "dim": int(vectors.shape[1]) if len(jobs) else 0,
+        "model": EMBEDDING_MODEL_NAME,
+        "backend": EMBEDDING_BACKEND,
+        "ann": ann if len(jobs) else "none",
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "build_seconds": round(time.perf_counter() - start, 3),
+    }
+    with open(os.path.join(index_dir, _META_FILE + ".tmp"), "w") as f:
+        json.dump(meta, f)
+
+    for name in (_MATRIX_FILE, _JOBS_FILE, _ANN_FILE, _META_FILE):
+        tmp = os.path.join(index_dir, name + ".tmp")
+        if os.path.exists(tmp):
+            os.replace(tmp, os.path.join(index_dir, name))
+    return meta
+
+
+# Index di-build dengan model embedding lain (atau dimensi berbeda) dari vektor query
+class JobIndexMismatch(Exception):
+    pass
+
+
+# === Index untuk serving (proses web; tidak memuat model) ===
+# Matriks dibaca lewat np.memmap: halaman file di-share antar proses lewat page cache OS.
+class JobIndex:
+    def __init__(self, index_dir: str = JOB_INDEX_DIR):
+        self.index_dir = index_dir
+        self._lock = threading.Lock()
+        self._loaded_mtime: float | None = None
+        self.meta: dict = {}
+        self.jobs: list[dict] = []
+        self.matrix: np.ndarray | None = None
+        self.ann = None
+        self.searches = 0
+
+    def _meta_path(self) -> str:
+        return os.path.join(self.index_dir, _META_FILE)
+
+    # Muat ulang otomatis jika index di-build ulang (meta.json berubah)
+    def _ensure_loaded(self):
+        try:
+            mtime = os.path.getmtime(self._meta_path())
+        except OSError:
+            raise FileNotFoundError(f"Index lowongan belum di-build ({self.index_dir})")
+        if mtime == self._loaded_mtime:
+            return
+        with self._lock:
+            if mtime == self._loaded_mtime:
+                return
+            with open(self._meta_path()) as f:
+                meta = json.load(f)
+            with open(os.path.join(self.index_dir, _JOBS_FILE), encoding="utf-8") as f:
+                jobs = json.load(f)
+            matrix = None
+            if meta["count"]:
+                matrix = np.memmap(os.path.join(self.index_dir, _MATRIX_FILE), dtype=np.float32, mode="r",
+                                   shape=(meta["count"], meta["dim"]))
+            ann = None
+            if meta.get("ann") == "hnsw":
+                import hnswlib
+                ann = hnswlib.Index(space="ip", dim=meta["dim"])
+                ann.load_index(os.path.join(self.index_dir, _ANN_FILE), max_elements=meta["count"])
+                ann.set_ef(JOB_INDEX_ANN_EF)
+            self.meta, self.jobs, self.matrix, self.ann = meta, jobs, matrix, ann
+            self._loaded_mtime = mtime
+
+    def available(self) -> bool:
+        try:
+            self._ensure_loaded()
+            return True
+        except FileNotFoundError:
+            return False
+
+    def search(self, query: np.ndarray, top_n: int) -> list[tuple[dict, float]]:
+        self._ensure_loaded()
+        self.searches += 1
+        if self.matrix is None:
+            return []
+        top_n = min(top_n, len(self.jobs))
+        query = np.asarray(query, dtype=np.float32)
+        if self.meta.get("model") != EMBEDDING_MODEL_NAME or query.shape != (self.meta["dim"],):
+            raise JobIndexMismatch(
+                f"index {self.meta.get('model')} (dim {self.meta['dim']}), "
+                f"query {EMBEDDING_MODEL_NAME} (dim {query.shape[-1]})"
+            )
+
+        if self.ann is not None:
+            labels, distances = self.ann.knn_query(query, k=top_n)
+            # space="ip": distance = 1 - inner product
+            return [(self.jobs[int(i)], round(float(1 - d), 4)) for i, d in zip(labels[0], distances[0])]
+
+        scores = self.matrix @ query
+        top = np.argpartition(-scores, top_n - 1)[:top_n] if top_n < len(scores) else np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+        return [(self.jobs[int(i)], round(float(scores[i]), 4)) for i in top]
+
+    def stats(self) -> dict:
+        return {**self.meta, "loaded": self._loaded_mtime is not None, "searches": self.searches}
+
+
+job_index = JobIndex()
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2 or sys.argv[1] != "build":
+        print("Pemakaian: python -m services.job_index build [path katalog]")
+        sys.exit(1)
+
+    if JOB_CATALOG_SOURCE == "table":
+        catalog = load_catalog_table()
+    else:
+        catalog = load_catalog_file(sys.argv[2] if len(sys.argv) > 2 else JOB_CATALOG_PATH)
+    print(json.dumps(build_index(catalog), indent=2))
@@ -0,0 +1,103 @@
+import os
+import time
+from fastapi.concurrency import run_in_threadpool
+from nlp.tasks import embed_text
+from nlp.worker_pool import run_in_pool
+from sqlalchemy.ext.asyncio import AsyncSession
+from services.cv_embeddings import load_keyword_embedding, store_keyword_embedding
+from services.job_index import job_index
+from services.keyword_index import index_terms
+from services.llm_cache import recommendation_cache, keyword_set_text
+from services.llm_client import llm_client, GEMINI_MODEL_NAME, LLMUnavailable
+from monitoring.metrics import stage
+
+# === Job Matching: ranking lowongan dari index vektor, Gemini hanya untuk penjelasan ===
+JOB_MATCH_TOP_N = int(os.getenv("JOB_MATCH_TOP_N", "10"))
+# Naikkan jika isi prompt penjelasan diubah (ikut jadi kunci cache)
+JOB_EXPLANATION_PROMPT_VERSION = "1"
+
+
+def _matched_skills(cv_terms: set[str], job: dict) -> list[str]:
+    return [s for s in job["skills"] if index_terms([s]) & cv_terms]
+
+
+# Vektor CV = embedding keyword set (teks yang sama dengan cache rekomendasi near-duplicate)
+async def cv_query_vector(keywords: list[str]):
+    return await run_in_pool(embed_text, keyword_set_text(keywords))
+
+
+# Vektor tersimpan (cv_embeddings, kind "keywords") dipakai ulang; model hanya dijalankan jika belum ada
+async def stored_query_vector(db: AsyncSession, upload_id: int, user_id: int | None, keywords: list[str]):
+    query_vector = await load_keyword_embedding(db, upload_id)
+    if query_vector is None:
+        with stage("embedding"):
+            query_vector = await cv_query_vector(keywords)
+        await store_keyword_embedding(upload_id, user_id, query_vector)
+    return query_vector
+
+
+async def match_jobs(keywords: list[str], top_n: int = JOB_MATCH_TOP_N, query_vector=None) -> dict:
+    if query_vector is None:
+        with stage("embedding"):
+            query_vector = await cv_query_vector(keywords)
+
+    start = time.perf_counter()
+    with stage("job_search"):
+        # Load pertama (json + memmap) menyentuh disk, jadi tidak dijalankan di event loop
+        ranked = await run_in_threadpool(job_index.search, query_vector, top_n)
+    search_ms = round((time.perf_counter() - start) * 1000, 3)
+
+    cv_terms = index_terms(keywords)
+    matches = [
+        {
+            "id": job["id"],
+            "title": job["title"],
+            "company": job["company"],
+            "location": job["location"],
+            "url": job["url"],
+            "score": score,
+            "matched_skills": _matched_skills(cv_terms, job),
+        }
+        for job, score in ranked
+    ]
+    return {"matches": matches, "search_ms": search_ms, "catalog_size": job_index.meta.get("count", 0)}
+
+
+# === Penjelasan (opsional) dengan Gemini, di-cache per kombinasi keyword + lowongan ===
+def build_job_explanation_prompt(keywords: list[str], matches: list[dict]) -> str:
+    profile = "\n".join(f"- {kw}" for kw in keywords)
+    jobs = "\n".join(
+        f"{i}. {m['title']}" + (f" - {m['company']}" if m["company"] else "")
+        + (f" (skill cocok: {', '.join(m['matched_skills'])})" if m["matched_skills"] else "")
+        for i, m in enumerate(matches, start=1)
+    )
+    return (
+        f"Profil pengguna:\n\n{profile}\n\n"
+        f"Daftar lowongan berikut sudah diurutkan oleh sistem berdasarkan kecocokan:\n\n{jobs}\n\n"
+        f"Tugas Anda:\n"
+        f"1. Untuk setiap lowongan, jelaskan dalam 1-2 kalimat mengapa profil pengguna cocok.\n"
+        f"2. **Jangan mengubah urutan** dan jangan menambah lowongan lain.\n"
+        f"3. Gunakan format Markdown: heading `##` untuk nama posisi, satu baris kosong antar bagian.\n"
+    )
+
+
+# None jika Gemini gagal (penjelasan dihilangkan, bukan diganti teks error);
+# LLMUnavailable diteruskan ke pemanggil seperti ask_gemini
+async def explain_matches(keywords: list[str], matches: list[dict]) -> str | None:
+    cache_key = recommendation_cache.make_key(
+        keywords + [f"__job__{m['id']}" for m in matches], GEMINI_MODEL_NAME, f"jobs-{JOB_EXPLANATION_PROMPT_VERSION}"
+    )
+    cached = recommendation_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    try:
+        text = await llm_client.generate(build_job_explanation_prompt(keywords, matches), "job_explanation")
+    except LLMUnavailable:
+        raise
+    except Exception as e:
+        print(f"[JOBS] penjelasan Gemini gagal: {e}")
+        return None
+
+    recommendation_cache.put(cache_key, text)
+    return text
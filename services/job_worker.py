@@ -0,0 +1,60 @@
+# === Worker Job CV (proses terpisah) ===
+# Jalankan: python -m services.job_worker
+# Dipakai bersama CV_JOB_RUNNER=external supaya proses web dan worker NLP bisa di-scale terpisah.
+import os
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import google.generativeai as genai
+from databases.database import SessionLocal
+from nlp.model_loader import load_all_models, warmup_models, MODEL_WARMUP
+from services.cv_analysis import analyze_cv_sync
+from services.cv_context import index_cv_chunks_sync
+from services.cv_embeddings import store_cv_embeddings_sync
+from services.jobs import claim_next_job, complete_job, fail_job, job_content_hash, requeue_stale_jobs, \
+    CV_JOB_SWEEP_INTERVAL
+
+CV_JOB_POLL_INTERVAL = float(os.getenv("CV_JOB_POLL_INTERVAL", "1.0"))
+
+
+def run_forever():
+    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+    print(f"[JOB WORKER] model dimuat: {load_all_models()}")
+    if MODEL_WARMUP:
+        warmup_models()
+    print(f"[JOB WORKER] pid={os.getpid()} mulai polling setiap {CV_JOB_POLL_INTERVAL}s")
+
+    last_sweep = 0.0
+    while True:
+        db = SessionLocal()
+        try:
+            # Job "processing" milik worker yang mati dikembalikan ke antrian
+            if time.monotonic() - last_sweep >= CV_JOB_SWEEP_INTERVAL:
+                requeue_stale_jobs(db)
+                last_sweep = time.monotonic()
+
+            job = claim_next_job(db)
+            if not job:
+                time.sleep(CV_JOB_POLL_INTERVAL)
+                continue
+
+            try:
+                content_hash = job_content_hash(job)
+                analysis = analyze_cv_sync(db, job.file_path, content_hash)
+            except Exception as e:
+                fail_job(db, job, e)
+                continue
+
+            result = complete_job(db, job, analysis, content_hash)
+            if result and result["upload_id"]:
+                index_cv_chunks_sync(db, result["upload_id"], analysis["raw_text"])
+                store_cv_embeddings_sync(db, result["upload_id"], analysis["raw_text"])
+            print(f"[JOB WORKER] job {job.id} -> {job.status}")
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    run_forever()
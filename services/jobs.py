@@ -0,0 +1,218 @@
+import asyncio
+import os
+import uuid
+import traceback
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from databases.database import SessionLocal
+from databases.models import CVJob
+from services.analysis_cache import hash_file
+from services.cv_analysis import analyze_cv, finalize_upload
+from services.cv_context import schedule_cv_indexing
+from services.llm_client import LLMUnavailable, LLM_UNAVAILABLE_DETAIL
+
+# === Konfigurasi Job ===
+# inline   -> job diproses oleh worker pool di proses web
+# external -> proses web hanya mencatat job; diproses oleh `python -m services.job_worker`
+CV_JOB_RUNNER = os.getenv("CV_JOB_RUNNER", "inline")
+# Folder PDF yang menunggu diproses; untuk runner external harus berupa shared volume
+CV_JOB_DIR = os.getenv("CV_JOB_DIR", "cv_jobs")
+# Job "processing" yang tidak di-update selama ini dianggap ditinggal runner yang mati (crash / restart)
+# dan dikembalikan ke antrian. Runner inline memperbarui updated_at selama job berjalan; worker external
+# tidak, jadi nilainya harus lebih lama dari durasi satu job
+CV_JOB_STALE_SECONDS = float(os.getenv("CV_JOB_STALE_SECONDS", "900"))
+# Job yang sudah diklaim sebanyak ini tanpa selesai ditandai failed (mis. PDF yang selalu mematikan worker)
+CV_JOB_MAX_ATTEMPTS = int(os.getenv("CV_JOB_MAX_ATTEMPTS", "3"))
+# Interval pengecekan job macet (runner inline: task background; external: loop polling worker)
+CV_JOB_SWEEP_INTERVAL = float(os.getenv("CV_JOB_SWEEP_INTERVAL", "60"))
+JOB_ABANDONED_ERROR = "Pemrosesan CV berulang kali terhenti. Silakan unggah ulang CV Anda."
+
+_background_tasks: set[asyncio.Task] = set()
+
+
+# === Buat Job ===
+# file_path: PDF yang sudah di-stream ke CV_JOB_DIR; content_hash: hash yang dihitung saat stream
+def create_job(db: Session, file_path: str, content_hash: str, original_filename: str,
+               user: dict | None) -> CVJob:
+    job = CVJob(
+        id=str(uuid.uuid4()),
+        user_id=user["id"] if user else None,
+        original_filename=original_filename,
+        file_path=file_path,
+        content_hash=content_hash,
+        status="queued",
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+# === Klaim Job (atomic: hanya satu runner yang berhasil) ===
+def claim_job(db: Session, job_id: str) -> bool:
+    claimed = db.query(CVJob)\
+        .filter(CVJob.id == job_id, CVJob.status == "queued")\
+        .update({"status": "processing", "attempts": CVJob.attempts + 1, "updated_at": datetime.utcnow()},
+                synchronize_session=False)
+    db.commit()
+    return claimed == 1
+
+
+# Hash dari stream_upload_to_disk; job yang dibuat sebelum kolom content_hash ada di-hash ulang
+def job_content_hash(job: CVJob) -> str:
+    return job.content_hash or hash_file(job.file_path)
+
+
+def claim_next_job(db: Session) -> CVJob | None:
+    while True:
+        job = db.query(CVJob)\
+            .filter(CVJob.status == "queued")\
+            .order_by(CVJob.created_at.asc())\
+            .with_for_update(skip_locked=True)\
+            .first()
+        if not job:
+            db.commit()
+            return None
+        job_id = job.id
+        if claim_job(db, job_id):
+            return db.get(CVJob, job_id)
+
+
+# === Selesaikan Job ===
+def complete_job(db: Session, job: CVJob, analysis: dict, content_hash: str) -> dict | None:
+    user = {"id": job.user_id} if job.user_id else None
+    try:
+        result = finalize_upload(analysis, job.file_path, content_hash, job.original_filename, user, db)
+        job.set_result(result)
+        job.upload_id = result["upload_id"]
+        job.status = "done"
+        db.commit()
+    except Exception as e:
+        fail_job(db, job, e)
+        return None
+    return result
+
+
+def fail_job(db: Session, job: CVJob, error: Exception):
+    print("[JOB ERROR]")
+    print("".join(traceback.format_exception(error)))
+    db.rollback()
+    job.status = "failed"
+    job.error = LLM_UNAVAILABLE_DETAIL if isinstance(error, LLMUnavailable) else str(error)
+    db.commit()
+    if os.path.exists(job.file_path):
+        os.remove(job.file_path)
+
+
+# === Job macet: runner mati saat status "processing" ===
+# Dikembalikan ke "queued" (atau failed jika sudah CV_JOB_MAX_ATTEMPTS kali diklaim). Mengembalikan id job
+# yang di-queue ulang supaya runner inline bisa langsung menjadwalkannya.
+def requeue_stale_jobs(db: Session) -> list[str]:
+    cutoff = datetime.utcnow() - timedelta(seconds=CV_JOB_STALE_SECONDS)
+    jobs = db.query(CVJob)\
+        .filter(CVJob.status == "processing", CVJob.updated_at < cutoff)\
+        .with_for_update(skip_locked=True)\
+        .all()
+    requeued, abandoned = [], []
+    for job in jobs:
+        if job.attempts >= CV_JOB_MAX_ATTEMPTS:
+            job.status, job.error = "failed", JOB_ABANDONED_ERROR
+            abandoned.append(job.file_path)
+        else:
+            job.status = "queued"
+            requeued.append(job.id)
+    db.commit()
+    for path in abandoned:
+        if os.path.exists(path):
+            os.remove(path)
+    if jobs:
+        print(f"[JOB] job macet: {len(requeued)} di-queue ulang, {len(abandoned)} ditandai gagal")
+    return requeued
+
+
+# === Runner inline (di dalam proses web) ===
+# updated_at diperbarui selama job berjalan (termasuk saat menunggu slot worker pool),
+# jadi hanya job yang runner-nya mati yang dianggap macet
+def _touch_job(job_id: str):
+    db = SessionLocal()
+    try:
+        db.query(CVJob)\
+            .filter(CVJob.id == job_id, CVJob.status == "processing")\
+            .update({"updated_at": datetime.utcnow()}, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+async def _heartbeat(job_id: str):
+    while True:
+        await asyncio.sleep(CV_JOB_STALE_SECONDS / 3)
+        await run_in_threadpool(_touch_job, job_id)
+
+
+async def _run_job_inline(job_id: str):
+    db = SessionLocal()
+    heartbeat = None
+    try:
+        if not await run_in_threadpool(claim_job, db, job_id):
+            return
+        heartbeat = asyncio.create_task(_heartbeat(job_id))
+        job = db.get(CVJob, job_id)
+
+        try:
+            # Job tidak ditolak saat pool penuh; tunggu sampai ada slot
+            content_hash = await run_in_threadpool(job_content_hash, job)
+            analysis = await analyze_cv(db, job.file_path, content_hash, wait_for_slot=True)
+        except Exception as e:
+            await run_in_threadpool(fail_job, db, job, e)
+            return
+
+        result = await run_in_threadpool(complete_job, db, job, analysis, content_hash)
+        if result:
+            schedule_cv_indexing(result["upload_id"], analysis["raw_text"])
+    finally:
+        if heartbeat is not None:
+            heartbeat.cancel()
+        db.close()
+
+
+def dispatch_job(job_id: str):
+    if CV_JOB_RUNNER != "inline":
+        return
+    task = asyncio.create_task(_run_job_inline(job_id))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+def resume_pending_jobs():
+    # Job yang masih "queued" (atau macet di "processing") saat server restart dijadwalkan ulang
+    if CV_JOB_RUNNER != "inline":
+        return
+    db = SessionLocal()
+    try:
+        requeue_stale_jobs(db)
+        job_ids = [j.id for j in db.query(CVJob.id).filter(CVJob.status == "queued").all()]
+    finally:
+        db.close()
+    for job_id in job_ids:
+        dispatch_job(job_id)
+    task = asyncio.create_task(_sweep_stale_jobs())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+# Runner inline: job yang ditinggal proses web lain (mis. worker uvicorn yang crash) diambil alih
+async def _sweep_stale_jobs():
+    while True:
+        await asyncio.sleep(CV_JOB_SWEEP_INTERVAL)
+        db = SessionLocal()
+        try:
+            job_ids = await run_in_threadpool(requeue_stale_jobs, db)
+        except Exception as e:
+            print(f"[JOB] cek job macet gagal: {e}")
+            job_ids = []
+        finally:
+            db.close()
+        for job_id in job_ids:
+            dispatch_job(job_id)
@@ -0,0 +1,114 @@
+import re
+from sqlalchemy import select, func, exists
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from databases.models import CVUpload, CVKeyword
+from nlp.keyword_engine import tokenize
+
+# === Inverted index keyword CV (tabel cv_keywords) ===
+# Tiap keyword disimpan ter-normalisasi (lowercase, spasi tunggal) beserta kata penyusunnya,
+# sehingga pencarian "python" juga cocok dengan CV ber-keyword "python developer".
+KEYWORD_MAX_LENGTH = 200
+SEARCH_MAX_SKILLS = 20
+
+
+def normalize_keyword(keyword: str) -> str:
+    return re.sub(r'\s+', ' ', keyword).strip().lower()[:KEYWORD_MAX_LENGTH]
+
+
+def index_terms(keywords: list[str]) -> set[str]:
+    terms = set()
+    for keyword in keywords:
+        phrase = normalize_keyword(keyword)
+        if not phrase:
+            continue
+        terms.add(phrase)
+        terms.update(t for t in tokenize(phrase) if not t.isdigit())
+    return terms
+
+
+def keyword_rows(upload_id: int, user_id: int | None, keywords: list[str]) -> list[CVKeyword]:
+    return [
+        CVKeyword(keyword=term, cv_upload_id=upload_id, user_id=user_id)
+        for term in sorted(index_terms(keywords))
+    ]
+
+
+# === Pencarian: CV yang mengandung skill terbanyak dulu ===
+# user_id=None -> semua CV (khusus recruiter). Ranking & LIMIT dikerjakan di DB lewat index keyword.
+async def search_uploads(db: AsyncSession, skills: list[str], user_id: int | None, limit: int) -> list[dict]:
+    terms = sorted({normalize_keyword(s) for s in skills if normalize_keyword(s)})
+    if not terms:
+        return []
+
+    matched = func.count(CVKeyword.keyword).label("matched")
+    ranking = select(CVKeyword.cv_upload_id, matched).where(CVKeyword.keyword.in_(terms))
+    if user_id is not None:
+        ranking = ranking.where(CVKeyword.user_id == user_id)
+    ranking = ranking.group_by(CVKeyword.cv_upload_id)\
+        .order_by(matched.desc(), CVKeyword.cv_upload_id.desc())\
+        .limit(limit)
+    ranked = (await db.execute(ranking)).all()
+    if not ranked:
+        return []
+
+    ids = [r.cv_upload_id for r in ranked]
+    uploads = {
+        u.id: u for u in (await db.execute(
+            select(CVUpload.id, CVUpload.user_id, CVUpload.original_filename, CVUpload.created_at)
+            .where(CVUpload.id.in_(ids))
+        )).all()
+    }
+    hits: dict[int, list[str]] = {}
+    for row in (await db.execute(
+        select(CVKeyword.cv_upload_id, CVKeyword.keyword)
+        .where(CVKeyword.cv_upload_id.in_(ids), CVKeyword.keyword.in_(terms))
+    )).all():
+        hits.setdefault(row.cv_upload_id, []).append(row.keyword)
+
+    return [
+        {
+            "id": r.cv_upload_id,
+            "user_id": uploads[r.cv_upload_id].user_id,
+            "original_filename": uploads[r.cv_upload_id].original_filename,
+            "created_at": uploads[r.cv_upload_id].created_at.isoformat(),
+            "matched_skills": sorted(hits.get(r.cv_upload_id, [])),
+            "score": round(r.matched / len(terms), 4),
+        }
+        for r in ranked
+        if r.cv_upload_id in uploads
+    ]
+
+
+# === Backfill untuk CV yang di-upload sebelum tabel cv_keywords ada ===
+# Jalankan: python -m services.keyword_index
+def backfill(db: Session, batch_size: int = 500) -> int:
+    indexed = exists().where(CVKeyword.cv_upload_id == CVUpload.id)
+    last_id, total = 0, 0
+    while True:
+        rows = db.execute(
+            select(CVUpload.id, CVUpload.user_id, CVUpload.keywords)
+            .where(CVUpload.id > last_id, ~indexed)
+            .order_by(CVUpload.id.asc())
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return total
+        for row in rows:
+            db.add_all(keyword_rows(row.id, row.user_id, row.keywords or []))
+        db.commit()
+        last_id = rows[-1].id
+        total += len(rows)
+        print(f"[KEYWORD INDEX] {total} CV di-index (id terakhir {last_id})")
+
+
+if __name__ == "__main__":
+    from databases.database import SessionLocal, engine
+    from databases.schema import ensure_schema
+
+    ensure_schema(engine)
+    session = SessionLocal()
+    try:
+        print(f"[KEYWORD INDEX] selesai: {backfill(session)} CV")
+    finally:
+        session.close()
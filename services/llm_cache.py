@@ -0,0 +1,133 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+# === Konfigurasi Cache Rekomendasi Gemini ===
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "1024"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))  # detik
+# > 0 mengaktifkan mode near-duplicate (cosine similarity embedding keyword set)
+LLM_CACHE_SIMILARITY_THRESHOLD = float(os.getenv("LLM_CACHE_SIMILARITY_THRESHOLD", "0"))
+
+
+# === Normalisasi keyword set ===
+def normalize_keywords(keywords: list[str]) -> list[str]:
+    normalized = {re.sub(r'\s+', ' ', k).strip().lower() for k in keywords}
+    return sorted(k for k in normalized if k)
+
+
+def keyword_set_text(keywords: list[str]) -> str:
+    # Teks yang di-embed untuk mode near-duplicate
+    return ", ".join(normalize_keywords(keywords))
+
+
+class _Entry:
+    __slots__ = ("text", "expires_at", "embedding", "scope")
+
+    def __init__(self, text: str, expires_at: float | None, embedding: np.ndarray | None,
+                 scope: tuple[str, str] | None):
+        self.text = text
+        self.expires_at = expires_at  # None = tidak pernah kedaluwarsa (pinned)
+        self.embedding = embedding
+        self.scope = scope  # (model, versi prompt): batas kandidat near-duplicate
+
+
+# === Cache Response LLM (TTL + LRU) ===
+class LLMResponseCache:
+    def __init__(self, maxsize: int, ttl: float, similarity_threshold: float = 0.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._pinned: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+
+    @property
+    def near_duplicate_enabled(self) -> bool:
+        return self.similarity_threshold > 0
+
+    @staticmethod
+    def make_key(keywords: list[str], model_name: str, prompt_version: str) -> str:
+        payload = "\n".join([model_name, prompt_version, *normalize_keywords(keywords)])
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _evict_expired(self, now: float):
+        expired = [k for k, e in self._entries.items() if e.expires_at <= now]
+        for k in expired:
+            del self._entries[k]
+
+    # Hanya entri dari model + versi prompt yang sama: jawaban model/prompt lama tidak dipakai ulang
+    def _nearest(self, embedding: np.ndarray, scope: tuple[str, str]) -> _Entry | None:
+        candidates = [e for e in self._entries.values() if e.embedding is not None and e.scope == scope]
+        if not candidates:
+            return None
+        # Embedding sudah dinormalisasi, jadi dot product = cosine similarity
+        scores = np.stack([e.embedding for e in candidates]) @ embedding
+        best = int(np.argmax(scores))
+        return candidates[best] if scores[best] >= self.similarity_threshold else None
+
+    # scope = (model, versi prompt) yang sama dengan make_key; wajib untuk lookup near-duplicate
+    def get(self, key: str, embedding: list[float] | None = None, scope: tuple[str, str] | None = None) -> str | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.text
+
+            self._evict_expired(now)
+            if self.near_duplicate_enabled and embedding is not None and scope is not None:
+                entry = self._nearest(np.asarray(embedding, dtype=np.float32), scope)
+                if entry is not None:
+                    self.near_hits += 1
+                    return entry.text
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, text: str, embedding: list[float] | None = None, scope: tuple[str, str] | None = None):
+        vector = np.asarray(embedding, dtype=np.float32) if embedding is not None else None
+        with self._lock:
+            self._entries[key] = _Entry(text, time.monotonic() + self.ttl, vector, scope)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    # Entri pinned tidak kena TTL maupun eviction (dipakai untuk prompt tetap)
+    def get_pinned(self, key: str) -> str | None:
+        with self._lock:
+            text = self._pinned.get(key)
+            if text is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return text
+
+    def pin(self, key: str, text: str):
+        with self._lock:
+            self._pinned[key] = text
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.near_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "pinned": len(self._pinned),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "similarity_threshold": self.similarity_threshold,
+                "hits": self.hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.near_hits) / lookups, 4) if lookups else 0.0,
+            }
+
+
+recommendation_cache = LLMResponseCache(LLM_CACHE_SIZE, LLM_CACHE_TTL, LLM_CACHE_SIMILARITY_THRESHOLD)
@@ -0,0 +1,368 @@
+import asyncio
+import os
+import random
+import threading
+import time
+import weakref
+from monitoring.metrics import Counter, Histogram, CallbackGauge, gemini_call
+
+# === Konfigurasi Client LLM ===
+# Semua panggilan Gemini lewat satu client per proses: model dipakai ulang, jumlah panggilan bersamaan
+# dibatasi, tiap percobaan diberi timeout, error sementara di-retry, dan circuit breaker menolak cepat
+# saat Gemini sedang bermasalah.
+GEMINI_MODEL_NAME = os.getenv("GEMINI_MODEL_NAME", "models/gemini-2.0-flash")
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")  # gemini | fake
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+# Batas menunggu slot saat semua slot terpakai
+LLM_QUEUE_TIMEOUT_SECONDS = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "30"))
+# Timeout per percobaan; untuk streaming berlaku per potongan (jeda antar chunk)
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", "0.5"))
+LLM_RETRY_MAX_SECONDS = float(os.getenv("LLM_RETRY_MAX_SECONDS", "8"))
+# Breaker terbuka setelah N kegagalan berturut-turut, lalu mencoba lagi setelah jeda reset
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+# > 0: jika belum ada jawaban setelah N detik, kirim request kedua (hanya jika ada slot kosong)
+# dan pakai jawaban yang lebih dulu selesai. 0 = nonaktif.
+LLM_HEDGE_AFTER_SECONDS = float(os.getenv("LLM_HEDGE_AFTER_SECONDS", "0"))
+
+# Nama kelas error yang dianggap sementara (google.api_core.exceptions, grpc, jaringan)
+TRANSIENT_ERRORS = {
+    "ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "InternalServerError",
+    "DeadlineExceeded", "GatewayTimeout", "BadGateway", "Aborted", "RetryError",
+    "TimeoutError", "ConnectionError", "ServerDisconnectedError",
+}
+
+# === Metrics ===
+LLM_ATTEMPT_SECONDS = Histogram(
+    "matchcv_llm_attempt_seconds", "Latency per percobaan panggilan LLM", ("purpose", "outcome"),
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0),
+)
+LLM_RETRIES = Counter("matchcv_llm_retries_total", "Percobaan ulang panggilan LLM", ("purpose",))
+LLM_HEDGES = Counter("matchcv_llm_hedges_total", "Request cadangan (hedge) LLM", ("purpose", "winner"))
+LLM_REJECTED = Counter("matchcv_llm_rejected_total", "Panggilan LLM yang ditolak tanpa dikirim", ("reason",))
+
+
+class LLMUnavailable(Exception):
+    pass
+
+
+# Pesan untuk user (HTTP 503 / error job) saat LLMUnavailable
+LLM_UNAVAILABLE_DETAIL = "Layanan AI sedang sibuk. Silakan coba lagi nanti."
+
+
+def is_transient(error: BaseException) -> bool:
+    return any(cls.__name__ in TRANSIENT_ERRORS for cls in type(error).__mro__)
+
+
+# Full jitter: acak di [0, min(max, base * 2^attempt)] supaya retry dari banyak request tidak serempak
+def retry_delay(attempt: int) -> float:
+    return random.uniform(0, min(LLM_RETRY_MAX_SECONDS, LLM_RETRY_BASE_SECONDS * 2 ** attempt))
+
+
+# === Circuit Breaker ===
+# closed -> (N gagal berturut-turut) -> open -> (setelah reset) -> half_open: satu percobaan lolos
+class CircuitBreaker:
+    def __init__(self, failures: int = LLM_BREAKER_FAILURES, reset_seconds: float = LLM_BREAKER_RESET_SECONDS):
+        self.failure_threshold = failures
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: float | None = None
+        # Percobaan half_open yang tidak pernah melapor (dibatalkan) dianggap selesai setelah reset_seconds
+        self._trial_started_at: float | None = None
+        self.opened_total = 0
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at < self.reset_seconds:
+            return "open"
+        return "half_open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            now = time.monotonic()
+            if state == "half_open" and (
+                self._trial_started_at is None or now - self._trial_started_at > self.reset_seconds
+            ):
+                self._trial_started_at = now
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_started_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_started_at = None
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    self.opened_total += 1
+                self._opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        return {"state": self.state, "consecutive_failures": self._failures, "opened_total": self.opened_total}
+
+
+# === Client LLM bersama ===
+class LLMClient:
+    def __init__(self, model_name: str = GEMINI_MODEL_NAME, backend: str = LLM_BACKEND):
+        self.model_name = model_name
+        self.backend = backend
+        self.breaker = CircuitBreaker()
+        self._model = None
+        self._model_lock = threading.Lock()
+        # asyncio.Semaphore terikat ke satu event loop; satu semaphore per loop
+        self._semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self.in_flight = 0
+
+    # --- Model (dibuat sekali, dipakai ulang semua request) ---
+    @property
+    def model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    if self.backend == "fake":
+                        from services.llm_fake import FakeGenerativeModel
+                        self._model = FakeGenerativeModel(self.model_name)
+                    else:
+                        import google.generativeai as genai
+                        self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    def use_model(self, model):
+        # Ganti backend (mis. model palsu untuk test / benchmark)
+        self._model = model
+
+    # Event loop utama proses web; panggilan dari thread (generate_blocking) dijalankan di loop ini
+    def bind_loop(self, loop: asyncio.AbstractEventLoop | None = None):
+        self._loop = loop or asyncio.get_running_loop()
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+        return semaphore
+
+    def _check_breaker(self):
+        if not self.breaker.allow():
+            LLM_REJECTED.inc(reason="circuit_open")
+            raise LLMUnavailable("Circuit breaker LLM terbuka")
+
+    async def _acquire(self) -> asyncio.Semaphore:
+        semaphore = self._semaphore()
+        try:
+            await asyncio.wait_for(semaphore.acquire(), LLM_QUEUE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            LLM_REJECTED.inc(reason="queue_timeout")
+            raise LLMUnavailable("Antrian panggilan LLM penuh")
+        return semaphore
+
+    # --- Satu percobaan (memegang satu slot) ---
+    async def _attempt(self, prompt, purpose: str) -> str:
+        semaphore = await self._acquire()
+        start = time.perf_counter()
+        outcome = "error"
+        self.in_flight += 1
+        try:
+            response = await asyncio.wait_for(
+                self.model.generate_content_async(prompt, request_options={"timeout": LLM_TIMEOUT_SECONDS}),
+                LLM_TIMEOUT_SECONDS
+            )
+            text = response.text
+            outcome = "ok"
+            return text
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            raise
+        finally:
+            self.in_flight -= 1
+            semaphore.release()
+            LLM_ATTEMPT_SECONDS.observe(time.perf_counter() - start, purpose=purpose, outcome=outcome)
+
+    async def _hedged_attempt(self, prompt, purpose: str) -> str:
+        if LLM_HEDGE_AFTER_SECONDS <= 0:
+            return await self._attempt(prompt, purpose)
+
+        tasks = [asyncio.ensure_future(self._attempt(prompt, purpose))]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=LLM_HEDGE_AFTER_SECONDS)
+            # Request cadangan hanya dikirim jika ada slot kosong (tidak menambah antrean saat ramai)
+            if done or self._semaphore().locked():
+                return await tasks[0]
+
+            tasks.append(asyncio.ensure_future(self._attempt(prompt, purpose)))
+            pending, error = set(tasks), None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        LLM_HEDGES.inc(purpose=purpose, winner="hedge" if task is tasks[1] else "primary")
+                        return task.result()
+                    error = task.exception()
+            LLM_HEDGES.inc(purpose=purpose, winner="none")
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    # --- API async (route & service async) ---
+    async def generate(self, prompt, purpose: str) -> str:
+        with gemini_call(purpose):
+            return await self._generate(prompt, purpose)
+
+    async def _generate(self, prompt, purpose: str) -> str:
+        if self._loop is None:
+            self.bind_loop()
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            self._check_breaker()
+            try:
+                text = await self._hedged_attempt(prompt, purpose)
+            except LLMUnavailable:
+                raise
+            except Exception as e:
+                if not is_transient(e):
+                    # Error permanen (prompt ditolak, API key salah): Gemini sendiri sehat
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                if attempt == LLM_MAX_RETRIES:
+                    raise
+                LLM_RETRIES.inc(purpose=purpose)
+                await asyncio.sleep(retry_delay(attempt))
+                continue
+            self.breaker.record_success()
+            return text
+
+    # Streaming: retry hanya sebelum potongan pertama terkirim ke client
+    async def stream(self, prompt, purpose: str):
+        if self._loop is None:
+            self.bind_loop()
+        with gemini_call(purpose):
+            for attempt in range(LLM_MAX_RETRIES + 1):
+                self._check_breaker()
+                semaphore = await self._acquire()
+                started = False
+                response = chunks = None
+                self.in_flight += 1
+                try:
+                    response = await asyncio.wait_for(
+                        self.model.generate_content_async(
+                            prompt, stream=True, request_options={"timeout": LLM_TIMEOUT_SECONDS}
+                        ),
+                        LLM_TIMEOUT_SECONDS
+                    )
+                    chunks = response.__aiter__()
+                    while True:
+                        try:
+                            chunk = await asyncio.wait_for(chunks.__anext__(), LLM_TIMEOUT_SECONDS)
+                        except StopAsyncIteration:
+                            break
+                        started = True
+                        yield chunk.text
+                except Exception as e:
+                    if not is_transient(e):
+                        self.breaker.record_success()
+                        raise
+                    self.breaker.record_failure()
+                    if started or attempt == LLM_MAX_RETRIES:
+                        raise
+                    LLM_RETRIES.inc(purpose=purpose)
+                    await asyncio.sleep(retry_delay(attempt))
+                    continue
+                finally:
+                    try:
+                        await _close_stream(response, chunks)
+                    finally:
+                        self.in_flight -= 1
+                        semaphore.release()
+                self.breaker.record_success()
+                return
+
+    # --- API blocking (kode sync: finalize_upload di threadpool, job worker) ---
+    # Dari thread proses web: dijalankan di event loop utama (berbagi semaphore, breaker, hedging).
+    # Tanpa event loop (job worker): pakai API sync Gemini dengan timeout, retry, dan breaker yang sama.
+    def generate_blocking(self, prompt, purpose: str) -> str:
+        loop = self._loop
+        with gemini_call(purpose):
+            if loop is not None and loop.is_running() and not _on_loop(loop):
+                return asyncio.run_coroutine_threadsafe(self._generate(prompt, purpose), loop).result()
+            return self._generate_sync(prompt, purpose)
+
+    def _generate_sync(self, prompt, purpose: str) -> str:
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            self._check_breaker()
+            start = time.perf_counter()
+            outcome = "error"
+            try:
+                text = self.model.generate_content(prompt, request_options={"timeout": LLM_TIMEOUT_SECONDS}).text
+                outcome = "ok"
+            except Exception as e:
+                if not is_transient(e):
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                if attempt == LLM_MAX_RETRIES:
+                    raise
+                LLM_RETRIES.inc(purpose=purpose)
+                time.sleep(retry_delay(attempt))
+                continue
+            finally:
+                LLM_ATTEMPT_SECONDS.observe(time.perf_counter() - start, purpose=purpose, outcome=outcome)
+            self.breaker.record_success()
+            return text
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend if self._model is None else type(self._model).__name__,
+            "model": self.model_name,
+            "in_flight": self.in_flight,
+            "max_concurrency": LLM_MAX_CONCURRENCY,
+            "breaker": self.breaker.stats(),
+        }
+
+
+# Stream yang berhenti sebelum habis (client putus, task di-cancel, timeout antar chunk) ditutup eksplisit.
+# Response google.generativeai menyimpan iterator gRPC di _iterator: ikut ditutup supaya call-nya
+# dilepas (dan di-cancel) sekarang, bukan menunggu GC dengan koneksi tetap terbuka.
+async def _close_stream(response, chunks):
+    for iterator in (chunks, getattr(response, "_iterator", None)):
+        try:
+            if hasattr(iterator, "aclose"):
+                await iterator.aclose()
+            elif hasattr(iterator, "cancel"):
+                iterator.cancel()
+        except Exception:
+            pass
+
+
+def _on_loop(loop: asyncio.AbstractEventLoop) -> bool:
+    try:
+        return asyncio.get_running_loop() is loop
+    except RuntimeError:
+        return False
+
+
+llm_client = LLMClient()
+
+CallbackGauge(
+    "matchcv_llm_in_flight", "Panggilan LLM yang sedang berjalan", (),
+    lambda: {(): llm_client.in_flight},
+)
+CallbackGauge(
+    "matchcv_llm_circuit_open", "1 jika circuit breaker LLM sedang terbuka (open / half_open)", (),
+    lambda: {(): int(llm_client.breaker.state != "closed")},
+)
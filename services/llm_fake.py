@@ -0,0 +1,68 @@
+import asyncio
+import os
+import random
+import time
+
+# === Backend LLM palsu (tanpa jaringan) untuk test, benchmark, dan development lokal ===
+# Aktifkan dengan LLM_BACKEND=fake. Antarmuka sama dengan genai.GenerativeModel
+# (generate_content, generate_content_async, stream=True).
+LLM_FAKE_LATENCY = float(os.getenv("LLM_FAKE_LATENCY", os.getenv("BENCH_GEMINI_LATENCY", "0.3")))
+# Peluang (0-1) tiap panggilan gagal dengan error sementara; untuk menguji retry & circuit breaker
+LLM_FAKE_FAILURE_RATE = float(os.getenv("LLM_FAKE_FAILURE_RATE", "0"))
+LLM_FAKE_CHUNKS = 5
+
+_FAKE_RESPONSE = (
+    "## **Berikut adalah 5 rekomendasi pekerjaan yang paling sesuai dengan profil pengguna, beserta alasannya:**\n\n"
+    + "\n\n".join(f"## Posisi {i}\n\n- Cocok karena pengalaman dan keahlian yang relevan." for i in range(1, 6))
+)
+
+
+# Nama kelas sama dengan google.api_core.exceptions.ServiceUnavailable -> dianggap transient oleh llm_client
+class ServiceUnavailable(Exception):
+    pass
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeStream:
+    def __init__(self, text: str, latency: float):
+        size = max(len(text) // LLM_FAKE_CHUNKS, 1)
+        self._chunks = [text[i:i + size] for i in range(0, len(text), size)]
+        self._delay = latency / max(len(self._chunks), 1)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for chunk in self._chunks:
+            await asyncio.sleep(self._delay)
+            yield FakeResponse(chunk)
+
+
+class FakeGenerativeModel:
+    latency = LLM_FAKE_LATENCY
+    failure_rate = LLM_FAKE_FAILURE_RATE
+    calls = 0
+
+    def __init__(self, model_name: str = "fake", *args, **kwargs):
+        self.model_name = model_name
+
+    def _maybe_fail(self):
+        FakeGenerativeModel.calls += 1
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise ServiceUnavailable("fake backend: layanan tidak tersedia")
+
+    def generate_content(self, prompt, **kwargs):
+        self._maybe_fail()
+        time.sleep(self.latency)
+        return FakeResponse(_FAKE_RESPONSE)
+
+    async def generate_content_async(self, prompt, stream: bool = False, **kwargs):
+        self._maybe_fail()
+        if stream:
+            return FakeStream(_FAKE_RESPONSE, self.latency)
+        await asyncio.sleep(self.latency)
+        return FakeResponse(_FAKE_RESPONSE)
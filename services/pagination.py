@@ -0,0 +1,41 @@
+import base64
+from datetime import datetime
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+
+# === Keyset pagination (created_at, id) ===
+# Cursor = posisi baris terakhir di halaman sebelumnya; query berikutnya mulai tepat setelahnya
+# memakai index (.., created_at, id) tanpa OFFSET, jadi tetap cepat di halaman ke-1000.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(created_at), int(row_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor tidak valid.")
+
+
+# Baris yang posisinya sebelum cursor pada urutan (created_at DESC, id DESC)
+def before_cursor(created_at_column, id_column, cursor: str):
+    created_at, row_id = decode_cursor(cursor)
+    return or_(
+        created_at_column < created_at,
+        and_(created_at_column == created_at, id_column < row_id),
+    )
+
+
+# rows diambil limit + 1: jika lebih, masih ada halaman berikutnya
+def page_of(rows: list, limit: int) -> tuple[list, str | None]:
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last.created_at, last.id)
@@ -0,0 +1,68 @@
+import asyncio
+import time
+import traceback
+from databases.database import SessionLocal, engine
+from databases.schema import ensure_schema
+from nlp.model_loader import load_all_models, warmup_models, MODEL_WARMUP
+from nlp.worker_pool import CV_WORKER_POOL_SIZE, warm_pool
+from services.analysis_cache import analysis_cache
+from services.jobs import resume_pending_jobs
+
+# === Status startup untuk /health/ready ===
+readiness = {"database": False, "models": False}
+startup_errors: dict[str, str] = {}
+startup_times: dict[str, float] = {}
+
+
+def _init_database():
+    # Tabel baru + index baru pada tabel lama
+    ensure_schema(engine)
+
+    # Entri cache dari model/parameter lama tidak akan terpakai lagi
+    db = SessionLocal()
+    try:
+        analysis_cache.purge_stale(db)
+    finally:
+        db.close()
+
+
+async def _startup_database():
+    start = time.perf_counter()
+    try:
+        await asyncio.to_thread(_init_database)
+        readiness["database"] = True
+        resume_pending_jobs()
+    except Exception:
+        startup_errors["database"] = traceback.format_exc()
+        print("[STARTUP ERROR] database")
+        print(startup_errors["database"])
+    startup_times["database"] = round(time.perf_counter() - start, 3)
+
+
+async def _startup_models():
+    start = time.perf_counter()
+    try:
+        if CV_WORKER_POOL_SIZE > 0:
+            # Model dimuat (dan di-warmup) di tiap proses worker
+            await warm_pool()
+        else:
+            await asyncio.to_thread(load_all_models)
+            if MODEL_WARMUP:
+                await asyncio.to_thread(warmup_models)
+        readiness["models"] = True
+    except Exception:
+        startup_errors["models"] = traceback.format_exc()
+        print("[STARTUP ERROR] models")
+        print(startup_errors["models"])
+    startup_times["models"] = round(time.perf_counter() - start, 3)
+
+
+# === Startup di background: server langsung menerima request (liveness),
+# readiness baru true setelah DB dan model siap ===
+async def run_startup():
+    await asyncio.gather(_startup_database(), _startup_models())
+    print(f"[STARTUP] selesai: {startup_times}")
+
+
+def is_ready() -> bool:
+    return all(readiness.values())
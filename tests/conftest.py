@@ -0,0 +1,8 @@
+import os
+import tempfile
+
+# databases.database membuat engine saat di-import: test memakai SQLite lokal (aiosqlite untuk route async),
+# bukan DATABASE_URL dari .env
+_DB_DIR = tempfile.mkdtemp(prefix="matchcv-test-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'test.db')}"
+os.environ.pop("ASYNC_DATABASE_URL", None)
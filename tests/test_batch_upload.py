@@ -0,0 +1,68 @@
+import asyncio
+import hashlib
+import os
+import pytest
+from sqlalchemy import delete
+from databases.database import SessionLocal, engine
+from databases.models import ChatHistory, CVBlob, CVKeyword, CVUpload, User
+from databases.schema import ensure_schema
+from nlp.worker_pool import WorkerPoolFull
+from services import batch_upload, cv_storage
+
+# === Batch upload: kegagalan batch/transaksi gabungan diulang per file ===
+_KEYWORDS = ["python", "sql", "docker", "fastapi", "postgresql"]
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(cv_storage, "CV_STORAGE_DIR", str(tmp_path / "blobs"))
+    ensure_schema(engine)
+    session = SessionLocal()
+    try:
+        session.add(User(id=1, username="a", email="a@x", password="-"))
+        session.commit()
+        yield session
+        session.rollback()
+        for model in (ChatHistory, CVKeyword, CVUpload, CVBlob, User):
+            session.execute(delete(model))
+        session.commit()
+    finally:
+        session.close()
+
+
+def _item(tmp_path, name: str, analysis: dict) -> tuple:
+    content = f"%PDF {name}".encode()
+    path = tmp_path / f"{name}.tmp"
+    path.write_bytes(content)
+    return str(path), hashlib.sha256(content).hexdigest(), name, analysis, "rekomendasi"
+
+
+def test_analyze_falls_back_per_file(monkeypatch):
+    async def fake_run_in_pool(fn, raw_texts, cached, wait=False):
+        if len(raw_texts) > 1:
+            raise WorkerPoolFull()
+        if raw_texts[0] == "rusak":
+            raise ValueError("teks rusak")
+        return [{"raw_text": raw_texts[0]}]
+
+    monkeypatch.setattr(batch_upload, "run_in_pool", fake_run_in_pool)
+    raw_texts = {0: "cv a", 2: "rusak", 3: "cv c"}
+    analyses = asyncio.run(batch_upload._analyze([0, 2, 3], raw_texts, [None] * 4))
+
+    assert analyses[0] == {"raw_text": "cv a"}
+    assert isinstance(analyses[1], ValueError)
+    assert analyses[2] == {"raw_text": "cv c"}
+
+
+def test_save_falls_back_per_file(db, tmp_path):
+    good = _item(tmp_path, "a", {"raw_text": "cv a", "keywords": _KEYWORDS})
+    # Analisis tanpa raw_text gagal setelah blob CV pertama dipindah: transaksi gabungan di-rollback
+    broken = _item(tmp_path, "b", {"keywords": _KEYWORDS})
+    upload_ids = asyncio.run(batch_upload._save(db, [good, broken], {"id": 1}))
+
+    assert isinstance(upload_ids[0], int)
+    assert isinstance(upload_ids[1], KeyError)
+    saved = db.get(CVUpload, upload_ids[0])
+    assert saved.original_filename == "a" and os.path.exists(saved.saved_path)
+    assert db.query(CVUpload).count() == 1
+    assert db.query(CVBlob).one().ref_count == 1
@@ -0,0 +1,68 @@
+import asyncio
+import numpy as np
+import pytest
+from sqlalchemy import delete
+from databases.database import AsyncSessionLocal, SessionLocal, dispose_engines, engine
+from databases.models import CVEmbedding, CVUpload, User
+from databases.schema import ensure_schema
+from services.cv_embeddings import CV_EMBED_CHUNK_CHARS, DOCUMENT_KIND, SimilarCVIndex, embedding_rows, \
+    embedding_texts, flat_chunks, pooled_vectors
+
+# === Embedding dokumen = rata-rata chunk; CV yang dihapus keluar dari index CV serupa ===
+
+
+def test_document_covers_whole_cv():
+    text = " ".join(f"Proyek {i}: membangun layanan data dengan Python dan SQL." for i in range(60))
+    texts = embedding_texts(text)
+    assert len(texts[DOCUMENT_KIND]) > 1
+    assert all(len(chunk) <= CV_EMBED_CHUNK_CHARS for chunk in texts[DOCUMENT_KIND])
+    assert "Proyek 59" in texts[DOCUMENT_KIND][-1]
+
+
+def test_pooled_vectors_are_normalized_means():
+    texts = {DOCUMENT_KIND: ["a", "b", "c"], "skill": ["d"]}
+    vectors = np.eye(4, dtype=np.float32)
+    assert len(flat_chunks(texts)) == 4
+    document, skill = pooled_vectors(texts, vectors)
+    assert document == pytest.approx(np.array([1, 1, 1, 0]) / np.sqrt(3))
+    assert skill == pytest.approx([0, 0, 0, 1])
+
+
+def test_empty_cv_has_no_document():
+    assert embedding_texts("   ") == {}
+
+
+@pytest.fixture
+def uploads():
+    ensure_schema(engine)
+    db = SessionLocal()
+    try:
+        db.add(User(id=1, username="a", email="a@x", password="-"))
+        for upload_id, vector in [(1, [1, 0]), (2, [0.9, 0.1]), (3, [0.8, 0.2])]:
+            db.add(CVUpload(id=upload_id, user_id=1, original_filename=f"{upload_id}.pdf",
+                            saved_path=f"{upload_id}.pdf", extracted_text="", keywords=[]))
+            db.flush()
+            db.add_all(embedding_rows(upload_id, 1, [DOCUMENT_KIND], [np.asarray(vector) / np.linalg.norm(vector)]))
+        db.commit()
+        yield
+        for model in (CVEmbedding, CVUpload, User):
+            db.execute(delete(model))
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_evicted_cv_leaves_index(uploads):
+    index = SimilarCVIndex()
+
+    async def similar() -> list[int]:
+        try:
+            async with AsyncSessionLocal() as db:
+                return [r["upload_id"] for r in await index.find_similar(db, 1, k=5)]
+        finally:
+            await dispose_engines()
+
+    assert asyncio.run(similar()) == [2, 3]
+    index.evict(2)
+    assert asyncio.run(similar()) == [3]
+    assert index.stats()["kinds"] == {DOCUMENT_KIND: 2}
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import delete
+from starlette.requests import Request
+from databases.database import SessionLocal, engine
+from databases.models import CVJob
+from databases.schema import ensure_schema
+from routes.upload import get_job_result
+from services.jobs import claim_job, create_job, requeue_stale_jobs, job_content_hash, \
+    CV_JOB_MAX_ATTEMPTS, CV_JOB_STALE_SECONDS, JOB_ABANDONED_ERROR
+
+# === Job CV: klaim, job macet di "processing", hasil job gagal ===
+
+
+@pytest.fixture
+def db():
+    ensure_schema(engine)
+    session = SessionLocal()
+    try:
+        yield session
+        session.rollback()
+        session.execute(delete(CVJob))
+        session.commit()
+    finally:
+        session.close()
+
+
+def _job(db, tmp_path, name: str, status: str = "queued", attempts: int = 0, age: float = 0) -> CVJob:
+    path = tmp_path / f"{name}.pdf"
+    path.write_bytes(b"%PDF")
+    job = create_job(db, str(path), f"hash-{name}", f"{name}.pdf", None)
+    job.status, job.attempts = status, attempts
+    db.commit()
+    # updated_at diisi langsung (onupdate akan menimpa nilai lewat ORM)
+    db.query(CVJob).filter(CVJob.id == job.id)\
+        .update({"updated_at": datetime.utcnow() - timedelta(seconds=age)}, synchronize_session=False)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def test_claim_counts_attempts(db, tmp_path):
+    job = _job(db, tmp_path, "a")
+    assert claim_job(db, job.id)
+    assert not claim_job(db, job.id)
+    db.refresh(job)
+    assert (job.status, job.attempts) == ("processing", 1)
+    assert job_content_hash(job) == "hash-a"
+
+
+def test_requeue_stale_jobs(db, tmp_path):
+    stale = _job(db, tmp_path, "stale", "processing", attempts=1, age=CV_JOB_STALE_SECONDS + 60)
+    fresh = _job(db, tmp_path, "fresh", "processing", attempts=1)
+    exhausted = _job(db, tmp_path, "exhausted", "processing", attempts=CV_JOB_MAX_ATTEMPTS,
+                     age=CV_JOB_STALE_SECONDS + 60)
+
+    assert requeue_stale_jobs(db) == [stale.id]
+    for job in (stale, fresh, exhausted):
+        db.refresh(job)
+    assert stale.status == "queued"
+    assert fresh.status == "processing"
+    assert (exhausted.status, exhausted.error) == ("failed", JOB_ABANDONED_ERROR)
+    assert not (tmp_path / "exhausted.pdf").exists()
+    assert claim_job(db, stale.id)
+
+
+def test_failed_job_result_is_conflict(db, tmp_path):
+    job = _job(db, tmp_path, "failed", "failed")
+    job.error = "PDF rusak"
+    db.commit()
+    request = Request({"type": "http", "method": "GET", "path": "/", "headers": [], "session": {}})
+    with pytest.raises(HTTPException) as error:
+        get_job_result(job.id, request, db=db)
+    assert error.value.status_code == 409
+    assert "PDF rusak" in error.value.detail
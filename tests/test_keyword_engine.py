@@ -0,0 +1,122 @@
+import hashlib
+import numpy as np
+import pytest
+from keybert import KeyBERT
+from keybert._mmr import mmr as keybert_mmr
+from keybert.backend import BaseEmbedder
+from sklearn.feature_extraction.text import CountVectorizer, ENGLISH_STOP_WORDS
+from nlp import keyword_engine
+from nlp.keyword_engine import extract_keyword_scores, extract_keyword_scores_batch, generate_candidates, mmr, tokenize
+
+# === Keyword engine cepat vs jalur KeyBERT lama, pada input tetap ===
+# Model embedding diganti vektor deterministik per teks (hash), supaya test tidak butuh model asli
+# dan kedua jalur menerima embedding yang persis sama.
+_TEXTS = [
+    "Backend developer building REST APIs with Python, FastAPI and PostgreSQL. Deployed services on Docker "
+    "and Kubernetes, wrote data pipelines in Airflow and maintained CI pipelines for the engineering team.",
+    "Data analyst experienced in SQL, Tableau and Excel dashboards. Built reporting pipelines, cleaned "
+    "customer data and presented insights to product managers and marketing stakeholders.",
+    "Machine learning engineer: trained recommendation models, feature stores, experiment tracking, "
+    "model serving with TorchServe, monitoring drift in production and mentoring junior engineers.",
+    "Frontend engineer focused on React, TypeScript and design systems; accessibility audits, performance "
+    "budgets, component libraries and close collaboration with designers.",
+]
+_LANGUAGES = ["en", "en", "en", "unknown"]
+_NGRAM_RANGE = (1, 3)
+_DIVERSITY = 0.5
+
+
+class _HashEmbedder(BaseEmbedder):
+    dim = 32
+
+    def _vector(self, text: str) -> np.ndarray:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+        return vector / np.linalg.norm(vector)
+
+    # Antarmuka SentenceTransformer (dipakai keyword_engine)
+    def encode(self, texts, batch_size=32, normalize_embeddings=True, **kwargs):
+        return np.stack([self._vector(t) for t in texts])
+
+    # Antarmuka backend KeyBERT
+    def embed(self, documents, verbose=False):
+        return self.encode(documents)
+
+
+@pytest.fixture
+def embedder(monkeypatch):
+    model = _HashEmbedder()
+    monkeypatch.setattr("nlp.model_loader.get_embedding_model", lambda: model)
+    monkeypatch.setattr(keyword_engine, "KEYWORD_POS_FILTER", False)
+    return model
+
+
+def _unit_rows(rng, n, dim=16):
+    rows = rng.standard_normal((n, dim)).astype(np.float32)
+    return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("top_n, diversity", [(1, 0.5), (5, 0.0), (10, 0.5), (25, 0.7), (60, 0.9)])
+def test_mmr_matches_keybert(seed, top_n, diversity):
+    rng = np.random.default_rng(seed)
+    candidates = [f"kandidat{i}" for i in range(40)]
+    doc, rows = _unit_rows(rng, 1)[0], _unit_rows(rng, len(candidates))
+
+    fast = mmr(doc, rows, candidates, top_n, diversity)
+    expected = keybert_mmr(doc.reshape(1, -1), rows, candidates, top_n, diversity)
+    # KeyBERT mengurutkan hasil berdasarkan skor; pilihan dan skornya harus sama
+    fast = sorted(fast, key=lambda kv: -kv[1])
+    assert [k for k, _ in fast] == [k for k, _ in expected]
+    assert [s for _, s in fast] == pytest.approx([s for _, s in expected], abs=1e-4)
+
+
+def test_mmr_empty_candidates():
+    assert mmr(np.ones(4, dtype=np.float32), np.zeros((0, 4), dtype=np.float32), [], 5, 0.5) == []
+
+
+@pytest.mark.parametrize("text", _TEXTS)
+def test_tokenize_matches_count_vectorizer(text):
+    assert tokenize(text) == CountVectorizer().build_analyzer()(text)
+
+
+@pytest.mark.parametrize("text, language", list(zip(_TEXTS + ["Python 3 dev, 10 years; ML & AI on GCP v2"],
+                                                    _LANGUAGES + ["en"])))
+def test_candidates_match_count_vectorizer(text, language):
+    tokens = tokenize(text)
+    stopwords = set(ENGLISH_STOP_WORDS if language == "en" else ()) | {t for t in tokens if t.isdigit()}
+    vectorizer = CountVectorizer(ngram_range=_NGRAM_RANGE, stop_words=sorted(stopwords) or None).fit([text])
+    expected = {c for c in vectorizer.get_feature_names_out() if len(c) > 2}
+
+    assert set(generate_candidates(tokens, language, _NGRAM_RANGE, max_candidates=10_000)) == expected
+
+
+def test_candidates_keep_most_frequent():
+    tokens = tokenize("python python python sql sql docker")
+    assert generate_candidates(tokens, "en", (1, 1), max_candidates=2) == ["python", "sql"]
+
+
+@pytest.mark.parametrize("index", range(3))
+def test_extract_matches_keybert(embedder, index):
+    text = _TEXTS[index]
+    expected = KeyBERT(embedder).extract_keywords(
+        text, keyphrase_ngram_range=_NGRAM_RANGE, stop_words="english",
+        use_mmr=True, diversity=_DIVERSITY, top_n=15,
+    )
+    fast = extract_keyword_scores(text, "en", _NGRAM_RANGE, 15, _DIVERSITY)
+    assert sorted(fast, key=lambda kv: -kv[1]) == expected
+
+
+def test_extract_reuses_tokens(embedder):
+    text = _TEXTS[0]
+    assert extract_keyword_scores(text, "en", _NGRAM_RANGE, 20, _DIVERSITY, tokens=tokenize(text)) == \
+        extract_keyword_scores(text, "en", _NGRAM_RANGE, 20, _DIVERSITY)
+
+
+def test_batch_matches_single(embedder):
+    texts, languages = _TEXTS + ["", "the and of"], _LANGUAGES + ["en", "en"]
+    batch = extract_keyword_scores_batch(texts, languages, _NGRAM_RANGE, 20, _DIVERSITY)
+    assert batch == [
+        extract_keyword_scores(text, language, _NGRAM_RANGE, 20, _DIVERSITY)
+        for text, language in zip(texts, languages)
+    ]
@@ -0,0 +1,112 @@
+import asyncio
+import random
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import delete
+from databases.database import AsyncSessionLocal, SessionLocal, dispose_engines, engine
+from databases.models import CVKeyword, CVUpload, User
+from databases.schema import ensure_schema
+from services.keyword_index import backfill, index_terms, keyword_rows, normalize_keyword, search_uploads
+
+# === Pencarian lewat cv_keywords vs scan keyword semua CV (jalur lama) ===
+_VOCAB = [
+    "Python", "python developer", "SQL", "PostgreSQL database", "Docker", "Kubernetes", "machine learning",
+    "Data  Analyst", "analisis data", "React", "FastAPI", "Excel 2019", "ETL pipeline", "Tableau",
+    "manajemen proyek", "komunikasi", "Java", "Spring Boot", "AWS", "git",
+]
+_QUERIES = [
+    ["python"], ["Python", "sql"], ["docker", "kubernetes", "aws"], ["data"], ["analisis data", "excel"],
+    ["  MACHINE   learning "], ["java", "spring boot", "python", "sql"], ["2019"], ["tidak ada"], [""],
+]
+
+
+def _uploads() -> list[dict]:
+    rng = random.Random(16)
+    base = datetime(2024, 1, 1)
+    return [
+        {
+            "id": i,
+            "user_id": rng.choice([1, 2, None]),
+            "keywords": rng.sample(_VOCAB, rng.randint(0, 6)),
+            "created_at": base + timedelta(hours=i),
+        }
+        for i in range(1, 41)
+    ]
+
+
+UPLOADS = _uploads()
+
+
+@pytest.fixture(scope="module", autouse=True)
+def database():
+    ensure_schema(engine)
+    db = SessionLocal()
+    try:
+        db.add_all([User(id=1, username="a", email="a@x", password="-"),
+                    User(id=2, username="b", email="b@x", password="-")])
+        for up in UPLOADS:
+            db.add(CVUpload(id=up["id"], user_id=up["user_id"], original_filename=f"cv{up['id']}.pdf",
+                            saved_path=f"cv{up['id']}.pdf", extracted_text="", keywords=up["keywords"],
+                            created_at=up["created_at"]))
+        db.commit()
+        # Separuh di-index saat upload (keyword_rows), sisanya lewat backfill
+        db.add_all(r for up in UPLOADS[::2] for r in keyword_rows(up["id"], up["user_id"], up["keywords"]))
+        db.commit()
+        backfill(db)
+        yield
+        for model in (CVKeyword, CVUpload, User):
+            db.execute(delete(model))
+        db.commit()
+    finally:
+        db.close()
+
+
+def _reference(skills: list[str], user_id: int | None, limit: int) -> list[dict]:
+    terms = {normalize_keyword(s) for s in skills if normalize_keyword(s)}
+    if not terms:
+        return []
+    scored = []
+    for up in UPLOADS:
+        if user_id is not None and up["user_id"] != user_id:
+            continue
+        hits = terms & index_terms(up["keywords"])
+        if hits:
+            scored.append((len(hits), up, hits))
+    scored.sort(key=lambda s: (-s[0], -s[1]["id"]))
+    return [
+        {
+            "id": up["id"],
+            "user_id": up["user_id"],
+            "original_filename": f"cv{up['id']}.pdf",
+            "created_at": up["created_at"].isoformat(),
+            "matched_skills": sorted(hits),
+            "score": round(count / len(terms), 4),
+        }
+        for count, up, hits in scored[:limit]
+    ]
+
+
+async def _search(skills: list[str], user_id: int | None, limit: int) -> list[dict]:
+    try:
+        async with AsyncSessionLocal() as db:
+            return await search_uploads(db, skills, user_id, limit)
+    finally:
+        # Engine async terikat ke event loop; dibuang supaya asyncio.run berikutnya membuat yang baru
+        await dispose_engines()
+
+
+@pytest.mark.parametrize("skills", _QUERIES)
+@pytest.mark.parametrize("user_id", [None, 1, 2])
+@pytest.mark.parametrize("limit", [3, 50])
+def test_search_matches_full_scan(skills, user_id, limit):
+    assert asyncio.run(_search(skills, user_id, limit)) == _reference(skills, user_id, limit)
+
+
+def test_backfill_indexes_same_terms_as_upload():
+    db = SessionLocal()
+    try:
+        for up in UPLOADS:
+            stored = {k for (k,) in db.query(CVKeyword.keyword).filter(CVKeyword.cv_upload_id == up["id"])}
+            assert stored == index_terms(up["keywords"])
+    finally:
+        db.close()
@@ -0,0 +1,32 @@
+import numpy as np
+from services.llm_cache import LLMResponseCache
+
+# === Near-duplicate: kandidat hanya dari model + versi prompt yang sama ===
+_SCOPE = ("gemini-a", "1")
+
+
+def _unit(*values) -> list[float]:
+    vector = np.asarray(values, dtype=np.float32)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+def _cache() -> LLMResponseCache:
+    cache = LLMResponseCache(maxsize=16, ttl=60, similarity_threshold=0.9)
+    cache.put(cache.make_key(["python", "sql"], *_SCOPE), "jawaban", _unit(1, 0.1), _SCOPE)
+    return cache
+
+
+def test_near_duplicate_same_scope():
+    cache = _cache()
+    key = cache.make_key(["python", "postgresql"], *_SCOPE)
+    assert cache.get(key, _unit(1, 0.15), _SCOPE) == "jawaban"
+    assert cache.near_hits == 1
+
+
+def test_near_duplicate_ignores_other_model_or_prompt():
+    cache = _cache()
+    for scope in [("gemini-b", "1"), ("gemini-a", "2")]:
+        assert cache.get(cache.make_key(["python", "postgresql"], *scope), _unit(1, 0.15), scope) is None
+    # Tanpa scope tidak ada lookup near-duplicate
+    assert cache.get(cache.make_key(["python", "postgresql"], *_SCOPE), _unit(1, 0.15)) is None
+    assert cache.near_hits == 0
@@ -0,0 +1,97 @@
+import asyncio
+from contextlib import aclosing
+import pytest
+from services.llm_client import LLMClient, LLM_MAX_CONCURRENCY
+
+# === LLMClient.stream: stream upstream selalu ditutup dan slot dilepas ===
+# Response palsu meniru AsyncGenerateContentResponse (google.generativeai): __aiter__ membaca iterator
+# upstream di _iterator, seperti call gRPC.
+
+
+class _Chunk:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class _Response:
+    def __init__(self, upstream):
+        self._iterator = upstream
+
+    async def __aiter__(self):
+        async for item in self._iterator:
+            yield item
+
+
+class _StreamingModel:
+    def __init__(self, chunks: int = 5, delay: float = 0.0):
+        self.chunks = chunks
+        self.delay = delay
+        self.closed = []
+
+    async def _upstream(self):
+        try:
+            for i in range(self.chunks):
+                await asyncio.sleep(self.delay)
+                yield _Chunk(f"bagian {i} ")
+        finally:
+            self.closed.append(True)
+
+    async def generate_content_async(self, prompt, stream: bool = False, **kwargs):
+        return _Response(self._upstream())
+
+
+def _client(model) -> LLMClient:
+    client = LLMClient(backend="fake")
+    client.use_model(model)
+    return client
+
+
+def _assert_released(client: LLMClient, model: _StreamingModel):
+    assert model.closed == [True]
+    assert client.in_flight == 0
+    assert client._semaphore()._value == LLM_MAX_CONCURRENCY
+
+
+def test_stream_complete():
+    async def run():
+        model = _StreamingModel()
+        client = _client(model)
+        async with aclosing(client.stream("prompt", "test")) as chunks:
+            parts = [text async for text in chunks]
+        assert parts == [f"bagian {i} " for i in range(5)]
+        _assert_released(client, model)
+
+    asyncio.run(run())
+
+
+def test_stream_closed_by_consumer():
+    async def run():
+        model = _StreamingModel()
+        client = _client(model)
+        async with aclosing(client.stream("prompt", "test")) as chunks:
+            async for _ in chunks:
+                break
+        _assert_released(client, model)
+
+    asyncio.run(run())
+
+
+def test_stream_task_cancelled():
+    async def run():
+        model = _StreamingModel(chunks=100, delay=0.01)
+        client = _client(model)
+        received = asyncio.Event()
+
+        async def consume():
+            async with aclosing(client.stream("prompt", "test")) as chunks:
+                async for _ in chunks:
+                    received.set()
+
+        task = asyncio.create_task(consume())
+        await received.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        _assert_released(client, model)
+
+    asyncio.run(run())
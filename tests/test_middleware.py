@@ -0,0 +1,13 @@
+from fastapi.testclient import TestClient
+import main
+
+# === Batas ukuran upload: response 413 tetap membawa header CORS ===
+_ORIGIN = "https://match-cv.vercel.app"
+
+
+def test_upload_too_large_has_cors_headers(monkeypatch):
+    monkeypatch.setattr(main, "CV_MAX_UPLOAD_BYTES", 10)
+    # Tanpa "with": lifespan (worker pool, startup) tidak dijalankan
+    response = TestClient(main.app).post("/api/cv/upload", content=b"x" * 100, headers={"Origin": _ORIGIN})
+    assert response.status_code == 413
+    assert response.headers["access-control-allow-origin"] == _ORIGIN
@@ -0,0 +1,133 @@
+import asyncio
+import numpy as np
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import delete
+from starlette.requests import Request
+from databases.database import AsyncSessionLocal, SessionLocal, dispose_engines, engine
+from databases.models import CVUpload, User
+from databases.schema import ensure_schema
+from nlp.settings import EMBEDDING_MODEL_NAME
+from routes import upload
+from routes.upload import get_cv_sections, get_similar_cvs, match_jobs_for_cv
+from services import job_matching
+from services.job_index import job_index
+from services.llm_client import LLMUnavailable
+
+# === Route dengan upload_id di path: CV tidak ada -> 404, milik user lain -> 403 ===
+_CV_TEXT = "Pengalaman Kerja Backend developer di PT Contoh. Keahlian Python, SQL."
+
+
+@pytest.fixture(scope="module", autouse=True)
+def database():
+    ensure_schema(engine)
+    db = SessionLocal()
+    try:
+        db.add_all([User(id=1, username="a", email="a@x", password="-"),
+                    User(id=2, username="b", email="b@x", password="-")])
+        db.add_all([
+            CVUpload(id=10, user_id=1, original_filename="a.pdf", saved_path="a.pdf",
+                     extracted_text=_CV_TEXT, keywords=["python", "sql"]),
+            CVUpload(id=20, user_id=2, original_filename="b.pdf", saved_path="b.pdf",
+                     extracted_text=_CV_TEXT, keywords=["python"]),
+        ])
+        db.commit()
+        yield
+        for model in (CVUpload, User):
+            db.execute(delete(model))
+        db.commit()
+    finally:
+        db.close()
+
+
+def _request(user_id: int = 1) -> Request:
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": [],
+                    "session": {"user": {"id": user_id}}})
+
+
+def call(route, *args, **kwargs):
+    async def run():
+        try:
+            async with AsyncSessionLocal() as db:
+                return await route(*args, db=db, **kwargs)
+        finally:
+            await dispose_engines()
+    return asyncio.run(run())
+
+
+def status_of(route, *args, **kwargs) -> int:
+    with pytest.raises(HTTPException) as error:
+        call(route, *args, **kwargs)
+    return error.value.status_code
+
+
+@pytest.mark.parametrize("upload_id, status", [(0, 404), (999, 404), (20, 403)])
+def test_sections_missing_or_foreign_cv(upload_id, status):
+    assert status_of(get_cv_sections, upload_id, _request()) == status
+
+
+def test_sections_own_cv():
+    body = call(get_cv_sections, 10, _request())
+    assert body["upload_id"] == 10
+    assert "Backend developer" in body["sections"]["pengalaman"]
+
+
+@pytest.mark.parametrize("upload_id, status", [(0, 404), (999, 404), (20, 403)])
+def test_similar_missing_or_foreign_cv(upload_id, status):
+    assert status_of(get_similar_cvs, upload_id, _request(), k=5, scope="mine", section="document") == status
+
+
+def test_similar_own_cv_without_embedding():
+    assert status_of(get_similar_cvs, 10, _request(), k=5, scope="mine", section="document") == 409
+
+
+@pytest.mark.parametrize("upload_id, status", [(0, 404), (999, 404), (20, 403)])
+def test_match_jobs_missing_or_foreign_cv(monkeypatch, upload_id, status):
+    monkeypatch.setattr(job_index, "available", lambda: True)
+    assert status_of(match_jobs_for_cv, upload_id, _request(), top_n=5, explain=False) == status
+
+
+# === /match-jobs: index dari model lain -> 503; Gemini gagal -> tanpa penjelasan, bukan teks error ===
+@pytest.fixture
+def catalog(monkeypatch):
+    def use(model: str = EMBEDDING_MODEL_NAME, dim: int = 4):
+        monkeypatch.setattr(job_index, "_ensure_loaded", lambda: None)
+        monkeypatch.setattr(job_index, "meta", {"count": 1, "dim": dim, "model": model})
+        monkeypatch.setattr(job_index, "jobs", [{"id": 1, "title": "Backend", "company": "PT Contoh",
+                                                 "location": "", "url": "", "skills": ["python"]}])
+        monkeypatch.setattr(job_index, "matrix", np.ones((1, dim), dtype=np.float32) / 2)
+        monkeypatch.setattr(job_index, "ann", None)
+
+    async def query_vector(*args):
+        return np.ones(4, dtype=np.float32) / 2
+
+    monkeypatch.setattr(upload, "stored_query_vector", query_vector)
+    return use
+
+
+@pytest.mark.parametrize("model, dim", [("model-lain", 4), (EMBEDDING_MODEL_NAME, 8)])
+def test_match_jobs_index_mismatch(catalog, model, dim):
+    catalog(model, dim)
+    assert status_of(match_jobs_for_cv, 10, _request(), top_n=5, explain=False) == 503
+
+
+def test_match_jobs_without_explanation_on_llm_error(catalog, monkeypatch):
+    catalog()
+
+    async def failing(*args, **kwargs):
+        raise RuntimeError("quota")
+
+    monkeypatch.setattr(job_matching.llm_client, "generate", failing)
+    body = call(match_jobs_for_cv, 10, _request(), top_n=5, explain=True)
+    assert [m["id"] for m in body["matches"]] == [1]
+    assert body["explanation"] is None
+
+
+def test_match_jobs_llm_unavailable(catalog, monkeypatch):
+    catalog()
+
+    async def unavailable(*args, **kwargs):
+        raise LLMUnavailable()
+
+    monkeypatch.setattr(job_matching.llm_client, "generate", unavailable)
+    assert status_of(match_jobs_for_cv, 10, _request(), top_n=5, explain=True) == 503
@@ -0,0 +1,75 @@
+import asyncio
+import threading
+from concurrent.futures import Executor, Future
+from concurrent.futures.process import BrokenProcessPool
+import pytest
+from nlp import worker_pool
+from nlp.worker_pool import WorkerPoolFull, run_in_pool
+
+# === run_in_pool: slot penuh -> WorkerPoolFull atau menunggu; pool rusak -> dibuat ulang ===
+
+
+@pytest.fixture
+def thread_pool(monkeypatch):
+    # Tanpa proses worker (CV_WORKER_POOL_SIZE=0): task jalan di thread, kapasitas 1 + 1 antre
+    monkeypatch.setattr(worker_pool, "CV_WORKER_POOL_SIZE", 0)
+    monkeypatch.setattr(worker_pool, "CV_WORKER_QUEUE_LIMIT", 1)
+    monkeypatch.setattr(worker_pool, "_executor", None)
+
+
+def test_full_pool_rejects_or_waits(thread_pool):
+    async def run():
+        release = threading.Event()
+        busy = [asyncio.create_task(run_in_pool(release.wait, 5)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(WorkerPoolFull):
+            await run_in_pool(int, "1")
+
+        waiting = asyncio.create_task(run_in_pool(int, "1", wait=True))
+        await asyncio.sleep(0.05)
+        assert not waiting.done()
+        release.set()
+        assert await waiting == 1
+        assert await asyncio.gather(*busy) == [True, True]
+        assert worker_pool.pool_stats()["in_flight"] == 0
+
+    asyncio.run(run())
+
+
+class _BrokenExecutor(Executor):
+    def __init__(self):
+        self.closed = False
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        future.set_exception(BrokenProcessPool("worker mati"))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.closed = True
+
+
+def test_broken_pool_is_recreated(monkeypatch):
+    broken = _BrokenExecutor()
+    warmed = []
+
+    async def warm_pool():
+        warmed.append(worker_pool._executor)
+
+    monkeypatch.setattr(worker_pool, "CV_WORKER_POOL_SIZE", 1)
+    monkeypatch.setattr(worker_pool, "_executor", broken)
+    monkeypatch.setattr(worker_pool, "_ready_queue", worker_pool.mp.get_context("spawn").Queue())
+    monkeypatch.setattr(worker_pool, "warm_pool", warm_pool)
+
+    async def run():
+        with pytest.raises(WorkerPoolFull):
+            await run_in_pool(int, "1")
+        await worker_pool._warm_task
+
+    try:
+        asyncio.run(run())
+        assert broken.closed
+        assert worker_pool._executor not in (None, broken)
+        assert warmed == [worker_pool._executor]
+    finally:
+        worker_pool.shutdown_pool()